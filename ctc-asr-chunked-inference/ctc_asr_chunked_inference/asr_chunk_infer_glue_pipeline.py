@@ -3,6 +3,7 @@
 2. transcribe -> stateful but NOT buffering
 3. glue transcripts -> buffering
 """
+import time
 from dataclasses import dataclass, field
 from typing import Iterator, Optional, Iterable, Annotated, Any
 
@@ -33,6 +34,12 @@ from ml4audio.audio_utils.overlap_array_chunker import (
     OverlapArrayChunker,
     MessageChunk,
 )
+from ml4audio.audio_utils.streaming_vad_gate import StreamingVADGate
+from ml4audio.service_utils.streaming_metrics import (
+    get_streaming_metrics,
+    timed_iterable,
+    timed_stage,
+)
 
 set_seed(42)
 
@@ -61,10 +68,14 @@ class Aschinglupi(Buildable):
     audio_bufferer: Optional[OverlapArrayChunker] = field(
         init=True, repr=True, default=None
     )
+    # chunks without speech skip inference, the gluer simply never sees them
+    vad_gate: Optional[StreamingVADGate] = None
 
     def reset(self) -> None:
         self.audio_bufferer.reset()
         self.transcript_gluer.reset()
+        if self.vad_gate is not None:
+            self.vad_gate.reset()
 
     @property
     def input_sample_rate(self) -> int:
@@ -84,19 +95,48 @@ class Aschinglupi(Buildable):
         # self.audio_bufferer.reset()
         # self.transcript_gluer.build()  # this is somewhat annoying, that this buildable-object is not getting build cause it is child of cacheddata
         assert self.transcript_gluer.seqmatcher is not None
+        if self.vad_gate is not None:
+            assert self.vad_gate.sample_rate == self.input_sample_rate
         self.reset()
 
     @beartype
     def handle_inference_input(
         self, inpt: AudioMessageChunk
     ) -> Iterator[ASRStreamInferenceOutput]:
-        for chunk in self.audio_bufferer.handle_datum(inpt):
+        metrics = get_streaming_metrics()
+        if metrics is not None:
+            metrics.observe_audio(
+                inpt.message_id, len(inpt.array) / self.input_sample_rate
+            )
+        if self.vad_gate is not None:
+            with timed_stage("vad"):
+                self.vad_gate.handle_audio(inpt.array, inpt.end_of_signal)
+        chunks = timed_iterable("chunking", self.audio_bufferer.handle_datum(inpt))
+        for chunk in chunks:
             chunk: MessageChunk
+            if self.vad_gate is not None and self.vad_gate.is_silence(
+                chunk.frame_idx, len(chunk.array)
+            ):
+                if metrics is not None and chunk.end_of_signal:
+                    metrics.finish_session(chunk.message_id)
+                continue
+            start = time.perf_counter()
             letters = self.hf_asr_decoding_inferencer.transcribe_audio_array(
                 chunk.array
             )
             letters.timestamps += (chunk.frame_idx) / self.input_sample_rate
-            new_suffix = self.transcript_gluer.calc_transcript_suffix(letters)
+            with timed_stage("glueing"):
+                new_suffix = self.transcript_gluer.calc_transcript_suffix(letters)
+            if metrics is not None:
+                metrics.observe_compute(chunk.message_id, time.perf_counter() - start)
+                if new_suffix is NO_NEW_SUFFIX:
+                    metrics.count("no_new_suffix")
+                else:
+                    metrics.observe_emit(
+                        chunk.message_id, float(new_suffix.timestamps[-1])
+                    )
+                if chunk.end_of_signal:
+                    metrics.finish_session(chunk.message_id)
             if new_suffix is not NO_NEW_SUFFIX:
                 yield ASRStreamInferenceOutput(
                     id=chunk.message_id,
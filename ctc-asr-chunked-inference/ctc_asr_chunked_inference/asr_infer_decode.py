@@ -1,7 +1,7 @@
 import os
 import shutil
 from dataclasses import dataclass
-from typing import Union
+from typing import Union, Optional
 
 import numpy as np
 import torch
@@ -11,8 +11,14 @@ from ml4audio.asr_inference.logits_inferencer.asr_logits_inferencer import (
 )
 from ml4audio.audio_utils.audio_io import MAX_16_BIT_PCM
 from ml4audio.audio_utils.torchaudio_utils import torchaudio_resample
+from ml4audio.service_utils.streaming_metrics import timed_stage
 from transformers import set_seed
 
+from ctc_decoding.blank_frame_skipping import (
+    collapse_blank_frames,
+    ctc_blank_index,
+    map_to_original_frames,
+)
 from ctc_decoding.ctc_decoding import BaseCTCDecoder
 from ctc_decoding.logit_aligned_transcript import LogitAlignedTranscript
 from misc_utils.beartypes import (
@@ -71,6 +77,8 @@ class ASRInferDecoder(Buildable):
     input_sample_rate: int = 16000
     logits_inferencer: ASRLogitsInferencer = UNDEFINED  # order matters! first the logits_inferencer is build which builds the transcript_normalizer which is needed by decoder!
     decoder: Union[_UNDEFINED, BaseCTCDecoder] = UNDEFINED
+    # collapse runs of frames with blank-prob > blank_threshold before decoding, e.g. 0.999
+    blank_threshold: Optional[float] = None
 
     @property
     def vocab(self) -> list[str]:
@@ -78,13 +86,16 @@ class ASRInferDecoder(Buildable):
 
     @beartype
     def transcribe_audio_array(self, audio_array: NeNpFloatDim1) -> TimestampedLetters:
-        audio_array = convert_and_resample(
-            audio_array,
-            self.input_sample_rate,
-            self.logits_inferencer.asr_model_sample_rate,
-        )
-        logits = self.logits_inferencer.calc_logits(audio_array)
-        return self.__aligned_decode(logits, len(audio_array))
+        with timed_stage("resampling"):
+            audio_array = convert_and_resample(
+                audio_array,
+                self.input_sample_rate,
+                self.logits_inferencer.asr_model_sample_rate,
+            )
+        with timed_stage("logits_inference"):
+            logits = self.logits_inferencer.calc_logits(audio_array)
+        with timed_stage("decoding"):
+            return self.__aligned_decode(logits, len(audio_array))
 
     @beartype
     def __aligned_decode(
@@ -94,9 +105,16 @@ class ASRInferDecoder(Buildable):
         letters aligned to audio-frames
 
         """
-        dec_out: LogitAlignedTranscript = self.decoder.ctc_decode(logits.numpy())[0]
-
         logits_seq_len = logits.size()[0]
+        logits = logits.numpy()
+        if self.blank_threshold is not None:
+            logits, frame_ids = collapse_blank_frames(
+                logits, ctc_blank_index(self.vocab), self.blank_threshold
+            )
+        dec_out: LogitAlignedTranscript = self.decoder.ctc_decode(logits)[0]
+        if self.blank_threshold is not None:
+            dec_out.logit_ids = map_to_original_frames(dec_out.logit_ids, frame_ids)
+
         audio_to_logits_ratio = audio_array_seq_len / logits_seq_len
         timestamps = [
             audio_to_logits_ratio * i / self.input_sample_rate
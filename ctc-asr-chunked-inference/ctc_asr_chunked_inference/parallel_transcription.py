@@ -0,0 +1,140 @@
+"""
+offline "split-map-merge" transcription of long files
+    1. split: voice-segments (of a VAD, like NemoOfflineVAD.predict) are packed into work-units, cut only at pauses
+    2. map: a process-pool transcribes the work-units in parallel, every worker builds the pipeline once
+    3. merge: transcripts of the work-units are concatenated, timestamps are absolute (seconds since start of file)
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import torch
+from beartype import beartype
+
+from ctc_asr_chunked_inference.asr_chunk_infer_glue_pipeline import (
+    Aschinglupi,
+    aschinglupi_transcribe_chunks,
+)
+from misc_utils.beartypes import NeList, NpFloatDim1
+from misc_utils.dataclass_utils import UNDEFINED
+from misc_utils.prefix_suffix import BASE_PATHES
+from ml4audio.asr_inference.inference import SetupTearDown
+from ml4audio.audio_utils.aligned_transcript import TimestampedLetters
+from ml4audio.audio_utils.audio_io import break_array_into_chunks
+from ml4audio.audio_utils.audio_segmentation_utils import StartEnd
+
+_WORKER_PIPELINE: Optional[Aschinglupi] = None
+
+
+@beartype
+def pack_voice_segments(
+    voice_segments: NeList[StartEnd], unit_duration: float
+) -> list[StartEnd]:
+    """
+    consecutive voice-segments (and the pauses in between) are merged into work-units of up to unit_duration
+    a voice-segment is never cut -> one that is longer than unit_duration is a work-unit of its own
+    """
+    units = []
+    start, end = voice_segments[0]
+    for s, e in voice_segments[1:]:
+        if e - start > unit_duration:
+            units.append((start, end))
+            start = s
+        end = e
+    units.append((start, end))
+    return units
+
+
+@beartype
+def merge_transcripts(
+    transcripts: list[Optional[TimestampedLetters]],
+) -> Optional[TimestampedLetters]:
+    """
+    transcripts must have absolute timestamps and be in order, a space goes in between two of them
+    """
+    parts = [t for t in transcripts if t is not None and len(t.letters.strip(" ")) > 0]
+    if len(parts) == 0:
+        return None
+    letters, timestamps = [parts[0].letters], [parts[0].timestamps]
+    for part in parts[1:]:
+        if not letters[-1].endswith(" ") and not part.letters.startswith(" "):
+            letters.append(" ")
+            timestamps.append(np.array([part.timestamps[0] - 0.001]))
+        letters.append(part.letters)
+        timestamps.append(part.timestamps)
+    return TimestampedLetters("".join(letters), np.concatenate(timestamps))
+
+
+def _init_worker(pipeline: Aschinglupi, base_pathes: dict, num_threads: int) -> None:
+    global _WORKER_PIPELINE
+    BASE_PATHES.update(base_pathes)  # spawned processes start with an empty one
+    torch.set_num_threads(num_threads)
+    _WORKER_PIPELINE = pipeline.build()
+
+
+def _transcribe_work_unit(
+    audio: np.ndarray, offset: float, chunk_duration: float
+) -> Optional[TimestampedLetters]:
+    chunks = break_array_into_chunks(
+        audio, int(chunk_duration * _WORKER_PIPELINE.input_sample_rate)
+    )
+    transcript = aschinglupi_transcribe_chunks(_WORKER_PIPELINE, chunks)
+    if transcript is not None:
+        transcript.timestamps += offset
+    return transcript
+
+
+@dataclass
+class ParallelLongFileTranscriber(SetupTearDown):
+    """
+    pipeline: better not (yet) built, it gets pickled to every worker which then builds (loads) it
+    chunk_duration: work-units are fed into the pipeline in chunks of this duration, just like a stream would be
+    """
+
+    pipeline: Aschinglupi = UNDEFINED
+    num_workers: int = 4
+    threads_per_worker: int = 1
+    unit_duration: float = 60.0
+    chunk_duration: float = 1.0
+
+    _executor: Optional[ProcessPoolExecutor] = field(
+        init=False, repr=False, default=None
+    )
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),  # torch does not like fork
+            initializer=_init_worker,
+            initargs=(self.pipeline, dict(BASE_PATHES), self.threads_per_worker),
+        )
+        return self
+
+    def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
+        self._executor.shutdown()
+        self._executor = None
+
+    @beartype
+    def transcribe(
+        self, audio: NpFloatDim1, voice_segments: list[StartEnd]
+    ) -> Optional[TimestampedLetters]:
+        """
+        no voice_segments -> the VAD failed, the whole audio gets transcribed
+        """
+        sample_rate = self.pipeline.input_sample_rate
+        if len(voice_segments) == 0:
+            voice_segments = [(0.0, len(audio) / sample_rate)]
+        futures = [
+            self._executor.submit(
+                _transcribe_work_unit,
+                audio[round(start * sample_rate) : round(end * sample_rate)],
+                start,
+                self.chunk_duration,
+            )
+            for start, end in pack_voice_segments(voice_segments, self.unit_duration)
+            if round(end * sample_rate) > round(start * sample_rate)
+        ]
+        return merge_transcripts([f.result() for f in futures])
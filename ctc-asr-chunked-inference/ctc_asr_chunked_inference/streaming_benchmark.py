@@ -0,0 +1,150 @@
+"""
+offline streaming-benchmark with a tiny randomly initialized wav2vec2 -> catches (latency/rtf) regressions on a laptop
+transcripts are garbage of course, only timings and memory matter here
+    python -m ctc_asr_chunked_inference.streaming_benchmark tests/resources/LibriSpeech_dev-other_116_288046_116-288046-0011.opus --num-sessions 4 --speed 2
+"""
+
+import argparse
+import json
+import os
+from pprint import pprint
+
+import torch
+from beartype import beartype
+from transformers import (
+    Wav2Vec2Config,
+    Wav2Vec2CTCTokenizer,
+    Wav2Vec2FeatureExtractor,
+    Wav2Vec2ForCTC,
+    Wav2Vec2Processor,
+)
+
+from ctc_asr_chunked_inference.asr_chunk_infer_glue_pipeline import Aschinglupi
+from ctc_asr_chunked_inference.asr_infer_decode import ASRInferDecoder
+from ctc_decoding.huggingface_ctc_decoding import HFCTCGreedyDecoder
+from misc_utils.beartypes import NeList
+from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
+from ml4audio.asr_inference.logits_inferencer.hfwav2vec2_logits_inferencer import (
+    HFWav2Vec2LogitsInferencer,
+)
+from ml4audio.asr_inference.logits_inferencer.huggingface_checkpoints import (
+    HfModelFromCheckpoint,
+)
+from ml4audio.asr_inference.streaming_benchmark import (
+    StreamingPipelineSession,
+    audio_end_of_asr_output,
+    fork_pipeline,
+    run_streaming_benchmark,
+)
+from ml4audio.asr_inference.transcript_gluer import TranscriptGluer
+from ml4audio.audio_utils.overlap_array_chunker import OverlapArrayChunker
+from ml4audio.audio_utils.test_utils import get_test_vocab
+from ml4audio.audio_utils.torchaudio_utils import load_resample_with_torch
+
+SR = 16_000
+
+# same conv-feature-encoder as wav2vec2-base (20ms frames), transformer shrunk to nothing
+TINY_WAV2VEC2_CONFIG = {
+    "hidden_size": 32,
+    "num_hidden_layers": 2,
+    "num_attention_heads": 2,
+    "intermediate_size": 64,
+    "conv_dim": (32, 32, 32, 32, 32, 32, 32),
+    "num_conv_pos_embeddings": 16,
+    "num_conv_pos_embedding_groups": 2,
+}
+
+
+@beartype
+def save_tiny_random_wav2vec2(
+    model_dir: str, vocab: NeList[str], seed: int = 42
+) -> str:
+    """
+    config, weights (as pytorch_model.bin which HfModelFromCheckpoint expects), tokenizer and feature-extractor
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    vocab_file = f"{model_dir}/vocab.json"
+    with open(vocab_file, "w") as f:
+        json.dump({token: k for k, token in enumerate(vocab)}, f)
+    tokenizer = Wav2Vec2CTCTokenizer(
+        vocab_file, unk_token="<unk>", pad_token="<pad>", word_delimiter_token="|"
+    )
+    feature_extractor = Wav2Vec2FeatureExtractor(
+        feature_size=1, sampling_rate=SR, return_attention_mask=True
+    )
+    Wav2Vec2Processor(
+        feature_extractor=feature_extractor, tokenizer=tokenizer
+    ).save_pretrained(model_dir)
+
+    torch.manual_seed(seed)
+    config = Wav2Vec2Config(
+        vocab_size=len(vocab),
+        pad_token_id=vocab.index("<pad>"),
+        **TINY_WAV2VEC2_CONFIG,
+    )
+    config.save_pretrained(model_dir)
+    torch.save(Wav2Vec2ForCTC(config).state_dict(), f"{model_dir}/pytorch_model.bin")
+    return model_dir
+
+
+@beartype
+def build_tiny_random_aschinglupi(
+    cache_dir: str, step_dur: float = 1.0, window_dur: float = 4.0
+) -> Aschinglupi:
+    model_dir = save_tiny_random_wav2vec2(
+        f"{cache_dir}/tiny-random-wav2vec2", get_test_vocab()
+    )
+    BASE_PATHES["streaming_benchmark"] = cache_dir
+    inferencer = HFWav2Vec2LogitsInferencer(
+        checkpoint=HfModelFromCheckpoint(
+            name="tiny-random-wav2vec2",
+            model_name_or_path=model_dir,
+            hf_model_type="Wav2Vec2ForCTC",
+            base_dir=PrefixSuffix("streaming_benchmark", "am_models"),
+        )
+    )
+    return Aschinglupi(
+        hf_asr_decoding_inferencer=ASRInferDecoder(
+            input_sample_rate=SR,
+            logits_inferencer=inferencer,
+            decoder=HFCTCGreedyDecoder(tokenizer_name_or_path=model_dir),
+        ),
+        transcript_gluer=TranscriptGluer(),
+        audio_bufferer=OverlapArrayChunker(
+            chunk_size=int(window_dur * SR),
+            minimum_chunk_size=int(1 * SR),
+            min_step_size=int(step_dur * SR),
+        ),
+    ).build()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("audio_files", nargs="+")
+    parser.add_argument("--num-sessions", type=int, default=4)
+    parser.add_argument("--chunk-duration", type=float, default=0.1)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--step-dur", type=float, default=1.0)
+    parser.add_argument("--window-dur", type=float, default=4.0)
+    parser.add_argument("--cache-dir", default="/tmp/streaming_benchmark")
+    args = parser.parse_args()
+
+    aschinglupi = build_tiny_random_aschinglupi(
+        args.cache_dir, args.step_dur, args.window_dur
+    )
+    signals = [
+        load_resample_with_torch(f, target_sample_rate=SR).numpy().squeeze()
+        for f in args.audio_files
+    ]
+    report = run_streaming_benchmark(
+        lambda: StreamingPipelineSession(
+            fork_pipeline(aschinglupi, ("audio_bufferer", "transcript_gluer")),
+            audio_end_of_asr_output,
+        ),
+        signals,
+        num_sessions=args.num_sessions,
+        sample_rate=SR,
+        chunk_duration=args.chunk_duration,
+        speed=args.speed,
+    )
+    pprint(report.summary())
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from conftest import build_logits_inferencer
+from ml4audio.audio_utils.torchaudio_utils import load_resample_with_torch
+
+
+@pytest.mark.parametrize("inferencer_name", ["hf-wav2vec2", "nemo-conformer"])
+def test_calc_logits_batch(inferencer_name: str, librispeech_audio_file):
+    inferencer = build_logits_inferencer(inferencer_name)
+    SR = inferencer.asr_model_sample_rate
+    audio = (
+        load_resample_with_torch(librispeech_audio_file, target_sample_rate=SR)
+        .numpy()
+        .squeeze()
+    )
+    # different lengths -> padding, not sorted by length -> order must be restored
+    audios = [audio[: 3 * SR], audio[SR : 9 * SR], audio[2 * SR : 7 * SR]]
+
+    batch_logits = inferencer.calc_logits_batch(audios, max_batch_size=2)
+
+    for a, batched in zip(audios, batch_logits):
+        single = inferencer.calc_logits(a)
+        assert batched.shape == single.shape
+        # padding changes the normalization a little, greedy decoding must not care
+        agreement = np.mean(
+            batched.argmax(dim=-1).numpy() == single.argmax(dim=-1).numpy()
+        )
+        assert agreement > 0.95, f"{agreement=}"
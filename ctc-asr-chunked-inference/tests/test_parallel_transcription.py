@@ -0,0 +1,81 @@
+import numpy as np
+
+from ctc_asr_chunked_inference.asr_chunk_infer_glue_pipeline import Aschinglupi
+from ctc_asr_chunked_inference.asr_infer_decode import ASRInferDecoder
+from ctc_asr_chunked_inference.parallel_transcription import (
+    ParallelLongFileTranscriber,
+    merge_transcripts,
+    pack_voice_segments,
+)
+from ml4audio.asr_inference.transcript_gluer import TranscriptGluer
+from ml4audio.audio_utils.aligned_transcript import TimestampedLetters
+from ml4audio.audio_utils.overlap_array_chunker import OverlapArrayChunker
+from ml4audio.audio_utils.torchaudio_utils import load_resample_with_torch
+from ml4audio.text_processing.asr_metrics import calc_cer
+from ml4audio.text_processing.asr_text_cleaning import (
+    clean_and_filter_text,
+    Casing,
+)
+
+
+def test_pack_voice_segments():
+    segments = [(0.0, 3.0), (4.0, 9.0), (10.0, 12.0), (13.0, 30.0), (31.0, 32.0)]
+    assert pack_voice_segments(segments, unit_duration=10.0) == [
+        (0.0, 9.0),
+        (10.0, 12.0),
+        (13.0, 30.0),
+        (31.0, 32.0),
+    ]
+    assert pack_voice_segments(segments, unit_duration=100.0) == [(0.0, 32.0)]
+
+
+def test_merge_transcripts():
+    a = TimestampedLetters("AB C", np.array([0.1, 0.2, 0.3, 0.4]))
+    b = TimestampedLetters("DE", np.array([5.0, 5.1]))
+    merged = merge_transcripts([a, None, b])
+    assert merged.letters == "AB C DE"
+    assert np.allclose(merged.timestamps, [0.1, 0.2, 0.3, 0.4, 4.999, 5.0, 5.1])
+    assert merge_transcripts([None]) is None
+
+
+def test_parallel_long_file_transcription(
+    asr_infer_decoder: ASRInferDecoder,
+    librispeech_audio_file,
+    librispeech_ref,
+):
+    SR = asr_infer_decoder.input_sample_rate
+    audio = (
+        load_resample_with_torch(librispeech_audio_file, target_sample_rate=SR)
+        .numpy()
+        .squeeze()
+    )
+    duration = len(audio) / SR
+    # pretending the VAD found pauses every 5 seconds
+    voice_segments = [
+        (float(s), float(min(s + 5.0, duration))) for s in np.arange(0, duration, 5.0)
+    ]
+    pipeline = Aschinglupi(
+        hf_asr_decoding_inferencer=asr_infer_decoder,
+        transcript_gluer=TranscriptGluer(),
+        audio_bufferer=OverlapArrayChunker(
+            chunk_size=int(4.0 * SR),
+            minimum_chunk_size=int(1 * SR),
+            min_step_size=int(1.0 * SR),
+        ),
+    )
+    with ParallelLongFileTranscriber(
+        pipeline=pipeline, num_workers=2, unit_duration=10.0
+    ) as transcriber:
+        transcript = transcriber.transcribe(audio, voice_segments)
+
+    assert np.all(np.diff(transcript.timestamps) >= 0)
+    assert transcript.timestamps[-1] <= duration
+    ref = clean_and_filter_text(
+        librispeech_ref,
+        asr_infer_decoder.logits_inferencer.letter_vocab,
+        text_cleaner="en",
+        casing=Casing.upper,
+    )
+    cer = calc_cer([ref], [transcript.letters.strip(" ")])
+    print(f"{cer=}")
+    assert cer <= 0.05  # words cut at the fake pauses
@@ -0,0 +1,32 @@
+from ctc_asr_chunked_inference.streaming_benchmark import (
+    build_tiny_random_aschinglupi,
+    SR,
+)
+from ml4audio.asr_inference.streaming_benchmark import (
+    StreamingPipelineSession,
+    audio_end_of_asr_output,
+    fork_pipeline,
+    run_streaming_benchmark,
+)
+from ml4audio.audio_utils.torchaudio_utils import load_resample_with_torch
+
+
+def test_streaming_benchmark_with_tiny_random_model(tmp_path, librispeech_audio_file):
+    aschinglupi = build_tiny_random_aschinglupi(str(tmp_path))
+    signal = load_resample_with_torch(
+        librispeech_audio_file, target_sample_rate=SR
+    ).numpy()
+    report = run_streaming_benchmark(
+        lambda: StreamingPipelineSession(
+            fork_pipeline(aschinglupi, ("audio_bufferer", "transcript_gluer")),
+            audio_end_of_asr_output,
+        ),
+        [signal.squeeze()],
+        num_sessions=2,
+        sample_rate=SR,
+        speed=10.0,
+    )
+    summary = report.summary()
+    print(summary)
+    assert summary["num_sessions"] == 2
+    assert summary["rtf_max"] < 1.0
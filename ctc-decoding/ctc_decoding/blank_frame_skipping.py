@@ -0,0 +1,48 @@
+import re
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NeList, NumpyFloat2DArray
+
+BLANK_TOKEN_PTN = re.compile(r"^[<\[]pad[>\]]$", flags=re.IGNORECASE)
+
+
+@beartype
+def ctc_blank_index(vocab: NeList[str]) -> int:
+    """
+    same blank-token conventions as pyctcdecode's alphabet:
+    huggingface's <pad>, "" or "_", if there is none (nemo) the blank is the last logit (appended to the vocab)
+    """
+    for k, token in enumerate(vocab):
+        if token == "" or BLANK_TOKEN_PTN.match(token):
+            return k
+    return vocab.index("_") if "_" in vocab else len(vocab)
+
+
+@beartype
+def collapse_blank_frames(
+    logits: NumpyFloat2DArray, blank_idx: int, blank_threshold: float
+) -> tuple[NumpyFloat2DArray, np.ndarray]:
+    """
+    every run of frames with blank-probability > blank_threshold is collapsed into its first frame
+    one blank-frame per run needs to stay, it separates repeated letters ("l<pad>l" -> "ll")
+    logits can be either logits or log-probs (softmax of log-probs are the probs)
+    :return: compacted logits, frame_ids: index of every compacted frame in the original logits
+    """
+    log_probs_blank = logits[:, blank_idx] - np.logaddexp.reduce(logits, axis=1)
+    is_blank = log_probs_blank > np.log(blank_threshold)
+    keep = ~is_blank
+    keep[0] = True
+    keep[1:] |= ~is_blank[:-1]  # first frame of a blank-run
+    frame_ids = np.flatnonzero(keep)
+    return logits[frame_ids], frame_ids
+
+
+@beartype
+def map_to_original_frames(logit_ids: NeList[int], frame_ids: np.ndarray) -> list[int]:
+    """
+    beam-search's word-spans (and the letter-positions interpolated in between) point to compacted frames
+    """
+    idx = np.clip(logit_ids, 0, len(frame_ids) - 1)
+    return frame_ids[idx].tolist()
@@ -0,0 +1,33 @@
+import os
+
+import kenlm
+from beartype import beartype
+
+KENLM_BINARY_MAGIC = b"mmap lm http://kheafield.com/code"
+
+_SHARED_KENLM_MODELS: dict[str, kenlm.Model] = {}
+
+
+@beartype
+def is_kenlm_binary(file: str) -> bool:
+    with open(file, "rb") as f:
+        return f.read(len(KENLM_BINARY_MAGIC)) == KENLM_BINARY_MAGIC
+
+
+@beartype
+def load_shared_kenlm(file: str) -> kenlm.Model:
+    """
+    one model per file and process, all decoders of a process get the same one
+    binaries are lazily memory-mapped (read-only, file-backed) -> the pages live in the page-cache once per node
+    no matter how many processes map them, forked workers even inherit the mapping itself
+    arpa-files get parsed into private memory, nothing to share there!
+    """
+    key = os.path.realpath(file)
+    if key not in _SHARED_KENLM_MODELS:
+        config = kenlm.Config()
+        if is_kenlm_binary(key):
+            config.load_method = kenlm.LoadMethod.LAZY
+        else:
+            print(f"{file} is not a kenlm-binary, every process gets its own copy")
+        _SHARED_KENLM_MODELS[key] = kenlm.Model(key, config)
+    return _SHARED_KENLM_MODELS[key]
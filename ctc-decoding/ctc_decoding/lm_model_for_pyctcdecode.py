@@ -3,46 +3,58 @@ import shutil
 import subprocess
 import sys
 from abc import abstractmethod
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union, Any, Optional
+from typing import Union, Any, Optional, Iterator
 
+import kenlm
 from beartype import beartype
 from tqdm import tqdm
 
+from ctc_decoding.kenlm_mmap import is_kenlm_binary, load_shared_kenlm
 from data_io.readwrite_files import read_lines, write_lines
 from misc_utils.beartypes import NeList
 from misc_utils.cached_data import CachedData
 from misc_utils.dataclass_utils import _UNDEFINED, UNDEFINED
 from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
 from misc_utils.processing_utils import exec_command
+from misc_utils.utils import just_try
 from ml4audio.text_processing.asr_text_cleaning import VocabCasingAwareTextCleaner
 from ml4audio.text_processing.kenlm_arpa import GotArpaFile, ArpaFile
 
 Model_Unigrams_File = tuple[str, str]
 
 
+@beartype
+def iterate_arpa_unigrams(arpa_file: ArpaFile) -> Iterator[str]:
+    """
+    streams the \\1-grams: section, stops reading at its end -> never touches the (huge) higher order n-grams
+    """
+    in_unigrams_section = False
+    for line in read_lines(arpa_file):
+        if line.startswith("\\1-grams:"):
+            in_unigrams_section = True
+        elif in_unigrams_section:
+            if len(line) == 0 or line.startswith("\\"):
+                break
+            yield line.split("\t", 2)[1]
+
+
 @beartype
 def build_unigrams_from_arpa(
     arpa_file: ArpaFile, transcript_cleaner: VocabCasingAwareTextCleaner
 ) -> NeList[str]:
-    def gen_parse_arpa_file():
-        for line in read_lines(arpa_file):
-            if "2-grams:" in line:
-                break
-            elif len(line.split("\t")) < 2:
-                continue
-            else:
-                yield line.split("\t")[1]
-
     unigrams = list(
         {
             l
-            for raw in tqdm(
-                gen_parse_arpa_file(),
-                desc="building unigrams, the LMs vocabulary",
+            for cleaned in transcript_cleaner.clean_many(
+                tqdm(
+                    iterate_arpa_unigrams(arpa_file),
+                    desc="building unigrams, the LMs vocabulary",
+                )
             )
-            for l in transcript_cleaner(raw).split(" ")
+            for l in cleaned.split(" ")
         }
     )
 
@@ -52,6 +64,57 @@ def build_unigrams_from_arpa(
     return unigrams
 
 
+class SortedUnigrams:
+    """
+    drop-in for pyctcdecode's unigram-set and its pygtrie.CharTrie (LanguageModel._unigram_set/_char_trie)
+    building the pure-python trie for a large vocabulary is what makes decoder-startup slow
+    lookups here are binary searches in a sorted list
+    """
+
+    def __init__(self, sorted_unigrams: list[str]):
+        self.unigrams = sorted_unigrams
+
+    @staticmethod
+    def load(file: str) -> "SortedUnigrams":
+        with open(file, encoding="utf-8") as f:
+            return SortedUnigrams(f.read().split("\n")[:-1])
+
+    def save(self, file: str) -> None:
+        tmp_file = f"{file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.writelines(f"{u}\n" for u in self.unigrams)
+        os.replace(tmp_file, file)  # a restart should never see half-written file
+
+    def __len__(self) -> int:
+        return len(self.unigrams)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.unigrams)
+
+    def __contains__(self, word: str) -> bool:
+        i = bisect_left(self.unigrams, word)
+        return i < len(self.unigrams) and self.unigrams[i] == word
+
+    def has_node(self, prefix: str) -> int:
+        """
+        pygtrie returns 0 if prefix is not a prefix of any key, that is all pyctcdecode cares about
+        """
+        i = bisect_left(self.unigrams, prefix)
+        return int(i < len(self.unigrams) and self.unigrams[i].startswith(prefix))
+
+
+@beartype
+def build_decoder_unigrams(
+    unigrams_file: str, kenlm_model: kenlm.Model
+) -> SortedUnigrams:
+    """
+    same filtering as pyctcdecode's _prepare_unigram_set: only words known to the LM
+    """
+    return SortedUnigrams(
+        sorted({u for u in read_lines(unigrams_file) if u in kenlm_model})
+    )
+
+
 @dataclass
 class NgramLmAndUnigrams(CachedData):
     cache_base: PrefixSuffix = field(default_factory=lambda: BASE_PATHES["lm_models"])
@@ -73,11 +136,35 @@ class NgramLmAndUnigrams(CachedData):
     def data_dir(self):
         return self.cache_dir
 
+    @property
+    def decoder_unigrams_filepath(self) -> str:
+        """
+        preprocessed unigrams (filtered+sorted) -> decoder-startup does not need to parse anything
+        """
+        return f"{self.data_dir}/decoder_unigrams.txt"
+
     def _build_cache(self):
         """
         just because I am not sure yet wether it should be CachedData or BuildableData
         """
         self._build_data()
+        if self.unigrams_filepath:
+            self.load_decoder_unigrams(load_shared_kenlm(self.ngramlm_filepath))
+
+    @beartype
+    def load_decoder_unigrams(self, kenlm_model: kenlm.Model) -> SortedUnigrams:
+        """
+        caches that were built before decoder_unigrams existed get it written on first load
+        """
+        if os.path.isfile(self.decoder_unigrams_filepath):
+            return SortedUnigrams.load(self.decoder_unigrams_filepath)
+        unigrams = build_decoder_unigrams(self.unigrams_filepath, kenlm_model)
+        just_try(
+            lambda: unigrams.save(self.decoder_unigrams_filepath),
+            default=None,
+            verbose=True,  # read-only model-dir is not a reason to fail
+        )
+        return unigrams
 
     @abstractmethod
     def _build_data(self):
@@ -146,6 +233,9 @@ class KenLMBinaryUnigramsFile(NgramLmAndUnigrams):
 
     def _build_data(self) -> Any:
         shutil.copy(str(self.kenlm_binary_file), self.ngramlm_filepath)
+        assert is_kenlm_binary(
+            self.ngramlm_filepath
+        ), f"{self.kenlm_binary_file} is not a kenlm-binary, cannot be memory-mapped"
         if self.unigrams_filepath:
             shutil.copy(str(self.unigrams_file), self.unigrams_filepath)
 
@@ -154,6 +244,7 @@ def build_binary_kenlm(kenlm_bin_path: str, arpa_file: str, kenlm_binary_file: s
     """
     based on: "make_kenlm" method from https://github.com/NVIDIA/NeMo/blob/e859e43ef85cc6bcdde697f634bb3b16ee16bc6b/scripts/asr_language_modeling/ngram_lm/ngram_merge.py#L286
     Builds a language model from an ARPA format file using the KenLM toolkit.
+    binary-files can be memory-mapped -> see kenlm_mmap.load_shared_kenlm
     """
     sh_args = [
         os.path.join(kenlm_bin_path, "build_binary"),
@@ -193,5 +284,6 @@ class KenLMBinaryUnigramsFromArpa(NgramLmAndUnigrams):
             "/opt/kenlm/bin",
             self.arpa_unigrams.ngramlm_filepath,
             self.ngramlm_filepath,
-        )
+        ).check_returncode()
+        assert is_kenlm_binary(self.ngramlm_filepath)
         shutil.copy(str(self.arpa_unigrams.unigrams_filepath), self.unigrams_filepath)
@@ -4,11 +4,11 @@ from typing import Optional, Union, Annotated, Any
 
 from beartype import beartype
 from beartype.vale import Is
+from pyctcdecode import Alphabet, LanguageModel
 from pyctcdecode.constants import DEFAULT_UNK_LOGP_OFFSET
 from pyctcdecode.decoder import (
     WordFrames,
     BeamSearchDecoderCTC,
-    build_ctcdecoder,
     LMState,
 )
 
@@ -16,11 +16,11 @@ from ctc_decoding.ctc_decoding import (
     AlignedBeams,
 )
 from ctc_decoding.huggingface_ctc_decoding import HFCTCDecoder
+from ctc_decoding.kenlm_mmap import load_shared_kenlm
 from ctc_decoding.lm_model_for_pyctcdecode import (
     NgramLmAndUnigrams,
 )
 from ctc_decoding.logit_aligned_transcript import LogitAlignedTranscript
-from data_io.readwrite_files import read_lines
 from misc_utils.beartypes import NumpyFloat2DArray
 from misc_utils.dataclass_utils import (
     UNDEFINED,
@@ -75,22 +75,32 @@ class PyCTCKenLMDecoder(HFCTCDecoder):
     )
 
     def _build_self(self) -> Any:
+        """
+        does what pyctcdecode's build_ctcdecoder does, except for the unigrams
+        and the kenlm-model which is shared by all decoders (and processes) using the same file
+        """
+        kenlm_model = load_shared_kenlm(self.ngram_lm_model.ngramlm_filepath)
+        language_model = LanguageModel(
+            kenlm_model,
+            unigrams=None,
+            alpha=self.lm_weight,  # tuned on a val set
+            beta=self.beta,  # tuned on a val set
+            unk_score_offset=self.unk_offset,
+        )
         if self.ngram_lm_model.unigrams_filepath:
-            unigrams = list(read_lines(self.ngram_lm_model.unigrams_filepath))
+            unigrams = self.ngram_lm_model.load_decoder_unigrams(kenlm_model)
             if len(unigrams) < 10_000:
                 print(f"{self.ngram_lm_model.name} only got {len(unigrams)} unigrams")
 
             print(f"{len(unigrams)=}")
-        else:
-            unigrams = None
-        self._pyctc_decoder = build_ctcdecoder(
-            labels=self.vocab,
-            kenlm_model_path=self.ngram_lm_model.ngramlm_filepath,
-            unigrams=unigrams,
-            alpha=self.lm_weight,  # tuned on a val set
-            beta=self.beta,  # tuned on a val set
-            unk_score_offset=self.unk_offset,
-            # is_bpe=True,
+            # instead of set + pygtrie.CharTrie that pyctcdecode would build on every startup
+            # these are private attributes of pyctcdecode==0.5.0 -> pinned in the requirements
+            assert hasattr(language_model, "_char_trie"), "needs pyctcdecode==0.5.0"
+            language_model._unigram_set = unigrams
+            language_model._char_trie = unigrams
+
+        self._pyctc_decoder = BeamSearchDecoderCTC(
+            Alphabet.build_alphabet(self.vocab), language_model
         )
 
     @beartype
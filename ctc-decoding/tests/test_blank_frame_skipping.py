@@ -0,0 +1,34 @@
+import numpy as np
+
+from ctc_decoding.blank_frame_skipping import (
+    collapse_blank_frames,
+    ctc_blank_index,
+    map_to_original_frames,
+)
+
+
+def _greedy_ctc_path(logits: np.ndarray, blank_idx: int) -> list[int]:
+    ids = logits.argmax(axis=1)
+    collapsed = [i for k, i in enumerate(ids) if k == 0 or i != ids[k - 1]]
+    return [i for i in collapsed if i != blank_idx]
+
+
+def test_collapse_blank_frames(librispeech_logtis_file):
+    logits = np.load(librispeech_logtis_file, allow_pickle=True).squeeze()
+    blank_idx = ctc_blank_index(["<pad>", "<s>", "</s>", "<unk>", "|", "E"])
+    assert blank_idx == 0
+
+    compacted, frame_ids = collapse_blank_frames(logits, blank_idx, 0.999)
+    assert len(compacted) < 0.8 * len(logits)
+    assert np.all(logits[frame_ids] == compacted)
+    assert _greedy_ctc_path(compacted, blank_idx) == _greedy_ctc_path(logits, blank_idx)
+    assert map_to_original_frames([0, len(frame_ids)], frame_ids) == [
+        frame_ids[0],
+        frame_ids[-1],
+    ]
+
+
+def test_ctc_blank_index():
+    assert ctc_blank_index(["a", "b", "[PAD]"]) == 2
+    assert ctc_blank_index(["a", "_", "b"]) == 1
+    assert ctc_blank_index(["a", "b"]) == 2  # nemo: blank is the last logit
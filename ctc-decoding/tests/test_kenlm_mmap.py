@@ -0,0 +1,10 @@
+from conftest import TEST_RESOURCES
+from ctc_decoding.kenlm_mmap import is_kenlm_binary, load_shared_kenlm
+
+
+def test_load_shared_kenlm():
+    arpa_file = f"{TEST_RESOURCES}/lm.arpa"
+    assert not is_kenlm_binary(arpa_file)
+    model = load_shared_kenlm(arpa_file)
+    assert load_shared_kenlm(arpa_file) is model
+    assert "THE" in model
@@ -0,0 +1,38 @@
+import random
+
+from pygtrie import CharTrie
+
+from conftest import TEST_RESOURCES
+from ctc_decoding.lm_model_for_pyctcdecode import (
+    SortedUnigrams,
+    iterate_arpa_unigrams,
+)
+
+
+def test_sorted_unigrams_behave_like_pyctcdecodes_trie(tmp_path):
+    rng = random.Random(42)
+    letters = "abcÄß'"
+    words = {
+        "".join(rng.choice(letters) for _ in range(rng.randint(1, 6)))
+        for _ in range(500)
+    }
+    trie = CharTrie.fromkeys(words)
+
+    file = str(tmp_path / "unigrams.txt")
+    SortedUnigrams(sorted(words)).save(file)
+    unigrams = SortedUnigrams.load(file)
+    assert len(unigrams) == len(words)
+
+    queries = [
+        "".join(rng.choice(letters) for _ in range(rng.randint(0, 7)))
+        for _ in range(2000)
+    ]
+    for q in queries:
+        assert (unigrams.has_node(q) == 0) == (trie.has_node(q) == 0)
+        assert (q in unigrams) == (q in words)
+
+
+def test_iterate_arpa_unigrams():
+    unigrams = list(iterate_arpa_unigrams(f"{TEST_RESOURCES}/lm.arpa"))
+    assert len(unigrams) == 667
+    assert unigrams[:3] == ["<unk>", "<s>", "</s>"]
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Any, Optional
 
 from omegaconf import OmegaConf
 
@@ -8,23 +9,46 @@ from misc_utils.dataclass_utils import decode_dataclass
 from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
 from nemo_vad.nemo_offline_vad import NemoOfflineVAD
 
+DEFAULT_LANGUAGE = "default"
 
-def load_asr_inferencer():
+
+def _setup_base_pathes() -> str:
     cache_root_in_container = os.environ["CACHE_ROOT"]
     cache_root = os.environ.get("cache_root", cache_root_in_container)
     BASE_PATHES["base_path"] = "/"
     BASE_PATHES["cache_root"] = cache_root
     BASE_PATHES["asr_inference"] = PrefixSuffix("cache_root", "ASR_INFERENCE")
     BASE_PATHES["am_models"] = PrefixSuffix("cache_root", "AM_MODELS")
+    return cache_root
+
+
+def load_asr_inferencer(build: bool = True, dir_pattern: str = "Aschinglupi*"):
+    cache_root = _setup_base_pathes()
     p = next(
-        Path(cache_root).rglob("Aschinglupi*/dataclass.json")
+        Path(cache_root).rglob(f"{dir_pattern}/dataclass.json")
     )  # TODO(tilo): hard-coded the class-name here!!
     jzon = read_json(str(p))
     inferencer = decode_dataclass(jzon)
-    inferencer.build()
+    if build:
+        inferencer.build()
     return inferencer
 
 
+def load_asr_inferencers(models: Optional[str] = None) -> dict[str, Any]:
+    """
+    models: comma-separated language=dir_pattern pairs like "de=Aschinglupi-deu*,en=Aschinglupi-eng*"
+        several exported models (model-images) can live in one cache_root, their folder-names are unique
+    None -> the one and only Aschinglupi is the "default" language
+    inferencers are NOT built, that is done lazily by the ModelRegistry
+    """
+    if models is None:
+        return {DEFAULT_LANGUAGE: load_asr_inferencer(build=False)}
+    return {
+        language.strip(): load_asr_inferencer(build=False, dir_pattern=pattern.strip())
+        for language, pattern in (m.split("=") for m in models.split(","))
+    }
+
+
 # for parameters see: https://github.com/NVIDIA/NeMo/blob/aff169747378bcbcec3fc224748242b36205413f/examples/asr/conf/vad/vad_inference_postprocessing.yaml
 
 DEFAULT_NEMO_VAD_CONFIG = {
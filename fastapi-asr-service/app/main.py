@@ -1,41 +1,91 @@
 # pylint: skip-file
 import os
+import threading
 from typing import Any, Optional, Dict
 
 import numpy as np
 import uvicorn
 from beartype import beartype
-from fastapi import FastAPI, UploadFile
+from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 
 from app.fastapi_asr_service_utils import (
-    load_asr_inferencer,
+    load_asr_inferencers,
     load_vad_inferencer,
 )
+from ctc_asr_chunked_inference.parallel_transcription import (
+    ParallelLongFileTranscriber,
+)
 from misc_utils.beartypes import NumpyFloat1D
 from misc_utils.dataclass_utils import (
     encode_dataclass,
 )
 from ml4audio.asr_inference.asr_chunk_infer_glue_pipeline import Aschinglupi
-from ml4audio.audio_utils.aligned_transcript import AlignedTranscript, letter_to_words
+from ml4audio.audio_utils.aligned_transcript import (
+    AlignedTranscript,
+    TimestampedLetters,
+    letter_to_words,
+)
+from ml4audio.audio_utils.audio_io import MAX_16_BIT_PCM, break_array_into_chunks
 from ml4audio.audio_utils.nemo_utils import nemo_offline_vad_to_cut_away_noise
 from ml4audio.service_utils.fastapi_utils import (
     read_uploaded_audio_file,
     get_full_model_config,
 )
+from ml4audio.service_utils.model_registry import ModelRegistry
+from ml4audio.service_utils.process_memory import process_memory_usage
+from ml4audio.service_utils.response_cache import (
+    ResponseCache,
+    audio_cache_key,
+    hash_config,
+)
+from ml4audio.service_utils.streaming_metrics import (
+    enable_streaming_metrics,
+    get_streaming_metrics,
+)
 from nemo_vad.nemo_offline_vad import NemoOfflineVAD
 
 DEBUG = os.environ.get("DEBUG", "False").lower() != "false"
 if DEBUG:
     print("DEBUGGING MODE")
 
+METRICS = os.environ.get("METRICS", "False").lower() != "false"
+if METRICS:
+    enable_streaming_metrics()
+
+# >0 -> long files are split at the VAD's pauses and transcribed by that many worker-processes
+PARALLEL_WORKERS = int(os.environ.get("PARALLEL_WORKERS", 0))
+
+# several languages in one service: "de=Aschinglupi-deu*,en=Aschinglupi-eng*", see load_asr_inferencers
+ASR_MODELS = os.environ.get("ASR_MODELS", None)
+# least recently used models get evicted once the process' Rss exceeds this, 0 -> no eviction
+MODEL_RSS_BUDGET_GB = float(os.environ.get("MODEL_RSS_BUDGET_GB", 0))
+# nemo-model-file of a NemoLangClf, routes requests that do not specify a language
+LANG_CLF_MODEL = os.environ.get("LANG_CLF_MODEL", None)
+
 # logger = logging.getLogger("websockets")
 # logger.setLevel(logging.DEBUG if DEBUG else logging.INFO)
 # logger.addHandler(logging.StreamHandler())
 
 app = FastAPI(debug=DEBUG)
 
-asr_inferencer: Optional[Aschinglupi] = None
+asr_registry: Optional[ModelRegistry] = None
+lang_clf: Optional[Any] = None  # StreamingLangClf
 vad: Optional[NemoOfflineVAD] = None
+parallel_transcriber: Optional[ParallelLongFileTranscriber] = None
+# hash of vad's config, part of the response_cache's keys (together with the asr-model's config-hash)
+config_hash: Optional[str] = None
+# instead of the asr-model's config-hash if the language is to be detected: lang_clf's and all asr-models' configs
+detection_config_hash: Optional[str] = None
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 128)),
+    cache_dir=os.environ.get("RESPONSE_CACHE_DIR", None),
+)
+# models run in a thread-pool (event-loop stays free for uploads and cache-hits), but they are stateful
+# -> one lock per model (asr-models: see ModelRegistry.use), concurrent requests can still run different stages
+vad_lock = threading.Lock()
+lang_clf_lock = threading.Lock()
 
 # if DEBUG:
 #     shutil.rmtree("debug_wavs", ignore_errors=True)
@@ -59,24 +109,62 @@ def userfriendly_inferencer_dict(inferencer):
 SR = 16_000
 
 
-@app.post("/transcribe")
-async def upload_and_process_audio_file(file: UploadFile):
+@beartype
+def route_to_language(language: Optional[str]) -> Optional[str]:
     """
-    TODO(tilo): cannot go with normal sync def method, cause:
-    fastapi wants to run things in multiprocessing-processes -> therefore needs to pickle stuff
-    some parts of nemo cannot be pickled: "_pickle.PicklingError: Can't pickle <class 'nemo.collections.common.parts.preprocessing.collections.SpeechLabelEntity'>"
+    no language given -> the only one served, None if it is to be detected by the lang_clf
     """
-    global asr_inferencer, vad
+    if language is None and len(asr_registry.names) == 1:
+        language = asr_registry.names[0]
+    elif language is None:
+        if lang_clf is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"language must be one of {asr_registry.names}, no language-classifier configured",
+            )
+        return None
 
-    audio = await read_uploaded_audio_file(file)
+    check_is_served(language)
+    return language
+
+
+@beartype
+def check_is_served(language: str) -> None:
+    if language not in asr_registry.names:
+        raise HTTPException(
+            status_code=422,
+            detail=f"no model for language {language}, only for {asr_registry.names}",
+        )
 
-    audio = nemo_offline_vad_to_cut_away_noise(vad, audio)
+
+@beartype
+def detect_language(audio: NumpyFloat1D) -> str:
+    """
+    audio is fed in pieces, the lang_clf stops as soon as it is confident enough
+    """
+    signal = (np.clip(audio, -1.0, 1.0) * (MAX_16_BIT_PCM - 1)).astype(np.int16)
+    chunks = list(break_array_into_chunks(signal, SR))
+    language = None
+    with lang_clf_lock:
+        lang_clf.reset()
+        for k, chunk in enumerate(chunks):
+            language = lang_clf.handle_audio(chunk, end_of_signal=k == len(chunks) - 1)
+            if language is not None:
+                break
+    if language is not None:
+        check_is_served(language)
+        return language
+    raise HTTPException(status_code=400, detail="audio too short to detect language")
+
+
+@beartype
+def transcribe_to_hf_format(asr_inferencer: Aschinglupi, audio: NumpyFloat1D) -> dict:
     at: AlignedTranscript = asr_inferencer.transcribe_audio_array(audio)
     at.remove_unnecessary_spaces()
     tokens = letter_to_words(at.letters)
     # TODO: rename chunks to tokens or whatever, rename timestamp to timespan ?
 
-    hf_format = {
+    return {
         "text": at.text,
         "chunks": [
             {
@@ -89,12 +177,88 @@ async def upload_and_process_audio_file(file: UploadFile):
             for letters in tokens
         ],
     }
+
+
+@beartype
+def timestamped_letters_to_hf_format(letters: Optional[TimestampedLetters]) -> dict:
+    if letters is None:
+        return {"text": "", "chunks": []}
+    words, word = [], []
+    for letter, timestamp in zip(letters.letters, letters.timestamps):
+        if letter == " ":
+            if len(word) > 0:
+                words.append(word)
+            word = []
+        else:
+            word.append((letter, float(timestamp)))
+    if len(word) > 0:
+        words.append(word)
+    return {
+        "text": " ".join("".join(l for l, _ in w) for w in words),
+        "chunks": [
+            {"text": "".join(l for l, _ in w), "timestamp": (w[0][1], w[-1][1])}
+            for w in words
+        ],
+    }
+
+
+@app.post("/transcribe")
+async def upload_and_process_audio_file(
+    file: UploadFile, language: Optional[str] = None
+):
+    """
+    TODO(tilo): cannot go with normal sync def method, cause:
+    fastapi wants to run things in multiprocessing-processes -> therefore needs to pickle stuff
+    some parts of nemo cannot be pickled: "_pickle.PicklingError: Can't pickle <class 'nemo.collections.common.parts.preprocessing.collections.SpeechLabelEntity'>"
+    """
+    global asr_registry, vad, config_hash
+
+    audio = await read_uploaded_audio_file(file)
+    language = route_to_language(language)
+
+    def transcribe() -> dict:
+        """
+        language-detection is part of the cached computation -> a cache-hit does not need the lang_clf
+        """
+        lang = language if language is not None else detect_language(audio)
+        if parallel_transcriber is not None:
+            with vad_lock:
+                voice_segments, _ = vad.predict(audio)
+            # worker-processes have their own pipelines
+            hf_format = timestamped_letters_to_hf_format(
+                parallel_transcriber.transcribe(audio, voice_segments)
+            )
+        else:
+            with vad_lock:
+                voiced_audio = nemo_offline_vad_to_cut_away_noise(vad, audio)
+            with asr_registry.use(lang) as asr_inferencer:
+                hf_format = transcribe_to_hf_format(asr_inferencer, voiced_audio)
+        return {"language": lang} | hf_format
+
+    models_hash = (
+        asr_registry.config_hash(language)
+        if language is not None
+        else detection_config_hash
+    )
+    hf_format = await response_cache.get_or_compute(
+        audio_cache_key(audio, config_hash, models_hash),
+        lambda: run_in_threadpool(transcribe),
+    )
     return {"filename": file.filename} | hf_format
 
 
+def get_registered_inferencer(language: Optional[str]) -> Optional[Aschinglupi]:
+    """
+    the registered (not necessarily loaded) one, no language -> the first one
+    """
+    if asr_registry is None:
+        return None
+    return asr_registry.models.get(language or asr_registry.names[0], None)
+
+
 @app.get("/get_inferencer_dataclass")
-def get_inferencer_dataclass() -> Dict[str, Any]:
-    global asr_inferencer
+def get_inferencer_dataclass(language: Optional[str] = None) -> Dict[str, Any]:
+    asr_inferencer = get_registered_inferencer(language)
     if asr_inferencer is not None:
         d = encode_dataclass(asr_inferencer)
     else:
@@ -103,8 +267,8 @@ def get_inferencer_dataclass() -> Dict[str, Any]:
 
 
 @app.get("/model_config")
-def get_model_config() -> Dict[str, Any]:
-    global asr_inferencer
+def get_model_config(language: Optional[str] = None) -> Dict[str, Any]:
+    asr_inferencer = get_registered_inferencer(language)
     if asr_inferencer is not None:
         d = encode_dataclass(
             asr_inferencer,
@@ -125,8 +289,8 @@ def get_model_config() -> Dict[str, Any]:
 
 
 @app.get("/inferencer_config")
-def get_model_config() -> Dict[str, Any]:
-    global asr_inferencer
+def get_model_config(language: Optional[str] = None) -> Dict[str, Any]:
+    asr_inferencer = get_registered_inferencer(language)
     if asr_inferencer is not None:
         d = get_full_model_config(asr_inferencer)
     else:
@@ -134,11 +298,74 @@ def get_model_config() -> Dict[str, Any]:
     return d
 
 
+@app.get("/memory")
+def get_memory_usage() -> Dict[str, Any]:
+    """
+    of the worker-process that happens to handle this request, in bytes
+    loaded_models: languages whose models are currently loaded in this worker
+    """
+    loaded = asr_registry.loaded if asr_registry is not None else []
+    return process_memory_usage() | {"loaded_models": loaded}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> str:
+    """
+    prometheus text-format, per-stage timings, real-time-factor, emit-latencies
+    only collected if service was started with METRICS=true
+    """
+    metrics = get_streaming_metrics()
+    return metrics.to_prometheus() if metrics is not None else ""
+
+
 @app.on_event("startup")
 def startup_event():
-    global asr_inferencer, vad
-    asr_inferencer = load_asr_inferencer()
+    global asr_registry, lang_clf, vad, config_hash, detection_config_hash, parallel_transcriber
+    asr_registry = ModelRegistry(
+        models=load_asr_inferencers(ASR_MODELS),
+        rss_budget=int(MODEL_RSS_BUDGET_GB * 1024**3) or None,
+    )
+    if len(asr_registry.names) == 1 and PARALLEL_WORKERS == 0:
+        asr_registry.get(asr_registry.names[0])  # no lazy loading of the only model
+    if LANG_CLF_MODEL is not None:
+        from nemo_language_classification.nemo_lang_clf import (
+            NemoLangClf,
+            StreamingLangClf,
+        )
+
+        lang_clf = StreamingLangClf(
+            lang_clf=NemoLangClf(model_file=LANG_CLF_MODEL), sample_rate=SR
+        )
+        detection_config_hash = hash_config(
+            {
+                "lang_clf": get_full_model_config(lang_clf),
+                "asr_models": {
+                    name: asr_registry.config_hash(name) for name in asr_registry.names
+                },
+            }
+        )
+        lang_clf.lang_clf.build()  # after hashing its config, like the registry does
     vad = load_vad_inferencer()
+    if PARALLEL_WORKERS > 0:
+        assert len(asr_registry.names) == 1, "PARALLEL_WORKERS needs a single model"
+        # not built in this process, only the worker-processes load the model
+        parallel_transcriber = ParallelLongFileTranscriber(
+            pipeline=asr_registry.models[asr_registry.names[0]],
+            num_workers=PARALLEL_WORKERS,
+        ).__enter__()
+    config_hash = hash_config(
+        {
+            "vad": get_full_model_config(vad),
+            # timestamps are absolute only in parallel-mode
+            "parallel": PARALLEL_WORKERS > 0,
+        }
+    )
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if parallel_transcriber is not None:
+        parallel_transcriber.__exit__()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,10 @@
+import os
 from pprint import pprint
 
-from fastapi_asr_service.app.fastapi_asr_service_utils import load_asr_inferencer, \
-    load_vad_inferencer
+from fastapi_asr_service.app.fastapi_asr_service_utils import (
+    load_asr_inferencers,
+    load_vad_inferencer,
+)
 from misc_utils.dataclass_utils import (
     to_dict,
 )
@@ -11,7 +14,8 @@ if __name__ == "__main__":
     maybe it acts as kind of sanity/integration test??
     """
 
-    asr_inferencer = load_asr_inferencer()
+    for asr_inferencer in load_asr_inferencers(os.environ.get("ASR_MODELS")).values():
+        asr_inferencer.build()
+        pprint(to_dict(asr_inferencer))
     vad = load_vad_inferencer()
-    pprint(to_dict(asr_inferencer))
     pprint(to_dict(vad))
@@ -6,6 +6,7 @@ from torch.utils.data.dataloader import DataLoader
 from transformers import Trainer
 
 from huggingface_wav2vec2_finetuning.ctc_data_collator import DataCollatorCTCWithPadding
+from huggingface_wav2vec2_finetuning.data_loading_commons import IterableDatasetBase
 from huggingface_wav2vec2_finetuning.hf_finetune_utils import (
     ReduceLROnPlateauWithWarmup,
 )
@@ -63,9 +64,18 @@ class CTCTrainer(Trainer):
             yield collate_fn(data)
 
         """
+        if (
+            isinstance(self.train_dataset, IterableDatasetBase)
+            and self.train_dataset.yields_batches
+        ):
+            # dataset already yields length-bucketed batches of dynamic size
+            batch_size = None
+        else:
+            batch_size = self.args.train_batch_size
+
         return DataLoader(
             self.train_dataset,
-            batch_size=self.args.train_batch_size,
+            batch_size=batch_size,
             collate_fn=self.data_collator,
             num_workers=self.args.dataloader_num_workers,
             pin_memory=self.args.dataloader_pin_memory,
@@ -1,27 +1,51 @@
 import logging
 import os
 from abc import abstractmethod
-from dataclasses import dataclass, field, asdict
-from typing import Optional, Iterator, Iterable
+from dataclasses import dataclass, field, asdict, fields, is_dataclass
+from typing import Optional, Iterator, Iterable, Union, TypeVar
 
+import numpy as np
 import sys
 from beartype import beartype
 from nemo.collections.asr.parts.preprocessing import AudioAugmentor, AudioSegment
 
+from huggingface_wav2vec2_finetuning.feature_cache import (
+    FeatureCacheShard,
+    hash_cache_config,
+)
 from huggingface_wav2vec2_finetuning.hf_finetune_utils import (
     apply_asr_processor,
     HfASRSample,
+    encode_labels,
+    extract_input_values,
+    TARGET_SAMPLE_RATE,
+)
+from huggingface_wav2vec2_finetuning.length_bucketing import (
+    bucket_by_length,
+    PaddingEfficiency,
 )
 from misc_utils.beartypes import NeNpFloatDim1
 from misc_utils.dataclass_utils import UNDEFINED
 from misc_utils.utils import just_try, TimedIterable
 from ml4audio.audio_data.nemo_perturbation import (
     ProbaPerturbationDC,
+    NumpyRandomPerturbations,
     apply_nemo_perturbations_with_retry,
 )
 from ml4audio.audio_utils.audio_data_models import ArrayText
 from ml4audio.text_processing.asr_text_cleaning import TranscriptNormalizer
 
+T = TypeVar("T")
+
+# do not change what gets cached, only what happens with it afterwards
+NOT_CACHE_RELEVANT = (
+    "perturbations",
+    "max_batch_seconds",
+    "bucketing_buffer_size",
+    "feature_cache_dir",
+    "shufflebuffer_size",  # cached samples get shuffled after reading
+)
+
 logging.getLogger("filelock._api").setLevel(logging.ERROR)
 import torch
 from transformers import set_seed, Wav2Vec2CTCTokenizer
@@ -35,6 +59,11 @@ from transformers.models.wav2vec2.feature_extraction_wav2vec2 import (
 class IterableDatasetBase(torch.utils.data.IterableDataset):
 
     perturbations: Optional[list[ProbaPerturbationDC]] = None
+    # if set, yields length-bucketed batches (lists of samples) instead of single samples
+    max_batch_seconds: Optional[float] = None
+    bucketing_buffer_size: int = 1000
+    # if set, first epoch writes float16 features + labels into memory-mapped shards, later epochs read them
+    feature_cache_dir: Optional[str] = None
 
     augmentor: Optional[AudioAugmentor] = field(default=None, init=False, repr=False)
     worker_idx: Optional[int] = field(default=None, init=False, repr=False)
@@ -54,6 +83,10 @@ class IterableDatasetBase(torch.utils.data.IterableDataset):
     def __exit__(self):
         pass
 
+    @property
+    def yields_batches(self) -> bool:
+        return self.max_batch_seconds is not None
+
     def set_things(
         self,
         fe: Wav2Vec2FeatureExtractor,
@@ -64,20 +97,99 @@ class IterableDatasetBase(torch.utils.data.IterableDataset):
         self.tokenizer = to
         self.transcript_normalizer = tr
 
+    def _build_augmentor(self, worker_idx: int):
+        if self.perturbations is None or len(self.perturbations) == 0:
+            return
+        for p in self.perturbations:
+            if isinstance(p, NumpyRandomPerturbations):
+                p.reseed(worker_idx)
+        self.augmentor = AudioAugmentor(
+            perturbations=[(p.proba, p) for p in self.perturbations]
+        )
+
     @abstractmethod
     def _generate_array_texts(self) -> Iterator[ArrayText]:
         raise NotImplementedError
 
-    def _failsafe_feature_extraction(self, at_g: Iterable[ArrayText]):
+    def _failsafe_feature_extraction(
+        self,
+        at_g: Iterable[ArrayText],
+        cache_shard: Optional[FeatureCacheShard] = None,
+    ):
+        if cache_shard is not None:
+            cache_shard.start_writing()
         for array, text in at_g:
-            datum = just_try(lambda: self.process_array_text(array, text), verbose=True)
+            if cache_shard is None:
+                datum = just_try(
+                    lambda: self.process_array_text(array, text), verbose=True
+                )
+            else:
+                datum = just_try(
+                    lambda: self._process_and_cache(array, text, cache_shard),
+                    verbose=True,
+                )
             # datum = self.process_array_text(array, text)
             if datum is not None:
                 yield datum
             else:
                 print(f"{self.worker_idx}: got failed datum")
+        if cache_shard is not None:
+            cache_shard.finish_writing()
+
+    def _global_rank_and_world_size(self) -> tuple[int, int]:
+        world_size = int(os.environ.get("WORLD_SIZE", 1))
+        rank = int(os.environ.get("RANK", self.local_rank))
+        return rank, world_size
+
+    def _shuffle(self, g: Iterable[T]) -> Iterable[T]:
+        """
+        no shuffling here, datasets with a shuffle-buffer override this
+        """
+        return g
+
+    def _get_cache_shard(self) -> Optional[FeatureCacheShard]:
+        """
+        local_rank is not unique over nodes (shared file-system) -> global rank
+        """
+        if self.feature_cache_dir is None:
+            return None
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (
+            (0, 1) if worker_info is None else (worker_info.id, worker_info.num_workers)
+        )
+        rank, world_size = self._global_rank_and_world_size()
+        config_hash = self._cache_config_hash()
+        shard_name = f"rank{rank}-of-{world_size}-worker{worker_id}-of-{num_workers}"
+        return FeatureCacheShard(
+            shard_dir=f"{self.feature_cache_dir}/{shard_name}-{config_hash}",
+            values_are_features=self.augmentor is None,
+            config_hash=config_hash,
+        )
+
+    def _cache_config_hash(self) -> str:
+        """
+        like CachedData's hash-suffix: corpus, limit, start_offset, ... + tokenizer-vocab + feature-extractor
+        """
+        dataset_config = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.init and f.name not in NOT_CACHE_RELEVANT
+        }
+        return hash_cache_config(
+            {
+                "dataset": dataset_config,
+                "vocab": self.tokenizer.get_vocab(),
+                "feature_extractor": self.feature_extractor.to_dict(),
+                # repr of a non-dataclass would contain its memory-address
+                "transcript_normalizer": (
+                    self.transcript_normalizer
+                    if is_dataclass(self.transcript_normalizer)
+                    else type(self.transcript_normalizer).__name__
+                ),
+            }
+        )[:16]
 
-    def __iter__(self) -> Iterator[dict]:
+    def __iter__(self) -> Iterator[Union[dict, list[dict]]]:
 
         worker_info = torch.utils.data.get_worker_info()
 
@@ -88,6 +200,44 @@ class IterableDatasetBase(torch.utils.data.IterableDataset):
 
         set_seed(worker_idx)
         self.worker_idx = worker_idx
+        self._build_augmentor(worker_idx)
+
+        samples = self._generate_samples(worker_idx)
+        if self.yields_batches:
+            yield from self._generate_length_bucketed_batches(samples, worker_idx)
+        else:
+            yield from samples
+
+    def _generate_length_bucketed_batches(
+        self, samples: Iterator[dict], worker_idx: int
+    ) -> Iterator[list[dict]]:
+        stats = PaddingEfficiency()
+        batches = bucket_by_length(
+            samples,
+            max_batch_frames=round(
+                self.max_batch_seconds * self.feature_extractor.sampling_rate
+            ),
+            buffer_size=self.bucketing_buffer_size,
+            stats=stats,
+        )
+        for k, batch in enumerate(batches):
+            yield batch
+            if k > 0 and k % 100 == 0 or k == 10:
+                padding_stats = {
+                    "padding_efficiency": stats.efficiency,
+                    "avg_batch_size": stats.avg_batch_size,
+                }
+                print(f"{worker_idx=},{self.local_rank=}: {padding_stats=}")
+
+    def _generate_samples(self, worker_idx: int) -> Iterator[dict]:
+        cache_shard = self._get_cache_shard()
+        if cache_shard is not None and cache_shard.is_complete:
+            print(f"{worker_idx=}: reading from {cache_shard.shard_dir}")
+            yield from (
+                asdict(self._sample_from_cached(values, labels))
+                for values, labels in self._shuffle(cache_shard.read())
+            )
+            return
 
         array_texts = TimedIterable(
             self._generate_array_texts(),
@@ -95,7 +245,7 @@ class IterableDatasetBase(torch.utils.data.IterableDataset):
         )
 
         g = TimedIterable(
-            self._failsafe_feature_extraction(array_texts),
+            self._failsafe_feature_extraction(array_texts, cache_shard),
         )
         for k, datum in enumerate(g):
             datum: HfASRSample
@@ -125,3 +275,38 @@ class IterableDatasetBase(torch.utils.data.IterableDataset):
         assert text is not None
         datum = apply_asr_processor(array, text, self.feature_extractor, self.tokenizer)
         return datum
+
+    @beartype
+    def _process_and_cache(
+        self, array: NeNpFloatDim1, text: str, cache_shard: FeatureCacheShard
+    ) -> HfASRSample:
+        """
+        only the pre-augmentation state is cached, augmentation needs to be redone every epoch
+        """
+        text = self.transcript_normalizer.apply(text)
+        assert text is not None
+        labels = encode_labels(text, self.tokenizer)
+        if cache_shard.values_are_features:
+            values = extract_input_values(array, self.feature_extractor)
+        else:
+            values = array
+        cache_shard.write(values, labels)
+        return self._sample_from_cached(values, np.asarray(labels))
+
+    @beartype
+    def _sample_from_cached(
+        self, values: np.ndarray, labels: np.ndarray
+    ) -> HfASRSample:
+        values = values.astype(np.float32)
+        if self.augmentor is not None:
+            values = apply_nemo_perturbations_with_retry(
+                values,
+                sample_rate=self.feature_extractor.sampling_rate,
+                augmentor=self.augmentor,
+            )
+            values = extract_input_values(values, self.feature_extractor)
+        return HfASRSample(
+            input_values=values,
+            sampling_rate=TARGET_SAMPLE_RATE,
+            labels=labels.tolist(),
+        )
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, BinaryIO
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NeNpFloatDim1
+
+VALUES_FILE = "values.f16"
+LABELS_FILE = "labels.i32"
+INDEX_FILE = "index.npy"
+META_FILE = "meta.json"
+
+
+@beartype
+def hash_cache_config(config: dict) -> str:
+    """
+    objects that are not json-serializable (nested dataclasses) are hashed by their repr
+    """
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True, default=repr).encode("utf-8")
+    ).hexdigest()
+
+
+@dataclass
+class FeatureCacheShard:
+    """
+    one shard per data-loader-worker, written during first epoch, memory-mapped in later ones
+    values are float16 and either normalized input_values or (if augmentation is on) the not-yet-augmented audio
+    index rows: values_offset, values_len, labels_offset, labels_len
+    meta.json is written last -> shard without meta.json is incomplete (interrupted epoch) and gets rewritten
+    config_hash: of whatever determines the cached values and labels (dataset, tokenizer-vocab, feature-extractor),
+        a shard written with a different config is not complete
+    """
+
+    shard_dir: str
+    values_are_features: bool
+    config_hash: str
+
+    _values_f: Optional[BinaryIO] = field(init=False, repr=False, default=None)
+    _labels_f: Optional[BinaryIO] = field(init=False, repr=False, default=None)
+    _index: list[tuple[int, int, int, int]] = field(
+        init=False, repr=False, default_factory=list
+    )
+    _values_offset: int = field(init=False, repr=False, default=0)
+    _labels_offset: int = field(init=False, repr=False, default=0)
+
+    @property
+    def is_complete(self) -> bool:
+        meta_file = f"{self.shard_dir}/{META_FILE}"
+        if not os.path.isfile(meta_file):
+            return False
+        with open(meta_file) as f:
+            meta = json.load(f)
+        return (
+            meta["values_are_features"] == self.values_are_features
+            and meta.get("config_hash", None) == self.config_hash
+        )
+
+    def start_writing(self):
+        if os.path.isdir(self.shard_dir):
+            shutil.rmtree(self.shard_dir)
+        os.makedirs(self.shard_dir)
+        self._values_f = open(f"{self.shard_dir}/{VALUES_FILE}", "wb")
+        self._labels_f = open(f"{self.shard_dir}/{LABELS_FILE}", "wb")
+        self._index = []
+        self._values_offset, self._labels_offset = 0, 0
+
+    @beartype
+    def write(self, values: NeNpFloatDim1, labels: list[int]):
+        self._values_f.write(values.astype(np.float16).tobytes())
+        self._labels_f.write(np.asarray(labels, dtype=np.int32).tobytes())
+        self._index.append(
+            (self._values_offset, len(values), self._labels_offset, len(labels))
+        )
+        self._values_offset += len(values)
+        self._labels_offset += len(labels)
+
+    def finish_writing(self):
+        self._values_f.close()
+        self._labels_f.close()
+        np.save(f"{self.shard_dir}/{INDEX_FILE}", np.asarray(self._index, np.int64))
+        with open(f"{self.shard_dir}/{META_FILE}", "w") as f:
+            json.dump(
+                {
+                    "num_samples": len(self._index),
+                    "values_are_features": self.values_are_features,
+                    "config_hash": self.config_hash,
+                },
+                f,
+            )
+
+    def read(self) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        yields views into the memory-mapped files, nothing is copied here
+        """
+        index = np.load(f"{self.shard_dir}/{INDEX_FILE}")
+        if len(index) == 0:
+            return
+        values = np.memmap(
+            f"{self.shard_dir}/{VALUES_FILE}", dtype=np.float16, mode="r"
+        )
+        labels = np.memmap(f"{self.shard_dir}/{LABELS_FILE}", dtype=np.int32, mode="r")
+        for v_offset, v_len, l_offset, l_len in index:
+            yield values[v_offset : v_offset + v_len], labels[
+                l_offset : l_offset + l_len
+            ]
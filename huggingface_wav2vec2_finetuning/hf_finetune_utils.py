@@ -84,6 +84,29 @@ class HfASRSample:
     labels: list[int]
 
 
+@beartype
+def extract_input_values(
+    audio: NeNpFloatDim1,
+    feature_extractor: Wav2Vec2FeatureExtractor,
+) -> NeNpFloatDim1:
+    input_values = feature_extractor(
+        raw_speech=audio, sampling_rate=TARGET_SAMPLE_RATE
+    ).input_values
+    assert len(input_values) == 1
+    return input_values[0].squeeze()
+
+
+@beartype
+def encode_labels(
+    text: str,  # NeStr here?
+    tokenizer: Wav2Vec2CTCTokenizer,
+) -> list[int]:
+    is_just_noise = len(text) == 0
+    if is_just_noise:
+        text = SILENCE_SYMBOL  # TODO: how to handle noise/silence, with space or | ?
+    return tokenizer(text=text).input_ids
+
+
 @beartype
 def apply_asr_processor(
     audio: NeNpFloatDim1,
@@ -96,20 +119,10 @@ def apply_asr_processor(
     :param audio: -> feature_extraction
     :param text: -> tokenization
     """
-    input_values = feature_extractor(
-        raw_speech=audio, sampling_rate=TARGET_SAMPLE_RATE
-    ).input_values
-    assert len(input_values) == 1
-    input_values = input_values[0].squeeze()
-    is_just_noise = len(text) == 0
-    if is_just_noise:
-        text = SILENCE_SYMBOL  # TODO: how to handle noise/silence, with space or | ?
-
-    labels = tokenizer(text=text).input_ids
     return HfASRSample(
-        input_values=input_values,
+        input_values=extract_input_values(audio, feature_extractor),
         sampling_rate=TARGET_SAMPLE_RATE,
-        labels=labels,
+        labels=encode_labels(text, tokenizer),
     )
 
 
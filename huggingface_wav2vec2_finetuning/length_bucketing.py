@@ -0,0 +1,94 @@
+import random
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from beartype import beartype
+
+
+@dataclass
+class PaddingEfficiency:
+    """
+    efficiency = signal_frames / padded_frames, 1.0 means no padding at all
+    """
+
+    num_batches: int = 0
+    num_samples: int = 0
+    signal_frames: int = 0
+    padded_frames: int = 0
+
+    def update(self, lengths: list[int]):
+        self.num_batches += 1
+        self.num_samples += len(lengths)
+        self.signal_frames += sum(lengths)
+        self.padded_frames += len(lengths) * max(lengths)
+
+    @property
+    def efficiency(self) -> float:
+        return self.signal_frames / max(self.padded_frames, 1)
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.num_samples / max(self.num_batches, 1)
+
+
+@beartype
+def _cut_into_batches(
+    sorted_samples: list[dict],
+    max_batch_frames: int,
+    length_key: str,
+    max_batch_size: Optional[int] = None,
+) -> list[list[dict]]:
+    """
+    greedy: samples are sorted ascending, so the last one added to a batch determines its padded size
+    samples longer than max_batch_frames end up in a batch of their own
+    """
+    batches, batch = [], []
+    for sample in sorted_samples:
+        padded_size = (len(batch) + 1) * len(sample[length_key])
+        batch_is_full = max_batch_size is not None and len(batch) >= max_batch_size
+        if len(batch) > 0 and (padded_size > max_batch_frames or batch_is_full):
+            batches.append(batch)
+            batch = []
+        batch.append(sample)
+    if len(batch) > 0:
+        batches.append(batch)
+    return batches
+
+
+@beartype
+def bucket_by_length(
+    samples: Iterable[dict],
+    max_batch_frames: int,
+    buffer_size: int = 1000,
+    max_batch_size: Optional[int] = None,
+    length_key: str = "input_values",
+    stats: Optional[PaddingEfficiency] = None,
+) -> Iterator[list[dict]]:
+    """
+    dynamic batch-size: fills a buffer, sorts it by length and cuts it into batches
+    whose padded size (batch_size * longest) does not exceed max_batch_frames,
+    batches are yielded in random order
+    """
+    buffer: list[dict] = []
+
+    def flush() -> Iterator[list[dict]]:
+        batches = _cut_into_batches(
+            sorted(buffer, key=lambda s: len(s[length_key])),
+            max_batch_frames,
+            length_key,
+            max_batch_size,
+        )
+        random.shuffle(batches)
+        for batch in batches:
+            if stats is not None:
+                stats.update([len(s[length_key]) for s in batch])
+            yield batch
+
+    for sample in samples:
+        buffer.append(sample)
+        if len(buffer) >= buffer_size:
+            yield from flush()
+            buffer = []
+
+    if len(buffer) > 0:
+        yield from flush()
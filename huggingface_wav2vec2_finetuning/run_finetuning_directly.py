@@ -32,6 +32,7 @@ def create_finetuner(
     augmentations = [
         # TranscodePerturbationDC(0.5),
         # SoxPerturbations(proba=0.75),
+        # NumpyRandomPerturbations(proba=0.75),  # in-process, much faster than sox
     ]
     # fmt: off
     new_vocab = ["<pad>", "<s>", "</s>","<unk>", "|", "'", "-", "a", "b", "c", "d", "e", "f", "g", "h", "i", "j", "k", "l", "m", "n", "o", "p", "q", "r", "s", "t", "u", "v", "w", "x", "y", "z", "ä", "ö", "ü","ß"]
@@ -60,7 +61,10 @@ def create_finetuner(
             perturbations=augmentations,
             limit=100_000,
         ),
-        eval_dataset=IterableSlicingDataset(array_texts=eval_corpus, limit=100),
+        # hf's Trainer already shards eval-datasets over ranks (IterableDatasetShard)
+        eval_dataset=IterableSlicingDataset(
+            array_texts=eval_corpus, limit=100, shard_over_ranks=False
+        ),
         train_args=TrainArgs(
             run_name=run_name_for_wandb,
             overwrite_output_dir=True,
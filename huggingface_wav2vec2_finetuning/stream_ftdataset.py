@@ -1,8 +1,6 @@
-import itertools
 from dataclasses import dataclass
-from typing import Optional, Iterator, Union
+from typing import Optional, Iterator, Union, Iterable, TypeVar
 
-import math
 import torch
 from beartype import beartype
 
@@ -13,52 +11,72 @@ from misc_utils.utils import buffer_shuffle
 
 from ml4audio.audio_utils.audio_data_models import AudioTextData, ArrayText
 
+T = TypeVar("T")
+
 
 @beartype
-def calc_this_workers_start_end(start: int, end: int) -> tuple[int, int]:
+def calc_this_workers_shard(rank: int, world_size: int) -> tuple[int, int]:
     """
+    stride-sharding over (rank, worker_id): k-th shard gets every num_shards-th sample starting at k
+    thereby no worker needs to eat large portions of the input-iterable that belong to other workers
+    shards are worker-major -> a rank gets every world_size-th sample no matter how many workers it has
     see: https://github.com/pytorch/pytorch/blob/f2582a59d0835323ebf143726ea79ba52e7cceff/torch/utils/data/dataset.py#L128
 
-    TODO: actually this is a stupid idea! would be better if kth-worker would "not-skip" every k-th sample
-        thereby no need to eat large portions of the entire input-iterable! which can be very expensive!
+    :return: shard_idx, num_shards
     """
     worker_info = torch.utils.data.get_worker_info()
-    if worker_info is None:  # single-process data loading, return the full iterator
-        iter_start = start
-        iter_end = end
+    if worker_info is None:  # single-process data loading
+        num_workers, worker_id = 1, 0
     else:  # in a worker process
-        per_worker = int(math.ceil((end - start) / float(worker_info.num_workers)))
-        worker_id = worker_info.id
-        iter_start = start + worker_id * per_worker
-        iter_end = min(iter_start + per_worker, end)
-        print(f"{worker_id=}: {iter_start=}, {iter_end=}")
-    return iter_start, iter_end
+        num_workers, worker_id = worker_info.num_workers, worker_info.id
+    shard_idx = worker_id * world_size + rank
+    num_shards = world_size * num_workers
+    print(f"{rank=},{worker_id=}: {shard_idx=}, {num_shards=}")
+    return shard_idx, num_shards
 
 
 @dataclass
 class IterableSlicingDataset(IterableDatasetBase, Buildable):
     """
-    multiple data-loaders reading from corpus need to start-end at different "points" in the iterable
+    multiple data-loaders reading from corpus need to read different samples of the iterable
+    :param start_offset: to resume training, number of samples that were already consumed (globally, over all shards)
+    :param shard_over_ranks: set to False if something else already shards over ranks, like hf's IterableDatasetShard does for eval-datasets
     """
 
     array_texts: Union[_UNDEFINED, AudioTextData] = UNDEFINED
     limit: Optional[int] = None
     shufflebuffer_size: Optional[int] = None
+    start_offset: int = 0
+    shard_over_ranks: bool = True
 
     def __len__(self):
-        return self.limit
+        """
+        number of samples of this rank (all its workers together)
+        length-bucketed batches are of dynamic size, their number is not known in advance
+            -> TypeError like for an IterableDataset without __len__, hf's Trainer then needs max_steps
+        """
+        if self.yields_batches:
+            raise TypeError("number of length-bucketed batches is not known")
+        rank, world_size = self._rank_and_world_size()
+        return len(range(self.start_offset + rank, self.limit, world_size))
+
+    def _rank_and_world_size(self) -> tuple[int, int]:
+        if self.shard_over_ranks:
+            rank, world_size = self._global_rank_and_world_size()
+        else:
+            world_size, rank = 1, 0
+        return rank, world_size
+
+    def _shuffle(self, g: Iterable[T]) -> Iterable[T]:
+        if self.shufflebuffer_size is None:
+            return g
+        return buffer_shuffle(g, buffer_size=self.shufflebuffer_size)
 
     @beartype
     def _generate_array_texts(self) -> Iterator[ArrayText]:
-        iter_start, iter_end = calc_this_workers_start_end(0, self.limit)
-        g = (
-            (a, t)
-            # for corpus in self.corpus
-            for a, t in self.array_texts
+        rank, world_size = self._rank_and_world_size()
+        shard_idx, num_shards = calc_this_workers_shard(rank, world_size)
+        array_text_g = self.array_texts.iterate_shard(
+            shard_idx, num_shards, start=self.start_offset, stop=self.limit
         )
-        array_text_g = itertools.islice(g, iter_start, iter_end)
-        if self.shufflebuffer_size is not None:
-            g = buffer_shuffle(array_text_g, buffer_size=self.shufflebuffer_size)
-        else:
-            g = array_text_g
-        return iter(g)
+        return iter(self._shuffle(array_text_g))
@@ -0,0 +1,180 @@
+"""
+CTC-Viterbi forced-alignment of known transcripts to logits (of an ASRLogitsInferencer)
+trellis over the blank-extended token-sequence: blank,t_1,blank,t_2,...,t_L,blank
+numpy-vectorized over the states of all utterances of a batch, python-loop only over frames
+"""
+
+from typing import Optional
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NeList, NeStr, NumpyFloat2DArray
+from ml4audio.audio_utils.aligned_transcript import TimestampedLetters
+
+SPACE_TOKENS = [" ", "|", "▁"]
+
+
+def _log_softmax(logits: np.ndarray) -> np.ndarray:
+    return logits - np.logaddexp.reduce(logits, axis=1, keepdims=True)
+
+
+def _extend_with_blanks(token_ids: list[int], blank_idx: int) -> np.ndarray:
+    extended = np.full(2 * len(token_ids) + 1, blank_idx, dtype=np.int64)
+    extended[1::2] = token_ids
+    return extended
+
+
+def _band_starts(num_frames: int, num_states: int, band_width: int) -> np.ndarray:
+    """
+    band is centered on the diagonal of the trellis, first frame starts at state 0, last frame ends at last state
+    """
+    centers = np.round(
+        np.arange(num_frames) * (num_states - 1) / max(num_frames - 1, 1)
+    )
+    starts = centers.astype(np.int64) - band_width // 2
+    return np.clip(starts, 0, max(num_states - band_width, 0))
+
+
+@beartype
+def ctc_forced_align_batch(
+    log_probs: NeList[NumpyFloat2DArray],
+    token_ids: NeList[NeList[int]],
+    blank_idx: int,
+    band_width: Optional[int] = None,
+) -> list[np.ndarray]:
+    """
+    log_probs: one (num_frames,vocab_size)-array per utterance, logits are fine too (get log-softmaxed)
+    band_width: None -> full trellis, else only band_width states around the diagonal are considered
+        backpointers need num_frames*batch_size*band_width bytes -> band for hour-long audio!
+        the band must be wide enough to contain the true path (speaking-rate variations), 500-2000 states is plenty
+    :return: per utterance the index of the first frame of every token
+    """
+    assert len(log_probs) == len(token_ids)
+    batch_size = len(log_probs)
+    num_frames = np.array([len(lp) for lp in log_probs])
+    num_states = np.array([2 * len(ids) + 1 for ids in token_ids])
+    max_frames, max_states = int(num_frames.max()), int(num_states.max())
+    width = max_states if band_width is None else min(band_width, max_states)
+
+    vocab_size = log_probs[0].shape[1]
+    lp = np.full((batch_size, max_frames, vocab_size), -np.inf, dtype=np.float32)
+    ext = np.full((batch_size, max_states), blank_idx, dtype=np.int64)
+    band_starts = np.zeros((batch_size, max_frames), dtype=np.int64)
+    for b, (x, ids) in enumerate(zip(log_probs, token_ids)):
+        assert x.shape[1] == vocab_size
+        lp[b, : len(x)] = _log_softmax(x.astype(np.float32))
+        ext[b, : num_states[b]] = _extend_with_blanks(ids, blank_idx)
+        band_starts[b, : len(x)] = _band_starts(len(x), num_states[b], width)
+    # no skipping over a blank if the tokens left and right of it are the same
+    skip_allowed = np.zeros((batch_size, max_states), dtype=bool)
+    skip_allowed[:, 2:] = (ext[:, 2:] != blank_idx) & (ext[:, 2:] != ext[:, :-2])
+
+    rows = np.arange(batch_size)[:, None]
+    offsets = np.arange(width)[None, :]
+    backpointers = np.zeros((max_frames, batch_size, width), dtype=np.int8)
+    alpha = np.full((batch_size, width), -np.inf, dtype=np.float32)
+    for t in range(max_frames):
+        is_active = (t < num_frames)[:, None]
+        start = band_starts[:, t][:, None]
+        states = start + offsets
+        is_state = states < num_states[:, None]
+        states = np.minimum(states, max_states - 1)
+        emission = lp[rows, t, ext[rows, states]]
+
+        if t == 0:
+            new_alpha = np.where(states <= 1, emission, -np.inf)
+            best = np.zeros((batch_size, width), dtype=np.int8)
+        else:
+            prev_start = band_starts[:, t - 1][:, None]
+            candidates = np.full((3, batch_size, width), -np.inf, dtype=np.float32)
+            for k in range(3):
+                prev = states - k - prev_start
+                in_band = (prev >= 0) & (prev < width)
+                if k == 2:
+                    in_band &= skip_allowed[rows, states]
+                prev_alpha = np.take_along_axis(alpha, np.clip(prev, 0, width - 1), 1)
+                candidates[k] = np.where(in_band, prev_alpha, -np.inf)
+            best = np.argmax(candidates, axis=0).astype(np.int8)
+            new_alpha = np.max(candidates, axis=0) + emission
+
+        new_alpha = np.where(is_state, new_alpha, -np.inf)
+        alpha = np.where(is_active, new_alpha, alpha)
+        backpointers[t] = best
+
+    # last frame of each utterance: end in last token or trailing blank
+    last_start = band_starts[np.arange(batch_size), num_frames - 1]
+    end_scores = np.stack(
+        [alpha[np.arange(batch_size), num_states - k - last_start] for k in (1, 2)]
+    )
+    assert np.all(
+        np.isfinite(end_scores.max(axis=0))
+    ), f"transcripts do not fit into logits (too short or band too narrow): {end_scores=}"
+    state = num_states - 1 - np.argmax(end_scores, axis=0)
+
+    path = np.zeros((max_frames, batch_size), dtype=np.int64)
+    for t in range(max_frames - 1, -1, -1):
+        is_active = t < num_frames
+        path[t] = state
+        in_band = np.clip(state - band_starts[:, t], 0, width - 1)
+        step = backpointers[t, np.arange(batch_size), in_band]
+        state = np.where(is_active, state - step, state)
+
+    token_starts = []
+    for b in range(batch_size):
+        states = path[: num_frames[b], b]
+        is_new_token = (states % 2 == 1) & np.diff(states, prepend=-1).astype(bool)
+        frames = np.flatnonzero(is_new_token)
+        assert len(frames) == len(token_ids[b])
+        token_starts.append(frames)
+    return token_starts
+
+
+@beartype
+def ctc_forced_align(
+    log_probs: NumpyFloat2DArray,
+    token_ids: NeList[int],
+    blank_idx: int,
+    band_width: Optional[int] = None,
+) -> np.ndarray:
+    return ctc_forced_align_batch([log_probs], [token_ids], blank_idx, band_width)[0]
+
+
+@beartype
+def tokenize_letters(transcript: NeStr, vocab: NeList[str]) -> list[int]:
+    """
+    letter-vocab only (wav2vec2, nemo-char-models), a space is whatever of SPACE_TOKENS the vocab has
+    """
+    token2id = {tok: k for k, tok in enumerate(vocab)}
+    space = next(tok for tok in SPACE_TOKENS if tok in token2id)
+    unknown = {c for c in transcript if c != " " and c not in token2id}
+    assert len(unknown) == 0, f"{unknown=} letters not in vocab"
+    return [token2id[space if c == " " else c] for c in transcript]
+
+
+@beartype
+def ctc_align_transcripts(
+    logits: NeList[NumpyFloat2DArray],
+    transcripts: NeList[NeStr],
+    audio_durations: NeList[float],
+    vocab: NeList[str],
+    blank_idx: int,
+    band_width: Optional[int] = None,
+) -> list[TimestampedLetters]:
+    """
+    transcripts need to be cleaned (casing, vocab) for the model
+    blank_idx: see ctc_decoding.blank_frame_skipping.ctc_blank_index
+    timestamps are the starts of the letters in seconds
+    """
+    token_starts = ctc_forced_align_batch(
+        logits,
+        [tokenize_letters(t, vocab) for t in transcripts],
+        blank_idx,
+        band_width,
+    )
+    return [
+        TimestampedLetters(transcript, starts * duration / len(x))
+        for transcript, starts, duration, x in zip(
+            transcripts, token_starts, audio_durations, logits
+        )
+    ]
@@ -1,13 +1,16 @@
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from typing import Any, Optional, Union, Iterable
 
 import faster_whisper
+import numpy as np
 from beartype import beartype
 from faster_whisper import download_model, WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import get_suppressed_tokens, get_compression_ratio
 from faster_whisper.vad import VadOptions
 
 import whisper as whisper_module
-from misc_utils.beartypes import NpFloatDim1
+from misc_utils.beartypes import NpFloatDim1, NeList
 from misc_utils.buildable_data import BuildableData
 from misc_utils.prefix_suffix import PrefixSuffix
 from ml4audio.asr_inference.inference import (
@@ -19,6 +22,9 @@ from ml4audio.asr_inference.whisper_inference import (
     fix_whisper_segments,
 )
 
+# whisper's word-timestamps can overlap and be of zero duration -> no StartEndTextsNonOverlap
+TimestampedWords = list[tuple[float, float, str]]
+
 
 @dataclass
 class FasterWhisperArgs:
@@ -69,6 +75,8 @@ class FasterWhisperArray2SegmentedTranscripts(
     whisper_args: FasterWhisperArgs = None
     num_threads: int = 4
     compute_type: str = "int8"  # (possible values are: default, auto, int8, int8_float32, int8_float16, int8_bfloat16, int16, float16, bfloat16, float32)
+    # ctranslate2-workers, >1 lets multiple threads run the model concurrently
+    num_workers: int = 1
     _model: WhisperModel = field(init=False, repr=False)
     base_dir: PrefixSuffix = field(
         default_factory=lambda: PrefixSuffix("cache_root", "MODELS/WHISPER_MODELS"),
@@ -114,6 +122,7 @@ class FasterWhisperArray2SegmentedTranscripts(
             device="cpu",
             compute_type=self.compute_type,
             cpu_threads=self.num_threads,
+            num_workers=self.num_workers,
         )
 
     def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
@@ -143,3 +152,203 @@ class FasterWhisperArray2SegmentedTranscripts(
         else:
             start_end_text = []
         return start_end_text
+
+    @beartype
+    def predict_words_with_whisper_args(
+        self, audio_array: NpFloatDim1, whisper_args: FasterWhisperArgs
+    ) -> TimestampedWords:
+        """
+        word-level: (start,end,word) with faster-whisper's (cross-attention based) word-timestamps
+        words come with their leading space: " Hello", " world."
+        """
+        segments, _ = self._model.transcribe(
+            audio_array, **asdict(replace(whisper_args, word_timestamps=True))
+        )
+        return [
+            (float(w.start), float(w.end), w.word)
+            for seg in segments
+            for w in seg.words
+            if len(w.word.strip()) > 0
+        ]
+
+    @beartype
+    def predict_batch_with_whisper_args(
+        self,
+        audio_arrays: NeList[NpFloatDim1],
+        whisper_args: NeList[FasterWhisperArgs],
+    ) -> list[StartEndTextsNonOverlap]:
+        """
+        one encode- and one generate-call for the whole batch, each audio_array with its own initial_prompt/prefix
+        audio_arrays must fit into whisper's 30 seconds window (no seeking), like the chunks of a WhisperStreamer
+        all other decoding-options are taken from whisper_args[0]
+        batch is decoded with the first temperature, audio_arrays that need a temperature-fallback
+            (faster-whisper's compression-ratio/log-prob rules) are transcribed again one by one
+        word_timestamps and vad_filter are not supported, see is_batchable
+        """
+        assert len(audio_arrays) == len(whisper_args)
+        assert all(is_batchable(wa) for wa in whisper_args)
+        model = self._model
+        args = whisper_args[0]
+        n_samples = model.feature_extractor.n_samples
+        assert all(len(a) <= n_samples for a in audio_arrays), "longer than 30 seconds"
+        features = np.stack(
+            [
+                model.feature_extractor(np.pad(a, (0, n_samples - len(a))))[
+                    :, : model.feature_extractor.nb_max_frames
+                ]
+                for a in audio_arrays
+            ]
+        )
+        encoder_output = model.encode(features)
+
+        if args.language is None:
+            languages = [
+                segment_langs[0][0][2:-2]  # "<|de|>" -> "de"
+                for segment_langs in model.model.detect_language(encoder_output)
+            ]
+        else:
+            languages = [args.language] * len(audio_arrays)
+        tokenizers = [
+            Tokenizer(
+                model.hf_tokenizer,
+                model.model.is_multilingual,
+                task=args.task,
+                language=language,
+            )
+            for language in languages
+        ]
+        prompts = [
+            model.get_prompt(
+                tokenizer,
+                _initial_prompt_tokens(tokenizer, wa.initial_prompt),
+                without_timestamps=args.without_timestamps,
+                prefix=wa.prefix,
+            )
+            for tokenizer, wa in zip(tokenizers, whisper_args)
+        ]
+        temperature = _temperatures(args)[0]
+        results = model.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=args.beam_size,
+            patience=args.patience,
+            length_penalty=args.length_penalty,
+            max_length=model.max_length,
+            suppress_blank=args.suppress_blank,
+            suppress_tokens=(
+                get_suppressed_tokens(tokenizers[0], list(args.suppress_tokens))
+                if args.suppress_tokens
+                else args.suppress_tokens
+            ),
+            return_scores=True,
+            return_no_speech_prob=True,
+            sampling_temperature=temperature,
+            max_initial_timestamp_index=int(
+                round(args.max_initial_timestamp / model.time_precision)
+            ),
+        )
+
+        outputs = []
+        for result, tokenizer, audio_array, wa in zip(
+            results, tokenizers, audio_arrays, whisper_args
+        ):
+            tokens = result.sequences_ids[0]
+            avg_logprob = (
+                result.scores[0]
+                * len(tokens) ** args.length_penalty
+                / (len(tokens) + 1)
+            )
+            # same rules as faster-whisper's generate_with_fallback and its no-voice-activity check
+            is_silence = (
+                args.no_speech_threshold is not None
+                and result.no_speech_prob > args.no_speech_threshold
+            )
+            has_low_logprob = (
+                args.log_prob_threshold is not None
+                and avg_logprob < args.log_prob_threshold
+            )
+            needs_fallback = has_low_logprob or (
+                args.compression_ratio_threshold is not None
+                and get_compression_ratio(tokenizer.decode(tokens))
+                > args.compression_ratio_threshold
+            )
+            if is_silence and has_low_logprob:
+                needs_fallback = False
+            if (
+                args.log_prob_threshold is not None
+                and avg_logprob > args.log_prob_threshold
+            ):
+                is_silence = False  # despite the no_speech_prob
+
+            if needs_fallback and len(_temperatures(args)) > 1:
+                outputs.append(
+                    self.predict_transcribed_with_whisper_args(audio_array, wa)
+                )
+                continue
+            audio_dur = float(len(audio_array) / self.sample_rate)
+            raw_whisper_segments = [
+                (start, end, tokenizer.decode(text_tokens))
+                for start, end, text_tokens in split_at_timestamp_tokens(
+                    tokens,
+                    tokenizer.timestamp_begin,
+                    tokenizer.eot,
+                    model.time_precision,
+                    audio_dur,
+                )
+            ]
+            if len(raw_whisper_segments) > 0 and not is_silence:
+                outputs.append(fix_whisper_segments(raw_whisper_segments, audio_dur))
+            else:
+                outputs.append([])
+        return outputs
+
+
+def is_batchable(whisper_args: FasterWhisperArgs) -> bool:
+    """
+    predict_batch_with_whisper_args does neither word-timestamps nor vad
+    """
+    return not whisper_args.word_timestamps and not whisper_args.vad_filter
+
+
+def _temperatures(whisper_args: FasterWhisperArgs) -> list[float]:
+    temperature = whisper_args.temperature
+    return [temperature] if isinstance(temperature, (float, int)) else list(temperature)
+
+
+def _initial_prompt_tokens(
+    tokenizer: Tokenizer, initial_prompt: Optional[Union[str, Iterable[int]]]
+) -> list[int]:
+    if initial_prompt is None:
+        return []
+    elif isinstance(initial_prompt, str):
+        return tokenizer.encode(" " + initial_prompt.strip())
+    else:
+        return list(initial_prompt)
+
+
+@beartype
+def split_at_timestamp_tokens(
+    tokens: list[int],
+    timestamp_begin: int,
+    eot: int,
+    time_precision: float,
+    audio_dur: float,
+) -> list[tuple[float, float, list[int]]]:
+    """
+    <|0.00|> a b <|2.00|><|2.00|> c <|3.50|> d -> (0.0,2.0,[a,b]), (2.0,3.5,[c]), (3.5,audio_dur,[d])
+    special tokens (language, task, ...) are dropped
+    """
+    segments = []
+    start, text_tokens = 0.0, []
+    for token in tokens:
+        if token >= timestamp_begin:
+            timestamp = (token - timestamp_begin) * time_precision
+            if len(text_tokens) > 0:
+                segments.append((start, timestamp, text_tokens))
+                text_tokens = []
+            start = timestamp
+        elif token < eot:
+            text_tokens.append(token)
+    if len(text_tokens) > 0:
+        segments.append((start, audio_dur, text_tokens))
+    return segments
@@ -1,6 +1,6 @@
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import ClassVar, Optional
 
 import torch
 from beartype import beartype
@@ -72,3 +72,30 @@ class ASRLogitsInferencer(Buildable):
     @beartype
     def calc_logits(self, audio: NeNpFloatDim1) -> TorchTensor2D:
         raise NotImplementedError
+
+    @beartype
+    def calc_logits_batch(
+        self, audios: NeList[NeNpFloatDim1], max_batch_size: int = 16
+    ) -> list[TorchTensor2D]:
+        """
+        sorted by length -> similar lengths end up in the same (padded) batch -> less padding
+        :return: unpadded logits in the order of audios
+        """
+        order = sorted(range(len(audios)), key=lambda k: len(audios[k]), reverse=True)
+        logits: list[Optional[TorchTensor2D]] = [None] * len(audios)
+        for i in range(0, len(order), max_batch_size):
+            batch_idx = order[i : i + max_batch_size]
+            batch_logits = self._calc_padded_batch_logits(
+                [audios[k] for k in batch_idx]
+            )
+            for k, l in zip(batch_idx, batch_logits):
+                logits[k] = l
+        return logits
+
+    def _calc_padded_batch_logits(
+        self, audios: list[NeNpFloatDim1]
+    ) -> list[TorchTensor2D]:
+        """
+        to be overwritten by inferencers that can run padded batches, this fallback does one by one
+        """
+        return [self.calc_logits(audio) for audio in audios]
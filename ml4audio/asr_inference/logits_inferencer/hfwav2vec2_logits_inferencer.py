@@ -109,6 +109,27 @@ class HFWav2Vec2LogitsInferencer(ASRLogitsInferencer):
         assert logits.shape[1] == len(self.vocab), f"{logits.shape=},{len(self.vocab)=}"
         return logits
 
+    def _calc_padded_batch_logits(
+        self, audios: list[NeNpFloatDim1]
+    ) -> list[TorchTensor2D]:
+        features = self._processor(
+            audios,
+            sampling_rate=self.asr_model_sample_rate,
+            return_tensors="pt",
+            padding=True,
+        )
+        device = next(self._model.parameters()).device
+        with torch.no_grad():
+            logits = self._model(
+                features.input_values.to(device),
+                attention_mask=features.attention_mask.to(device),
+            ).logits.cpu()
+            logits_lens = self._model._get_feat_extract_output_lengths(
+                features.attention_mask.sum(dim=-1)
+            )
+        assert logits.shape[2] == len(self.vocab), f"{logits.shape=},{len(self.vocab)=}"
+        return [logits[k, : logits_lens[k]] for k in range(len(audios))]
+
 
 #
 # @dataclass
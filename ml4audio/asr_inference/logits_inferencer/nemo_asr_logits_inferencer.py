@@ -78,6 +78,25 @@ class NemoASRLogitsInferencer(ASRLogitsInferencer):
 
         return log_probs
 
+    def _calc_padded_batch_logits(
+        self, audios: list[NeNpFloatDim1]
+    ) -> list[TorchTensor2D]:
+        device = next(self._model.parameters()).device
+        lengths = [len(audio) for audio in audios]
+        audio_signal = torch.zeros((len(audios), max(lengths)), dtype=torch.float32)
+        for k, audio in enumerate(audios):
+            audio_signal[k, : len(audio)] = torch.as_tensor(audio, dtype=torch.float32)
+        audio_signal_len = torch.as_tensor(lengths, dtype=torch.int64)
+
+        with torch.no_grad():
+            log_probs, encoded_len, _greedy_predictions = self._model(
+                input_signal=audio_signal.to(device),
+                input_signal_length=audio_signal_len.to(device),
+            )
+            log_probs, encoded_len = log_probs.cpu(), encoded_len.cpu()
+
+        return [log_probs[k, : encoded_len[k]] for k in range(len(audios))]
+
 
 # TODO: what about these?
 #
@@ -0,0 +1,253 @@
+"""
+replays audio-signals as N concurrent streaming-sessions at real-time pace (or faster: speed>1)
+every session runs in its own thread, audio-chunks are only handed in once they "arrived" (wall-clock)
+emit-latency: wall-clock time of an output minus the (speed-scaled) wall-clock time its audio arrived
+"""
+
+import copy
+import time
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+import requests
+import soundfile as sf
+from beartype import beartype
+
+from misc_utils.beartypes import NeList, NpFloatDim1
+from ml4audio.asr_inference.transcript_gluer import ASRStreamInferenceOutput
+from ml4audio.audio_utils.audio_io import (
+    AudioMessageChunk,
+    audio_messages_from_chunks,
+    break_array_into_chunks,
+    convert_to_16bit_array,
+)
+from ml4audio.service_utils.process_memory import process_memory_usage
+
+
+@dataclass
+class StreamingSession:
+    """
+    one client-session, handle returns the audio-times (seconds since session-start) of the emitted outputs
+    """
+
+    @abstractmethod
+    def handle(self, chunk: AudioMessageChunk) -> list[float]:
+        raise NotImplementedError
+
+
+def audio_end_of_asr_output(output: ASRStreamInferenceOutput) -> float:
+    return float(output.aligned_transcript.timestamps[-1])
+
+
+def audio_end_of_whisper_output(output: tuple[Any, list]) -> float:
+    """
+    WhisperStreamer yields (OverlappingSegment, StartEndTextsNonOverlap)
+    """
+    overlap_segment, non_overlapping_segments = output
+    if len(non_overlapping_segments) > 0:
+        return non_overlapping_segments[-1][1]
+    return overlap_segment.end
+
+
+def audio_end_of_committed_words(output: list) -> float:
+    """
+    StablePrefixWhisperStreamer yields the newly committed words (start,end,word)
+    """
+    return output[-1][1]
+
+
+@dataclass
+class StreamingPipelineSession(StreamingSession):
+    """
+    in-process: Aschinglupi, WhisperStreamer, anything with a handle_inference_input(AudioMessageChunk)
+    """
+
+    pipeline: Any
+    audio_end_of_output: Callable[[Any], float]
+
+    def handle(self, chunk: AudioMessageChunk) -> list[float]:
+        return [
+            self.audio_end_of_output(o)
+            for o in self.pipeline.handle_inference_input(chunk)
+        ]
+
+
+def fork_pipeline(pipeline: Any, stateful_attributes: Iterable[str]) -> Any:
+    """
+    per session copy of a streaming-pipeline: models are shared, buffers (stateful_attributes) are not
+    Aschinglupi: ("audio_bufferer", "transcript_gluer"), WhisperStreamer: ("audio_bufferer", "transcripts_buffer")
+    StablePrefixWhisperStreamer: (), its reset creates all of its buffers anew
+    """
+    forked = copy.copy(pipeline)
+    for name in stateful_attributes:
+        setattr(forked, name, copy.deepcopy(getattr(pipeline, name)))
+    forked.reset()
+    return forked
+
+
+@dataclass
+class StreamingSegmentorSession(StreamingSession):
+    """
+    nemo_vad's StreamingSignalSegmentor, an output is a final voice-segment, its audio-time is the audio consumed so far
+    """
+
+    segmentor: Any
+    sample_rate: int = 16_000
+    _audio_seconds: float = field(init=False, repr=False, default=0.0)
+
+    def handle(self, chunk: AudioMessageChunk) -> list[float]:
+        frame_size = int(self.segmentor.frame_dur * self.sample_rate)
+        array = (chunk.array * np.iinfo(np.int16).max).astype(np.int16)
+        emitted = []
+        for piece in break_array_into_chunks(array, frame_size):
+            self._audio_seconds += len(piece) / self.sample_rate
+            segment = self.segmentor.handle_audio_array(piece)
+            if segment is not None and segment.is_final():
+                emitted.append(self._audio_seconds)
+        if chunk.end_of_signal and self.segmentor.flush() is not None:
+            emitted.append(self._audio_seconds)
+        return emitted
+
+
+@dataclass
+class HttpTranscribeSession(StreamingSession):
+    """
+    the fastapi-services have no streaming-endpoint, the audio is buffered until end_of_signal and then
+    posted (as wav) to the /transcribe endpoint -> emit-latency is the response-time after the last chunk
+    """
+
+    url: str = "http://localhost:8000/transcribe"
+    sample_rate: int = 16_000
+    _chunks: list[np.ndarray] = field(init=False, repr=False, default_factory=list)
+
+    def handle(self, chunk: AudioMessageChunk) -> list[float]:
+        self._chunks.append(chunk.array)
+        if not chunk.end_of_signal:
+            return []
+        audio = np.concatenate(self._chunks)
+        wav = BytesIO()
+        sf.write(wav, convert_to_16bit_array(audio), self.sample_rate, format="WAV")
+        files = {"file": ("audio.wav", wav.getvalue(), "audio/wav")}
+        response = requests.post(self.url, files=files)
+        response.raise_for_status()
+        return [len(audio) / self.sample_rate]
+
+
+@dataclass
+class SessionReport:
+    session_id: str
+    audio_seconds: float
+    compute_seconds: float  # wall-clock time spent in handle
+    cpu_seconds: float  # thread-cpu time spent in handle
+    emit_latencies: list[float]
+    rss: int  # of the whole process at the end of this session, in bytes
+
+    @property
+    def real_time_factor(self) -> float:
+        return self.compute_seconds / self.audio_seconds
+
+
+@dataclass
+class StreamingBenchmarkReport:
+    sessions: list[SessionReport]
+    max_rss: int
+
+    def summary(self) -> dict[str, float]:
+        latencies = np.array([l for s in self.sessions for l in s.emit_latencies])
+        rtfs = np.array([s.real_time_factor for s in self.sessions])
+        p50, p95, p99 = (
+            np.percentile(latencies, [50, 95, 99])
+            if len(latencies) > 0
+            else (np.nan,) * 3
+        )
+        return {
+            "num_sessions": len(self.sessions),
+            "num_emits": len(latencies),
+            "emit_latency_p50": float(p50),
+            "emit_latency_p95": float(p95),
+            "emit_latency_p99": float(p99),
+            "rtf_mean": float(np.mean(rtfs)),
+            "rtf_max": float(np.max(rtfs)),
+            "cpu_seconds_per_session": float(
+                np.mean([s.cpu_seconds for s in self.sessions])
+            ),
+            "max_rss_mb": self.max_rss / 1024**2,
+        }
+
+
+def _current_rss() -> int:
+    usage = process_memory_usage()
+    return usage.get("Rss", usage.get("MaxRss", 0))
+
+
+@beartype
+def _replay_session(
+    session_id: str,
+    session: StreamingSession,
+    signal: NpFloatDim1,
+    sample_rate: int,
+    chunk_duration: float,
+    speed: float,
+) -> SessionReport:
+    chunks = break_array_into_chunks(signal, int(chunk_duration * sample_rate))
+    compute_seconds, cpu_seconds, latencies = 0.0, 0.0, []
+    session_start = time.perf_counter()
+    for chunk in audio_messages_from_chunks(session_id, chunks):
+        chunk_end = (chunk.frame_idx + len(chunk.array)) / sample_rate
+        arrival = session_start + chunk_end / speed
+        time.sleep(max(0.0, arrival - time.perf_counter()))
+
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        audio_ends = session.handle(chunk)
+        now = time.perf_counter()
+        compute_seconds += now - start
+        cpu_seconds += time.thread_time() - cpu_start
+        latencies.extend(now - (session_start + end / speed) for end in audio_ends)
+
+    return SessionReport(
+        session_id=session_id,
+        audio_seconds=len(signal) / sample_rate,
+        compute_seconds=compute_seconds,
+        cpu_seconds=cpu_seconds,
+        emit_latencies=latencies,
+        rss=_current_rss(),
+    )
+
+
+@beartype
+def run_streaming_benchmark(
+    new_session: Callable[[], StreamingSession],
+    signals: NeList[NpFloatDim1],
+    num_sessions: int,
+    sample_rate: int = 16_000,
+    chunk_duration: float = 0.1,
+    speed: float = 1.0,
+    stagger: Optional[float] = None,
+) -> StreamingBenchmarkReport:
+    """
+    session k replays signals[k % len(signals)], sessions are started stagger seconds apart (default: all at once)
+    sessions are created upfront (in the main thread) -> model-building/forking is not measured
+    """
+    sessions = [new_session() for _ in range(num_sessions)]
+
+    def replay(k: int) -> SessionReport:
+        if stagger is not None:
+            time.sleep(k * stagger)
+        return _replay_session(
+            f"session-{k}",
+            sessions[k],
+            signals[k % len(signals)],
+            sample_rate,
+            chunk_duration,
+            speed,
+        )
+
+    with ThreadPoolExecutor(max_workers=num_sessions) as executor:
+        reports = list(executor.map(replay, range(num_sessions)))
+    return StreamingBenchmarkReport(
+        sessions=reports, max_rss=max(r.rss for r in reports)
+    )
@@ -0,0 +1,152 @@
+"""
+punctuation+capitalization of a streaming asr-pipeline's (Aschinglupi) transcript-suffixes at constant cost per update
+    1. only the pending (not yet final) words are punctuated, some final words go in as left-context
+    2. a word becomes final once lookahead words follow it, the unstable tail is revised by later updates
+    3. punctuation and casing are mapped back onto the letter-timestamps
+outputs are suffixes just like the inputs: they replace everything from their first timestamp on
+    -> accumulate_transcript_suffixes works for them too
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.dataclass_utils import UNDEFINED
+from ml4audio.asr_inference.transcript_gluer import ASRStreamInferenceOutput
+from ml4audio.audio_utils.aligned_transcript import TimestampedLetters
+
+
+@beartype
+def split_into_words(letters: TimestampedLetters) -> list[TimestampedLetters]:
+    words, start = [], None
+    for k, letter in enumerate(letters.letters + " "):
+        if letter != " " and start is None:
+            start = k
+        elif letter == " " and start is not None:
+            words.append(
+                TimestampedLetters(
+                    letters.letters[start:k], letters.timestamps[start:k]
+                )
+            )
+            start = None
+    return words
+
+
+@beartype
+def align_punctuated_word(punctuated: str, word: TimestampedLetters) -> np.ndarray:
+    """
+    letters that (case-insensitively) match the word's letters get their timestamps,
+    inserted ones (punctuation) get the one of the previous letter
+    """
+    timestamps, k = [], 0
+    for letter in punctuated:
+        if k < len(word) and letter.lower() == word.letters[k].lower():
+            timestamps.append(word.timestamps[k])
+            k += 1
+        else:
+            timestamps.append(word.timestamps[max(k - 1, 0)])
+    return np.array(timestamps)
+
+
+@dataclass
+class StreamingPunctuator:
+    """
+    punctcap_fn: lower-cased texts -> punctuated+capitalized texts with the same number of (whitespace-separated) words
+        like nemo's PunctuationCapitalizationModel.add_punctuation_capitalization
+    context_words: number of final words that go in as left-context, also how far back asr-revisions are followed
+    """
+
+    punctcap_fn: Callable[[list[str]], list[str]] = UNDEFINED
+    context_words: int = 20
+    lookahead: int = 4
+
+    # punctuated and raw (asr-output) final words
+    _final: list[tuple[str, TimestampedLetters]] = field(
+        init=False, repr=False, default_factory=list
+    )
+    _pending: list[TimestampedLetters] = field(
+        init=False, repr=False, default_factory=list
+    )
+    # all final words, also the ones that already left the context-window
+    _num_final: int = field(init=False, repr=False, default=0)
+
+    def reset(self) -> None:
+        self._final = []
+        self._pending = []
+        self._num_final = 0
+
+    @beartype
+    def handle_inference_output(
+        self, output: ASRStreamInferenceOutput
+    ) -> Iterator[ASRStreamInferenceOutput]:
+        punctuated = self.handle_transcript_suffix(
+            output.aligned_transcript, output.end_of_message
+        )
+        if punctuated is not None:
+            yield ASRStreamInferenceOutput(
+                id=output.id,
+                aligned_transcript=punctuated,
+                end_of_message=output.end_of_message,
+            )
+        if output.end_of_message:
+            self.reset()
+
+    @beartype
+    def handle_transcript_suffix(
+        self, suffix: TimestampedLetters, end_of_message: bool = False
+    ) -> Optional[TimestampedLetters]:
+        words = self._apply_suffix(suffix)
+        if len(words) == 0:
+            return None
+        has_left_context = self._num_final > 0
+        punctuated = self._punctuate(words)
+
+        num_final = len(words) if end_of_message else len(words) - self.lookahead
+        num_final = max(0, num_final)
+        self._final.extend(zip(punctuated[:num_final], words[:num_final]))
+        self._final = self._final[max(0, len(self._final) - self.context_words) :]
+        self._num_final += num_final
+        self._pending = words[num_final:]
+
+        letters, timestamps = [], []
+        for k, (punctuated_word, word) in enumerate(zip(punctuated, words)):
+            if k > 0 or has_left_context:
+                letters.append(" ")
+                timestamps.append(word.timestamps[:1])
+            letters.append(punctuated_word)
+            timestamps.append(align_punctuated_word(punctuated_word, word))
+        return TimestampedLetters("".join(letters), np.concatenate(timestamps))
+
+    def _apply_suffix(self, suffix: TimestampedLetters) -> list[TimestampedLetters]:
+        """
+        like accumulate_transcript_suffixes: the suffix replaces everything from its first timestamp on,
+        final words that are touched by it become pending again
+        """
+        cut = suffix.timestamps[0]
+        while len(self._final) > 0 and self._final[-1][1].timestamps[-1] >= cut:
+            self._pending.insert(0, self._final.pop()[1])
+            self._num_final -= 1
+
+        letters, timestamps = [], []
+        for word in self._pending:
+            letters.extend([" ", word.letters])
+            timestamps.extend([word.timestamps[:1], word.timestamps])
+        letters = "".join(letters)
+        timestamps = np.concatenate(timestamps) if len(timestamps) > 0 else np.zeros(0)
+        num_kept = int(np.sum(timestamps < cut))
+        return split_into_words(
+            TimestampedLetters(
+                letters[:num_kept] + suffix.letters,
+                np.concatenate([timestamps[:num_kept], suffix.timestamps]),
+            )
+        )
+
+    def _punctuate(self, words: list[TimestampedLetters]) -> list[str]:
+        context = [raw.letters.lower() for _, raw in self._final]
+        raw_words = [w.letters.lower() for w in words]
+        punctuated = self.punctcap_fn([" ".join(context + raw_words)])[0].split()
+        if len(punctuated) != len(context) + len(raw_words):
+            return raw_words  # model messed with the words, better no punctuation
+        return punctuated[len(context) :]
@@ -16,6 +16,7 @@ from misc_utils.buildable import Buildable
 from misc_utils.buildable_data import BuildableData
 from misc_utils.dataclass_utils import UNDEFINED
 from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
+from ml4audio.audio_data.parallel_audio_decoding import imap_decode_in_process_pool
 from ml4audio.audio_utils.audio_data_models import AudioTextData, ArrayText
 from ml4audio.audio_utils.torchaudio_utils import load_resample_with_torch
 
@@ -140,23 +141,63 @@ class CommonVoiceExtracted(BuildableData):
             yield CommonVoiceDatum.from_dict(d)
 
 
+def _load_clip_with_text(job: tuple[str, str, int]) -> ArrayText:
+    clip_file, text, sample_rate = job
+    array = load_resample_with_torch(
+        data_source=clip_file,
+        target_sample_rate=sample_rate,
+    ).numpy()
+    return array, text
+
+
 @dataclass
 class CommonVoiceAuteda(AudioTextData, Buildable):
     raw_data: CommonVoiceExtracted = UNDEFINED
     split_name: str = UNDEFINED
     sample_rate: int = 16000
+    num_decode_workers: int = field(default=0, repr=False)  # 0 -> decode serially
+    decode_prefetch: int = field(default=64, repr=False)
 
     @property
     def name(self) -> str:
         return f"{self.raw_data.name}-{self.split_name}"
 
+    def _generate_jobs(
+        self,
+        shard_idx: int = 0,
+        num_shards: int = 1,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[tuple[str, str, int]]:
+        data = self.raw_data.get_split_data(self.split_name)
+        for d in itertools.islice(data, start + shard_idx, stop, num_shards):
+            yield f"{self.raw_data.clips_dir}/{d.path}", d.sentence, self.sample_rate
+
+    def _decode(self, jobs: Iterator[tuple[str, str, int]]) -> Iterator[ArrayText]:
+        if self.num_decode_workers > 0:
+            yield from imap_decode_in_process_pool(
+                _load_clip_with_text,
+                jobs,
+                num_workers=self.num_decode_workers,
+                prefetch=self.decode_prefetch,
+            )
+        else:
+            yield from (_load_clip_with_text(job) for job in jobs)
+
     def __iter__(self) -> Iterator[ArrayText]:
-        for d in self.raw_data.get_split_data(self.split_name):
-            array = load_resample_with_torch(
-                data_source=f"{self.raw_data.clips_dir}/{d.path}",
-                target_sample_rate=self.sample_rate,
-            ).numpy()
-            yield array, d.sentence
+        yield from self._decode(self._generate_jobs())
+
+    def iterate_shard(
+        self,
+        shard_idx: int,
+        num_shards: int,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[ArrayText]:
+        """
+        sharding on tsv-rows, not-this-shard clips are never loaded
+        """
+        yield from self._decode(self._generate_jobs(shard_idx, num_shards, start, stop))
 
 
 if __name__ == "__main__":
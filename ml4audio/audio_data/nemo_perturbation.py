@@ -19,6 +19,7 @@ from misc_utils.processing_utils import exec_command
 from ml4audio.audio_utils.audio_io import normalize_audio_array
 from misc_utils.beartypes import NeNpFloatDim1
 from misc_utils.dataclass_utils import UNDEFINED, _UNDEFINED
+from ml4audio.audio_data.numpy_signal_augmentation import RandomSignalAugmentation
 from ml4audio.audio_data.sox_signal_augmentation import (
     add_signals,
     build_sox_distortions_piped,
@@ -153,6 +154,39 @@ class ManyRandomSoxPerturbations(SoxPerturbations):
         return default_create_sox_cmd_fun(augmented_file, original_file)
 
 
+@dataclass
+class NumpyRandomPerturbations(ProbaPerturbationDC):
+    """
+    in-process replacement for ManyRandomSoxPerturbations, no temp-files, no sox-subprocesses
+    """
+
+    augmentation: RandomSignalAugmentation = field(
+        default_factory=RandomSignalAugmentation
+    )
+    seed: Optional[int] = None
+    _rng: Union[_UNDEFINED, np.random.Generator] = field(
+        init=False, repr=False, default=UNDEFINED
+    )
+
+    def __post_init__(self):
+        self._rng = np.random.default_rng(self.seed)
+
+    def reseed(self, seed: int):
+        """
+        every data-loader-worker should get its own seed, otherwise they all augment the same way
+        """
+        self._rng = np.random.default_rng(
+            [seed] if self.seed is None else [self.seed, seed]
+        )
+
+    def max_augmentation_length(self, length):
+        return 1.3 * length  # tempo >= 0.8
+
+    def perturb(self, data: AudioSegment):
+        samples = data.samples.astype(np.float32)
+        data._samples = self.augmentation(samples, data.sample_rate, self._rng)
+
+
 @dataclass
 class BandPassPerturb(SoxPerturbations):
     lowpass: int = None
@@ -0,0 +1,299 @@
+"""
+in-process counterpart of sox_signal_augmentation, works on float32-arrays, no temp-files, no subprocesses
+every random decision is drawn from an explicitly handed-in np.random.Generator -> reproducible via seeds
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import librosa
+import numpy as np
+from beartype import beartype
+from scipy.signal import fftconvolve, firwin, resample_poly
+
+from misc_utils.beartypes import NeNpFloatDim1, NeList
+from ml4audio.audio_data.sox_signal_augmentation import MAX_FREQ
+
+
+def _db_to_amplitude(db: float) -> float:
+    return float(10 ** (db / 20))
+
+
+def _log_uniform(rng: np.random.Generator, low: float, high: float) -> float:
+    return float(np.exp(rng.uniform(low=np.log(low), high=np.log(high))))
+
+
+@beartype
+def gain_normalize(signal: NeNpFloatDim1, gain_db: float = 0.0) -> NeNpFloatDim1:
+    """
+    like sox's "gain -n": normalize peak to gain_db, positive gains do provoke clipping
+    """
+    peak = np.max(np.abs(signal))
+    if peak > 0:
+        signal = signal * (_db_to_amplitude(gain_db) / peak)
+    return np.clip(signal, -1.0, 1.0).astype(np.float32)
+
+
+@beartype
+def sinc_bandpass(
+    signal: NeNpFloatDim1,
+    sample_rate: int,
+    highpass: Optional[float] = None,
+    lowpass: Optional[float] = None,
+    num_taps: int = 255,
+) -> NeNpFloatDim1:
+    """
+    windowed-sinc FIR-filter, like sox's "sinc highpass-lowpass"
+    """
+    if highpass is not None and lowpass is not None:
+        assert highpass < lowpass
+        taps = firwin(num_taps, [highpass, lowpass], pass_zero=False, fs=sample_rate)
+    elif highpass is not None:
+        taps = firwin(num_taps, highpass, pass_zero=False, fs=sample_rate)
+    elif lowpass is not None:
+        taps = firwin(num_taps, lowpass, pass_zero=True, fs=sample_rate)
+    else:
+        return signal
+    return fftconvolve(signal, taps, mode="same").astype(np.float32)
+
+
+@beartype
+def lowfreq_envelope(
+    num_samples: int,
+    sample_rate: int,
+    rng: np.random.Generator,
+    upper_freq: float = 1.0,
+) -> NeNpFloatDim1:
+    """
+    very-low-freq whitenoise normalized to [-1,1], like sox's "synth whitenoise lowpass {upper_freq}"
+    instead of filtering a full-rate signal, random support-points are interpolated
+    """
+    num_points = max(2, int(np.ceil(num_samples / sample_rate * 2 * upper_freq)) + 1)
+    points = rng.standard_normal(num_points)
+    envelope = np.interp(
+        np.linspace(0, num_points - 1, num_samples), np.arange(num_points), points
+    )
+    return (envelope / max(np.max(np.abs(envelope)), 1e-6)).astype(np.float32)
+
+
+@beartype
+def build_dynamic_noise(
+    num_samples: int,
+    sample_rate: int,
+    rng: np.random.Generator,
+    amod_lowpass_cutoff: float = 0.1,
+    lowpass_cutoff: float = float(MAX_FREQ),
+    highpass_cutoff: float = 1.0,
+) -> NeNpFloatDim1:
+    """
+    band-pass-filtered whitenoise multiplied by very-low-freq whitenoise
+    gives non-static/dynamically changing noise, normalized to peak 1.0
+    """
+    noise = rng.standard_normal(num_samples).astype(np.float32)
+    noise = sinc_bandpass(noise, sample_rate, highpass_cutoff, lowpass_cutoff)
+    envelope = lowfreq_envelope(num_samples, sample_rate, rng, amod_lowpass_cutoff)
+    return gain_normalize(noise * envelope)
+
+
+@beartype
+def add_noise_at_snr(
+    signal: NeNpFloatDim1, noise: NeNpFloatDim1, snr_db: float
+) -> NeNpFloatDim1:
+    assert len(signal) == len(noise)
+    signal_power = np.mean(signal**2)
+    noise_power = max(np.mean(noise**2), 1e-12)
+    scale = np.sqrt(signal_power / (noise_power * 10 ** (snr_db / 10)))
+    return (signal + scale * noise).astype(np.float32)
+
+
+@beartype
+def varying_gain(
+    signal: NeNpFloatDim1,
+    sample_rate: int,
+    rng: np.random.Generator,
+    upper_freq_for_gain_var: float = 1.0,
+    ac_gain: float = -6.0,
+) -> NeNpFloatDim1:
+    """
+    multiplies signal with 0.5 + very-low-freq-noise, see sox_signal_augmentation.varying_gain_pert
+    """
+    ac = _db_to_amplitude(ac_gain) * lowfreq_envelope(
+        len(signal), sample_rate, rng, upper_freq_for_gain_var
+    )
+    return (signal * (0.5 + ac)).astype(np.float32)
+
+
+@beartype
+def pitch_shift(signal: NeNpFloatDim1, sample_rate: int, cents: float) -> NeNpFloatDim1:
+    if cents == 0:
+        return signal
+    return librosa.effects.pitch_shift(
+        signal, sr=sample_rate, n_steps=cents / 100
+    ).astype(np.float32)
+
+
+@beartype
+def change_tempo(signal: NeNpFloatDim1, rate: float) -> NeNpFloatDim1:
+    """
+    like sox's "tempo": changes duration, keeps pitch
+    """
+    if rate == 1.0:
+        return signal
+    return librosa.effects.time_stretch(signal, rate=rate).astype(np.float32)
+
+
+@beartype
+def reverb(
+    signal: NeNpFloatDim1,
+    sample_rate: int,
+    rng: np.random.Generator,
+    reverberance: float = 50.0,
+    max_rt60: float = 0.8,
+) -> NeNpFloatDim1:
+    """
+    convolves with synthetic room-impulse-response (exponentially decaying noise)
+    :param reverberance: 0-100 like sox's reverb
+    """
+    if reverberance <= 0:
+        return signal
+    rt60 = max_rt60 * reverberance / 100
+    t = np.arange(int(rt60 * sample_rate)) / sample_rate
+    rir = rng.standard_normal(len(t)) * np.exp(-6.9 * t / rt60)  # -60dB at rt60
+    rir[0] = 1.0  # direct path
+    rir /= np.sqrt(np.sum(rir**2))
+    wet = fftconvolve(signal, rir, mode="full")[: len(signal)]
+    dry_peak_db = float(20 * np.log10(max(np.max(np.abs(signal)), 1e-6)))
+    return gain_normalize(wet.astype(np.float32), gain_db=dry_peak_db)
+
+
+@beartype
+def _alaw_compand_quantize(signal: NeNpFloatDim1, a: float = 87.6) -> NeNpFloatDim1:
+    x = np.clip(signal, -1.0, 1.0)
+    ax = np.abs(x)
+    y = np.where(
+        ax < 1 / a,
+        a * ax / (1 + np.log(a)),
+        (1 + np.log(np.maximum(a * ax, 1e-12))) / (1 + np.log(a)),
+    )
+    y = np.round(y * 127) / 127  # 8 bit
+    ax = np.where(
+        y < 1 / (1 + np.log(a)),
+        y * (1 + np.log(a)) / a,
+        np.exp(y * (1 + np.log(a)) - 1) / a,
+    )
+    return (np.sign(x) * ax).astype(np.float32)
+
+
+@beartype
+def transcode_degradation(
+    signal: NeNpFloatDim1,
+    sample_rate: int,
+    rng: np.random.Generator,
+) -> NeNpFloatDim1:
+    """
+    imitates nemo's TranscodePerturbation (g711 / amr-nb) without calling sox
+    g711: 8kHz + 8bit a-law, amr-nb-like: telephone-band (300-3400Hz) + coarse quantization
+    """
+    narrowband_sr = 8000
+    assert sample_rate % narrowband_sr == 0
+    factor = sample_rate // narrowband_sr
+    narrow = resample_poly(signal, 1, factor).astype(np.float32)
+    if rng.random() < 0.5:
+        narrow = _alaw_compand_quantize(narrow)
+    else:
+        narrow = sinc_bandpass(narrow, narrowband_sr, 300.0, 3400.0, num_taps=101)
+        bits = int(rng.integers(5, 9))
+        step = 2.0 / 2**bits
+        narrow = (np.round(narrow / step) * step).astype(np.float32)
+    degraded = resample_poly(narrow, factor, 1)[: len(signal)]
+    return degraded.astype(np.float32)
+
+
+@beartype
+def random_bandpass_cutoffs(
+    rng: np.random.Generator,
+    min_low: int = 1000,
+    min_band_width: int = 100,
+    max_high: int = 1000,
+) -> tuple[Optional[float], Optional[float]]:
+    """
+    see sox_signal_augmentation.build_random_bandpass_cutoffs
+    :return: highpass, lowpass
+    """
+    assert min_low - min_band_width > 0
+    max_high_cutoff = MAX_FREQ
+    lowpass, highpass = None, None
+    if rng.random() < 0.5:
+        lowpass = float(round(_log_uniform(rng, min_low, MAX_FREQ)))
+        max_high_cutoff = lowpass - min_band_width
+    if rng.random() < 0.5:
+        highpass = float(round(_log_uniform(rng, 2, min(max_high, max_high_cutoff))))
+    return highpass, lowpass
+
+
+@dataclass
+class RandomSignalAugmentation:
+    """
+    numpy-version of nemo_perturbation.default_create_sox_cmd_fun
+    tempo, pitch, reverb, gain, sinc, varying gain, dynamic noise + optional transcoding
+    """
+
+    min_snr: float = 20.0
+    max_snr: float = 60.0
+    tempo_range: tuple[float, float] = (0.8, 1.2)
+    max_pitch_cents: float = 150.0
+    max_reverberance: float = 50.0
+    transcode_proba: float = 0.0
+
+    @beartype
+    def __call__(
+        self, signal: NeNpFloatDim1, sample_rate: int, rng: np.random.Generator
+    ) -> NeNpFloatDim1:
+        signal = signal.astype(np.float32)
+        signal_gain = float(rng.triangular(left=-10, mode=0.0, right=30))
+        low, high = self.tempo_range
+        tempo = float(rng.triangular(left=low, mode=1.0, right=high))
+        m = self.max_pitch_cents
+        cents = float(rng.triangular(left=-m, mode=0.0, right=m))
+        reverberance = float(rng.uniform(0, self.max_reverberance))
+        highpass, lowpass = random_bandpass_cutoffs(rng)
+
+        signal = varying_gain(signal, sample_rate, rng)
+        signal = change_tempo(signal, round(tempo, 2))
+        signal = pitch_shift(signal, sample_rate, cents)
+        signal = reverb(signal, sample_rate, rng, reverberance)
+        signal = gain_normalize(signal, signal_gain)
+        signal = sinc_bandpass(signal, sample_rate, highpass, lowpass)
+
+        noise_lowpass = float(rng.uniform(1000, MAX_FREQ))
+        noise = build_dynamic_noise(
+            len(signal),
+            sample_rate,
+            rng,
+            amod_lowpass_cutoff=float(rng.uniform(0.1, 2)),
+            lowpass_cutoff=noise_lowpass,
+            highpass_cutoff=float(rng.uniform(1, noise_lowpass)),
+        )
+        snr = float(rng.uniform(self.min_snr, self.max_snr))
+        signal = add_noise_at_snr(signal, noise, snr)
+
+        if rng.random() < self.transcode_proba:
+            signal = transcode_degradation(signal, sample_rate, rng)
+        return np.clip(signal, -1.0, 1.0)  # "-b 16" in sox clips as well
+
+    @beartype
+    def augment_batch(
+        self,
+        signals: NeList[NeNpFloatDim1],
+        sample_rate: int,
+        seed: Optional[int] = None,
+    ) -> NeList[NeNpFloatDim1]:
+        """
+        every signal gets its own independent generator spawned from seed
+        -> same seed gives same augmentations, independent of batch-composition/order of processing
+        """
+        rngs = [
+            np.random.default_rng(s)
+            for s in np.random.SeedSequence(seed).spawn(len(signals))
+        ]
+        return [self(x, sample_rate, rng) for x, rng in zip(signals, rngs)]
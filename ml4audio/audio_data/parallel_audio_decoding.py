@@ -0,0 +1,56 @@
+from typing import Callable, Iterable, Iterator, Optional
+
+from beartype import beartype
+
+from misc_utils.utils import just_try
+from ml4audio.audio_utils.audio_data_models import FileLikeAudioDatum
+from ml4audio.audio_utils.audio_io import load_audio_array_from_filelike
+from misc_utils.beartypes import NeNpFloatDim1
+from ml4audio.utils.process_pool import imap_ordered_in_process_pool, TJob, TResult
+
+
+def _init_decode_worker():
+    """
+    each worker decodes one clip at a time, torch's intra-op threads would just fight over the cores
+    """
+    import torch
+
+    torch.set_num_threads(1)
+
+
+@beartype
+def imap_decode_in_process_pool(
+    fun: Callable[[TJob], TResult],
+    jobs: Iterable[TJob],
+    num_workers: int,
+    prefetch: int = 64,
+) -> Iterator[TResult]:
+    """
+    imap_ordered_in_process_pool with workers that use a single torch-thread
+    """
+    return imap_ordered_in_process_pool(
+        fun,
+        jobs,
+        num_workers=num_workers,
+        prefetch=prefetch,
+        initializer=_init_decode_worker,
+    )
+
+
+DecodeJob = tuple[str, FileLikeAudioDatum, str, int]  # id, audio, text, sample_rate
+
+
+@beartype
+def try_to_decode_job(
+    job: DecodeJob,
+) -> tuple[str, Optional[NeNpFloatDim1], str]:
+    """
+    same failure-semantics as serial loading: failed ones come back with array=None
+    """
+    eid, audio_datum, text, sample_rate = job
+    array = just_try(
+        lambda: load_audio_array_from_filelike(audio_datum, sample_rate),
+        default=None,
+        verbose=True,
+    )
+    return eid, array, text
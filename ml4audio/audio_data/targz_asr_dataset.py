@@ -3,6 +3,7 @@ import os
 import tarfile
 from abc import abstractmethod
 from dataclasses import field, dataclass
+from io import BytesIO
 from pathlib import Path
 from typing import Iterator, Optional, ClassVar, Union, Iterable, Any
 
@@ -26,9 +27,15 @@ from misc_utils.dataclass_utils import (
 )
 from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
 from misc_utils.utils import TimedIterable, just_try
+from ml4audio.audio_data.parallel_audio_decoding import (
+    DecodeJob,
+    imap_decode_in_process_pool,
+    try_to_decode_job,
+)
 from ml4audio.audio_utils.audio_data_models import (
     AudioTextData,
     ArrayText,
+    IdArrayText,
     FileLikeAudioCorpus,
     SegmentCorpus,
     SegmentAnnotation,
@@ -222,24 +229,81 @@ class TarGzArrayText(AudioTextData, Buildable):
     # TODO: how was this working without being buildable?
     rename to  ArrayTextFromTarGzASRCorpus ??
     actually the read-speed is less interesting, bottle neck comes after, when loading/resampling the audio
+    -> num_decode_workers>0 decodes/resamples in a process-pool, order is preserved
     """
 
     corpus: Union[_UNDEFINED, TarGzASRCorpus] = UNDEFINED
     sample_rate: int = 16_000
     limit: Optional[int] = None
+    num_decode_workers: int = field(default=0, repr=False)  # 0 -> decode serially
+    decode_prefetch: int = field(default=64, repr=False)
 
     @property
     def name(self) -> str:
         return self.corpus.name
 
-    def generate_raw_data(self):
+    def generate_raw_data(
+        self,
+        shard_idx: int = 0,
+        num_shards: int = 1,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[IdArrayText]:
+        """
+        sharding happens on tar-member level, before any audio is read/decoded
+        """
+        transcribed_audios = self._generate_transcribed_audios(
+            shard_idx, num_shards, start, stop
+        )
+        if self.num_decode_workers > 0:
+            yield from self._decode_in_process_pool(transcribed_audios)
+        else:
+            yield from self._decode_serially(transcribed_audios)
+
+    def _generate_transcribed_audios(
+        self,
+        shard_idx: int,
+        num_shards: int,
+        start: int,
+        stop: Optional[int],
+    ) -> Iterator[TranscribedAudio]:
         it = TimedIterable(self.corpus)
-        for k, datum in enumerate(it):
+        g = itertools.islice(it, start + shard_idx, stop, num_shards)
+        for k, datum in enumerate(g):
             datum: TranscribedAudio
-            eid = datum.audio_datum.id
-
             if k % 1000 == 0:
                 print(f"read {k} samples from {self.name}, read-speed: {it.speed}")
+            yield datum
+
+    def _decode_in_process_pool(
+        self, transcribed_audios: Iterable[TranscribedAudio]
+    ) -> Iterator[IdArrayText]:
+        def generate_jobs() -> Iterator[DecodeJob]:
+            for datum in transcribed_audios:
+                # tar-members can only be read here, in the process that iterates over the tar-file
+                audio_datum = FileLikeAudioDatum(
+                    id=datum.audio_datum.id,
+                    audio_source=BytesIO(datum.audio_datum.audio_source.read()),
+                    format=datum.audio_datum.format,
+                )
+                yield audio_datum.id, audio_datum, datum.text, self.sample_rate
+
+        for eid, array, text in imap_decode_in_process_pool(
+            try_to_decode_job,
+            generate_jobs(),
+            num_workers=self.num_decode_workers,
+            prefetch=self.decode_prefetch,
+        ):
+            if array is not None:
+                yield eid, array, text
+            else:
+                print(f"failed to load {eid=}")
+
+    def _decode_serially(
+        self, transcribed_audios: Iterable[TranscribedAudio]
+    ) -> Iterator[IdArrayText]:
+        for datum in transcribed_audios:
+            eid = datum.audio_datum.id
             # TODO: what about segments? start-ends? transcripts which only span a part of the audio?
             array = just_try(
                 lambda: load_audio_array_from_filelike(
@@ -260,6 +324,23 @@ class TarGzArrayText(AudioTextData, Buildable):
         ):
             yield array, text
 
+    def iterate_shard(
+        self,
+        shard_idx: int,
+        num_shards: int,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[ArrayText]:
+        """
+        here the limit counts tar-members, not successfully decoded samples
+        """
+        if self.limit is not None:
+            stop = self.limit if stop is None else min(stop, self.limit)
+        for eid, array, text in self.generate_raw_data(
+            shard_idx, num_shards, start, stop
+        ):
+            yield array, text
+
 
 @dataclass
 class TarGzArrayTextWithSize(TarGzArrayText, CachedData):
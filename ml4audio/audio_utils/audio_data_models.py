@@ -1,3 +1,4 @@
+import itertools
 from abc import abstractmethod
 from dataclasses import dataclass, field, InitVar
 from typing import (
@@ -250,6 +251,20 @@ class AudioTextData(Iterable[ArrayText]):
     def __iter__(self) -> Iterator[ArrayText]:
         raise NotImplementedError
 
+    def iterate_shard(
+        self,
+        shard_idx: int,
+        num_shards: int,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Iterator[ArrayText]:
+        """
+        stride-sharding: every num_shards-th sample of [start,stop), beginning at start+shard_idx
+        this default implementation decodes everything and throws away what is not in the shard,
+        subclasses that can skip samples before decoding the audio should override it
+        """
+        yield from itertools.islice(self, start + shard_idx, stop, num_shards)
+
 
 @dataclass
 class IdAudioTextData(Iterable[IdArrayText]):
@@ -0,0 +1,97 @@
+"""
+gates the (expensive) acoustic-model of a streaming-pipeline: chunks without any speech are not transcribed
+the vad runs frame-wise on the incoming audio (before the chunker), the chunks of an OverlapArrayChunker
+are then looked up by their frame_idx -> no extra buffering, frame_idx/timestamps stay untouched
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NpFloatDim1
+from misc_utils.buildable import Buildable
+from misc_utils.dataclass_utils import UNDEFINED
+from ml4audio.audio_utils.audio_io import MAX_16_BIT_PCM
+from ml4audio.service_utils.streaming_metrics import get_streaming_metrics
+
+
+@dataclass
+class StreamingVADGate(Buildable):
+    """
+    vad: nemo_vad's NeMoVAD or anything (stateful) with is_speech(int16-frame)->bool, frame_duration and reset
+        a Buildable vad is built together with the gate (and thereby with the pipeline that contains the gate)
+    sample_rate: must be the one of the pipeline's input
+    a chunk is speech if any of its vad-frames (extended by padding into the past) is speech
+        frames that are not yet classified (a not complete last frame) are ignored
+    skipped_seconds: new (not overlapping with previous chunk) audio of the skipped chunks
+    """
+
+    vad: Any = UNDEFINED
+    sample_rate: int = 16_000
+    padding: float = 0.3  # seconds, speech-onsets are fuzzy
+
+    skipped_seconds: float = field(init=False, default=0.0)
+    _rest: np.ndarray = field(
+        init=False, repr=False, default_factory=lambda: np.zeros(0, dtype=np.int16)
+    )
+    _is_speech: list[bool] = field(init=False, repr=False, default_factory=list)
+    _first_frame: int = field(init=False, repr=False, default=0)
+    _last_chunk_end: int = field(init=False, repr=False, default=0)
+
+    @property
+    def frame_len(self) -> int:
+        return int(self.vad.frame_duration * self.sample_rate)
+
+    def _build_self(self) -> Any:
+        vad_sample_rate = getattr(self.vad, "input_sample_rate", self.sample_rate)
+        assert vad_sample_rate == self.sample_rate, f"{vad_sample_rate=}"
+        self.reset()
+
+    def reset(self) -> None:
+        self.vad.reset()
+        self.skipped_seconds = 0.0
+        self._rest = np.zeros(0, dtype=np.int16)
+        self._is_speech = []
+        self._first_frame = 0
+        self._last_chunk_end = 0
+
+    @beartype
+    def handle_audio(self, array: NpFloatDim1, end_of_signal: bool = False) -> None:
+        """
+        to be called with the pipeline's input, before the chunker
+        """
+        array = (np.clip(array, -1.0, 1.0) * (MAX_16_BIT_PCM - 1)).astype(np.int16)
+        samples = np.concatenate([self._rest, array])
+        num_frames = len(samples) // self.frame_len
+        if end_of_signal and len(samples) % self.frame_len > 0:
+            num_frames += 1  # NeMoVAD pads the last frame
+        for k in range(num_frames):
+            frame = samples[k * self.frame_len : (k + 1) * self.frame_len]
+            self._is_speech.append(self.vad.is_speech(frame))
+        self._rest = samples[num_frames * self.frame_len :]
+
+    @beartype
+    def is_silence(self, frame_idx: int, num_samples: int) -> bool:
+        """
+        chunks must come in order (like from an OverlapArrayChunker), older frames are forgotten
+        """
+        first = max(0, frame_idx - int(self.padding * self.sample_rate))
+        first = first // self.frame_len - self._first_frame
+        last = -(-(frame_idx + num_samples) // self.frame_len) - self._first_frame
+        silence = not any(self._is_speech[max(first, 0) : last])
+
+        chunk_end = frame_idx + num_samples
+        if silence:
+            new_samples = max(0, chunk_end - max(frame_idx, self._last_chunk_end))
+            self.skipped_seconds += new_samples / self.sample_rate
+            metrics = get_streaming_metrics()
+            if metrics is not None:
+                metrics.observe_vad_skip(new_samples / self.sample_rate)
+        self._last_chunk_end = max(self._last_chunk_end, chunk_end)
+
+        if first > 0:
+            del self._is_speech[:first]
+            self._first_frame += first
+        return silence
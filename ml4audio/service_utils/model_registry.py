@@ -0,0 +1,150 @@
+"""
+serving several (mostly idle) models from one process instead of one replica per model
+    1. models are built (loaded) lazily on their first request
+    2. built models are cached by the hash of their config -> names sharing a config share one model
+    3. least recently used models are evicted once the accounted memory exceeds a budget
+    4. models are stateful -> each built model comes with its own lock, see use
+"""
+
+import copy
+import gc
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional, Iterator
+
+from beartype import beartype
+
+from misc_utils.beartypes import Dataclass
+from misc_utils.dataclass_utils import UNDEFINED
+from ml4audio.service_utils.fastapi_utils import get_full_model_config
+from ml4audio.service_utils.process_memory import process_memory_usage
+from ml4audio.service_utils.response_cache import hash_config
+
+
+@beartype
+def model_config_hash(model: Dataclass) -> str:
+    return hash_config(get_full_model_config(model))
+
+
+@dataclass
+class ModelRegistry:
+    """
+    models: name (a language for example) -> not yet built Buildable, gets deep-copied before building
+        -> an evicted model is not referenced by the registry anymore, its memory can be freed
+    rss_budget: in bytes, after a model got loaded the least recently used ones are evicted until the accounted
+        memory is below the budget, the just requested model is never evicted, None -> no eviction
+        accounted memory: Rss before the first load + each loaded model's Rss-increase while it was built
+        -> no need for Rss to drop after an eviction (the allocator does not necessarily give memory back)
+        concurrent builds inflate each other's Rss-increase -> rather too many evictions than too few
+        Rss is only known on linux (smaps_rollup), elsewhere there is no eviction
+    requests still using an evicted model keep it (and its lock) alive until they are done
+    """
+
+    models: dict[str, Any] = UNDEFINED
+    rss_budget: Optional[int] = None
+
+    loads: int = field(init=False, default=0)
+    evictions: int = field(init=False, default=0)
+    _name2hash: dict[str, str] = field(init=False, repr=False, default_factory=dict)
+    _built: OrderedDict = field(init=False, repr=False, default_factory=OrderedDict)
+    # config-hash -> Rss-increase in bytes while building the model
+    _rss_costs: dict[str, int] = field(init=False, repr=False, default_factory=dict)
+    _base_rss: Optional[int] = field(init=False, repr=False, default=None)
+    _build_locks: dict[str, threading.Lock] = field(
+        init=False, repr=False, default_factory=dict
+    )
+    # config-hash -> lock of the built model, a re-built model gets a new one
+    _model_locks: dict[str, threading.Lock] = field(
+        init=False, repr=False, default_factory=dict
+    )
+    _lock: threading.Lock = field(
+        init=False, repr=False, default_factory=threading.Lock
+    )
+
+    def __post_init__(self):
+        self._name2hash = {
+            name: model_config_hash(model) for name, model in self.models.items()
+        }
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.models.keys())
+
+    @property
+    def loaded(self) -> list[str]:
+        return [name for name, h in self._name2hash.items() if h in self._built]
+
+    def config_hash(self, name: str) -> str:
+        return self._name2hash[name]
+
+    def get(self, name: str) -> Any:
+        return self._get(name)[0]
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """
+        exclusive use of the built model, requests to other models (or other configs) are not blocked
+        """
+        model, model_lock = self._get(name)
+        with model_lock:
+            yield model
+
+    def _get(self, name: str) -> tuple[Any, threading.Lock]:
+        """
+        building happens outside of the registry's lock -> requests to loaded models are not blocked by it
+        """
+        config_hash = self._name2hash[name]
+        with self._lock:
+            if config_hash in self._built:
+                self._built.move_to_end(config_hash)
+                return self._built[config_hash], self._model_locks[config_hash]
+            build_lock = self._build_locks.setdefault(config_hash, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                if config_hash in self._built:  # built by a concurrent request
+                    self._built.move_to_end(config_hash)
+                    return self._built[config_hash], self._model_locks[config_hash]
+            rss_before = self._rss()
+            model = copy.deepcopy(self.models[name])
+            model.build()
+            rss_after = self._rss()
+            model_lock = threading.Lock()
+            with self._lock:
+                if self._base_rss is None:
+                    self._base_rss = rss_before
+                if rss_before is not None and rss_after is not None:
+                    self._rss_costs[config_hash] = max(0, rss_after - rss_before)
+                self._built[config_hash] = model
+                self._model_locks[config_hash] = model_lock
+                self.loads += 1
+                self._evict_least_recently_used()
+        return model, model_lock
+
+    @property
+    def accounted_rss(self) -> Optional[int]:
+        if self._base_rss is None:
+            return None
+        return self._base_rss + sum(self._rss_costs.get(h, 0) for h in self._built)
+
+    def _evict_least_recently_used(self) -> None:
+        evicted = False
+        while len(self._built) > 1 and self._exceeds_budget():
+            config_hash, _ = self._built.popitem(last=False)
+            self._rss_costs.pop(config_hash, None)
+            self._model_locks.pop(config_hash)
+            self.evictions += 1
+            evicted = True
+        if evicted:
+            gc.collect()
+
+    def _exceeds_budget(self) -> bool:
+        if self.rss_budget is None or self.accounted_rss is None:
+            return False
+        return self.accounted_rss > self.rss_budget
+
+    @staticmethod
+    def _rss() -> Optional[int]:
+        return process_memory_usage().get("Rss", None)
@@ -0,0 +1,32 @@
+import os
+import resource
+
+SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+SMAPS_KEYS = [
+    "Rss",
+    "Pss",
+    "Shared_Clean",
+    "Shared_Dirty",
+    "Private_Clean",
+    "Private_Dirty",
+]
+
+
+def process_memory_usage() -> dict[str, int]:
+    """
+    in bytes, Rss counts mmapped pages that are shared with other processes (KenLM-binaries) in every process
+    -> Pss (proportional set size) tells what a worker really costs, sum of Pss over workers is the real usage
+    smaps_rollup is linux-only, elsewhere only max-rss is available
+    """
+    if not os.path.isfile(SMAPS_ROLLUP):
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"pid": os.getpid(), "MaxRss": max_rss_kb * 1024}
+
+    usage = {"pid": os.getpid()}
+    with open(SMAPS_ROLLUP) as f:
+        for line in f:
+            key, *value = line.split()
+            key = key.rstrip(":")
+            if key in SMAPS_KEYS:
+                usage[key] = int(value[0]) * 1024  # values are in kB
+    return usage
@@ -0,0 +1,154 @@
+"""
+content-addressed cache for service-responses: same audio + same model-config -> same response
+    1. in-memory LRU
+    2. optional on-disk tier (one json-file per key), survives restarts, is shared by all workers of a service
+    3. single-flight: concurrent identical requests wait for the one computation instead of starting their own
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import numpy as np
+from beartype import beartype
+
+
+@beartype
+def hash_config(config: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+@beartype
+def audio_cache_key(audio: np.ndarray, config_hash: str, *extra: str) -> str:
+    """
+    hash of the decoded audio (not of the uploaded bytes: re-encoded/renamed files still hit)
+    extra: request-parameters that change the response (segments, ...)
+    """
+    h = hashlib.sha256()
+    h.update(f"{audio.dtype}{audio.shape}".encode("utf-8"))
+    h.update(np.ascontiguousarray(audio).tobytes())
+    for s in (config_hash, *extra):
+        h.update(s.encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass
+class ResponseCache:
+    """
+    values must be json-serializable if cache_dir is set, they come back as json (tuples become lists!)
+    """
+
+    max_entries: int = 128
+    cache_dir: Optional[str] = None
+
+    _lru: OrderedDict = field(init=False, repr=False, default_factory=OrderedDict)
+    _in_flight: dict[str, asyncio.Future] = field(
+        init=False, repr=False, default_factory=dict
+    )
+    hits: int = field(init=False, default=0)
+    misses: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _disk_file(self, key: str) -> str:
+        return f"{self.cache_dir}/{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._get_from_memory(key)
+        if value is None and self.cache_dir is not None:
+            value = self._read_disk_file(key)
+            if value is not None:
+                self._put_in_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._put_in_memory(key, value)
+        if self.cache_dir is not None:
+            self._write_disk_file(key, value)
+
+    def _get_from_memory(self, key: str) -> Optional[Any]:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return self._lru[key]
+        return None
+
+    def _put_in_memory(self, key: str, value: Any) -> None:
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _read_disk_file(self, key: str) -> Optional[Any]:
+        if not os.path.isfile(self._disk_file(key)):
+            return None
+        with open(self._disk_file(key)) as f:
+            return json.load(f)
+
+    def _write_disk_file(self, key: str, value: Any) -> None:
+        tmp_file = f"{self._disk_file(key)}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_file, self._disk_file(key))  # atomic, no half-written files
+
+    async def _get_async(self, key: str) -> Optional[Any]:
+        """
+        disk-tier in a thread, json-(de)serialization of large responses would block the event-loop
+        the in-memory LRU is only touched by the event-loop
+        """
+        value = self._get_from_memory(key)
+        if value is None and self.cache_dir is not None:
+            value = await asyncio.to_thread(self._read_disk_file, key)
+            if value is not None:
+                self._put_in_memory(key, value)
+        return value
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        if the computing request gets cancelled (client disconnected), its waiters retry -> one of them computes
+        """
+        while True:
+            value = await self._get_async(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            if key not in self._in_flight:
+                break
+            in_flight = self._in_flight[key]
+            try:
+                value = await asyncio.shield(in_flight)
+                self.hits += 1
+                return value
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise  # this request itself got cancelled
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+            self._put_in_memory(key, value)
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # marks it as retrieved, no "never retrieved"-warning if nobody waited
+            raise
+        finally:
+            self._in_flight.pop(key)
+        if self.cache_dir is not None:
+            await asyncio.to_thread(self._write_disk_file, key, value)
+        return value
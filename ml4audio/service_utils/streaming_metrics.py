@@ -0,0 +1,259 @@
+"""
+per-stage timing, real-time-factor and emit-latency of streaming asr-pipelines
+one registry per process (like prometheus_client's default registry), disabled by default:
+    all instrumentation points check for None -> cost nothing when disabled
+prometheus' text-format is written by hand -> no prometheus_client needed
+thread-safe: scheduler- and worker-threads update the same registry
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Optional, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+NO_TIMING = nullcontext()
+EMIT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+@dataclass
+class SessionStats:
+    """
+    wall_start: wall-clock time when the session's first audio arrived
+    last_update: wall-clock time of the session's last observation
+    emit-latency: how long after (session-start + audio-time of suffix's end) the suffix got emitted
+    """
+
+    wall_start: float
+    last_update: float
+    audio_seconds: float = 0.0
+    compute_seconds: float = 0.0
+    emits: int = 0
+    max_emit_latency: float = 0.0
+
+    @property
+    def real_time_factor(self) -> float:
+        return self.compute_seconds / max(self.audio_seconds, 1e-9)
+
+
+@dataclass
+class StreamingMetrics:
+    """
+    max_idle_seconds: sessions without any observation for that long are dropped (client went away without
+        end_of_signal), they are counted as dropped_sessions
+    """
+
+    max_idle_seconds: float = 300.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    events: dict[str, int] = field(default_factory=dict)
+    sessions: dict[str, SessionStats] = field(default_factory=dict)
+    finished_sessions: int = 0
+    dropped_sessions: int = 0
+    audio_seconds: float = 0.0
+    compute_seconds: float = 0.0
+    vad_skipped_seconds: float = 0.0
+    emit_latency_counts: list[int] = field(
+        default_factory=lambda: [0] * (len(EMIT_LATENCY_BUCKETS) + 1)
+    )
+    emit_latency_sum: float = 0.0
+    _lock: threading.RLock = field(
+        init=False, repr=False, compare=False, default_factory=threading.RLock
+    )
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageStats()
+            self.stages[stage].add(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    def count(self, event: str) -> None:
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + 1
+
+    def session(self, session_id: str) -> SessionStats:
+        """
+        new sessions trigger the eviction of idle ones -> number of sessions is bounded by the arrival-rate
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if session_id not in self.sessions:
+                self._drop_idle_sessions(now)
+                self.sessions[session_id] = SessionStats(
+                    wall_start=now, last_update=now
+                )
+            session = self.sessions[session_id]
+            session.last_update = now
+            return session
+
+    def _drop_idle_sessions(self, now: float) -> None:
+        idle = [
+            sid
+            for sid, s in self.sessions.items()
+            if now - s.last_update > self.max_idle_seconds
+        ]
+        for sid in idle:
+            del self.sessions[sid]
+        self.dropped_sessions += len(idle)
+
+    def observe_audio(self, session_id: str, seconds: float) -> None:
+        with self._lock:
+            self.session(session_id).audio_seconds += seconds
+            self.audio_seconds += seconds
+
+    def observe_compute(self, session_id: str, seconds: float) -> None:
+        with self._lock:
+            self.session(session_id).compute_seconds += seconds
+            self.compute_seconds += seconds
+
+    def observe_vad_skip(self, seconds: float) -> None:
+        with self._lock:
+            self.vad_skipped_seconds += seconds
+
+    def observe_emit(self, session_id: str, audio_end: float) -> None:
+        """
+        audio_end: audio-time (seconds since session-start) of the emitted suffix's last letter
+        """
+        with self._lock:
+            session = self.session(session_id)
+            latency = time.perf_counter() - session.wall_start - audio_end
+            session.emits += 1
+            session.max_emit_latency = max(session.max_emit_latency, latency)
+            bucket = bisect.bisect_left(EMIT_LATENCY_BUCKETS, latency)
+            self.emit_latency_counts[bucket] += 1
+            self.emit_latency_sum += latency
+
+    def finish_session(self, session_id: str) -> Optional[SessionStats]:
+        with self._lock:
+            self.finished_sessions += 1
+            return self.sessions.pop(session_id, None)
+
+    def to_prometheus(self, prefix: str = "asr_streaming") -> str:
+        with self._lock:
+            self._drop_idle_sessions(time.perf_counter())
+            return self._to_prometheus(prefix)
+
+    def _to_prometheus(self, prefix: str) -> str:
+        lines = [
+            f"# TYPE {prefix}_stage_seconds summary",
+            *(
+                line
+                for stage, s in self.stages.items()
+                for line in (
+                    f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {s.seconds}',
+                    f'{prefix}_stage_seconds_count{{stage="{stage}"}} {s.calls}',
+                )
+            ),
+            f"# TYPE {prefix}_stage_max_seconds gauge",
+            *(
+                f'{prefix}_stage_max_seconds{{stage="{stage}"}} {s.max_seconds}'
+                for stage, s in self.stages.items()
+            ),
+            f"# TYPE {prefix}_events_total counter",
+            *(
+                f'{prefix}_events_total{{event="{event}"}} {num}'
+                for event, num in self.events.items()
+            ),
+            f"# TYPE {prefix}_audio_seconds_total counter",
+            f"{prefix}_audio_seconds_total {self.audio_seconds}",
+            f"# TYPE {prefix}_compute_seconds_total counter",
+            f"{prefix}_compute_seconds_total {self.compute_seconds}",
+            f"# TYPE {prefix}_vad_skipped_seconds_total counter",
+            f"{prefix}_vad_skipped_seconds_total {self.vad_skipped_seconds}",
+            f"# TYPE {prefix}_finished_sessions_total counter",
+            f"{prefix}_finished_sessions_total {self.finished_sessions}",
+            f"# TYPE {prefix}_dropped_sessions_total counter",
+            f"{prefix}_dropped_sessions_total {self.dropped_sessions}",
+            f"# TYPE {prefix}_active_sessions gauge",
+            f"{prefix}_active_sessions {len(self.sessions)}",
+            f"# TYPE {prefix}_session_real_time_factor gauge",
+            *(
+                f'{prefix}_session_real_time_factor{{session="{sid}"}} {s.real_time_factor}'
+                for sid, s in self.sessions.items()
+            ),
+            f"# TYPE {prefix}_emit_latency_seconds histogram",
+        ]
+        cumulative = 0
+        for le, num in zip(
+            [str(b) for b in EMIT_LATENCY_BUCKETS] + ["+Inf"], self.emit_latency_counts
+        ):
+            cumulative += num
+            lines.append(
+                f'{prefix}_emit_latency_seconds_bucket{{le="{le}"}} {cumulative}'
+            )
+        lines.append(f"{prefix}_emit_latency_seconds_sum {self.emit_latency_sum}")
+        lines.append(f"{prefix}_emit_latency_seconds_count {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+_STREAMING_METRICS: Optional[StreamingMetrics] = None
+
+
+def enable_streaming_metrics() -> StreamingMetrics:
+    global _STREAMING_METRICS
+    if _STREAMING_METRICS is None:
+        _STREAMING_METRICS = StreamingMetrics()
+    return _STREAMING_METRICS
+
+
+def disable_streaming_metrics() -> None:
+    global _STREAMING_METRICS
+    _STREAMING_METRICS = None
+
+
+def get_streaming_metrics() -> Optional[StreamingMetrics]:
+    return _STREAMING_METRICS
+
+
+def timed_stage(stage: str):
+    """
+    with timed_stage("decoding"): ...
+    """
+    if _STREAMING_METRICS is None:
+        return NO_TIMING
+    return _STREAMING_METRICS.timer(stage)
+
+
+def timed_iterable(stage: str, iterable: Iterable[T]) -> Iterable[T]:
+    """
+    times the work done by the iterable itself (in next), not what the consumer does with its elements
+    """
+    if _STREAMING_METRICS is None:
+        return iterable
+    return _timed_iterator(_STREAMING_METRICS, stage, iter(iterable))
+
+
+def _timed_iterator(
+    metrics: StreamingMetrics, stage: str, iterator: Iterator[T]
+) -> Iterator[T]:
+    while True:
+        start = time.perf_counter()
+        try:
+            x = next(iterator)
+        except StopIteration:
+            metrics.observe_stage(stage, time.perf_counter() - start)
+            return
+        metrics.observe_stage(stage, time.perf_counter() - start)
+        yield x
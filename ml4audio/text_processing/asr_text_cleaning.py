@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Union, Optional, Annotated
 
@@ -14,6 +15,7 @@ from ml4audio.text_processing.character_mappings.text_cleaning import (
     TextCleaner,
     CHARACTER_MAPPINGS,
     TEXT_CLEANERS,
+    CharacterMapping,
 )
 
 # TODO: validate mappings?
@@ -104,6 +106,36 @@ def filter_by_lettervocab(text: str, vocab_letters: list[str]) -> str:
     return "".join([c for c in text if c in vocab_letters or c == " "]).strip(" ")
 
 
+FILTERED_OUT = "\x00"  # placeholder for out-of-vocab letters, they must not glue neighbouring spaces together
+MULTIPLE_SPACES = re.compile(" {2,}")
+
+
+class CleanAndFilterTable(dict):
+    """
+    str.translate-table that does character-mapping + casing + vocab-filtering in one go
+    gets filled lazily (__missing__), every code-point is computed only once
+    """
+
+    def __init__(self, table: dict[int, str], casing: Casing, vocab_letters: set[str]):
+        super().__init__()
+        self.table = table
+        self.casing = casing
+        self.vocab_letters = vocab_letters
+
+    def __missing__(self, codepoint: int) -> str:
+        cased = self.casing.apply(chr(codepoint).translate(self.table))
+        mapped = "".join(
+            (
+                " "
+                if c.isspace()  # same as \s in regexes
+                else (c if c in self.vocab_letters else FILTERED_OUT)
+            )
+            for c in cased
+        )
+        self[codepoint] = mapped
+        return mapped
+
+
 # @beartype
 # def casing_vocab_filtering(
 #     text: str, vocab_letters: list[str], casing: Casing = Casing.original
@@ -117,15 +149,51 @@ class VocabCasingAwareTextCleaner(TextCleaner):
     casing: Union[str, Casing] = UNDEFINED
     text_cleaner_name: str = UNDEFINED
     letter_vocab: Letters = UNDEFINED
+    _table: Optional[CleanAndFilterTable] = field(init=False, repr=False, default=None)
 
     def __post_init__(self):
         if isinstance(self.casing, str):
             self.casing = Casing(self.casing)
 
-    def __call__(self, text: str) -> str:
-        return clean_and_filter_text(
-            text, self.letter_vocab, TEXT_CLEANERS[self.text_cleaner_name], self.casing
+    def _can_be_compiled(self, text_cleaner: TextCleaner) -> bool:
+        """
+        only plain CharacterMappings, subclasses with own __call__ do unknown things
+        lower-casing is context-sensitive for greek final sigma, cannot be done char-by-char
+        """
+        is_plain_mapping = (
+            isinstance(text_cleaner, CharacterMapping)
+            and type(text_cleaner).__call__ is CharacterMapping.__call__
         )
+        sigma_in_vocab = len({"σ", "ς"}.intersection(self.letter_vocab)) > 0
+        return (
+            is_plain_mapping
+            and FILTERED_OUT not in self.letter_vocab
+            and not (self.casing is Casing.lower and sigma_in_vocab)
+        )
+
+    def _build_table(self) -> Optional[CleanAndFilterTable]:
+        text_cleaner = TEXT_CLEANERS[self.text_cleaner_name]
+        if not self._can_be_compiled(text_cleaner):
+            return None
+        return CleanAndFilterTable(
+            text_cleaner.table, self.casing, set(self.letter_vocab)
+        )
+
+    def __call__(self, text: str) -> str:
+        if self._table is None:
+            self._table = self._build_table()
+        if self._table is None:
+            return clean_and_filter_text(
+                text,
+                self.letter_vocab,
+                TEXT_CLEANERS[self.text_cleaner_name],
+                self.casing,
+            )
+
+        # same result as clean_and_filter_text but only one translate-pass over the text
+        text = TEXT_CLEANERS[self.text_cleaner_name].replace_multiletter(text)
+        text = MULTIPLE_SPACES.sub(" ", text.translate(self._table))
+        return text.replace(FILTERED_OUT, "").strip(" ")
 
 
 # if __name__ == "__main__":
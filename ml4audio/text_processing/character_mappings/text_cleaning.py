@@ -1,7 +1,7 @@
 import abc
 import re
 import string
-
+from typing import Iterable, Iterator
 
 from ml4audio.text_processing.character_mappings.cyrillic_character_maps import (
     NO_JO,
@@ -45,6 +45,15 @@ class TextCleaner(abc.ABC):
     def __call__(self, text: str) -> str:
         pass
 
+    def clean_many(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        lazy, so it can be used on huge (streamed) corpora
+        """
+        return map(self, lines)
+
+
+WHITESPACES = re.compile(r"\s+")
+
 
 class CharacterMapping(TextCleaner):
     @property
@@ -55,16 +64,25 @@ class CharacterMapping(TextCleaner):
     def __init__(self) -> None:
         # https://stackoverflow.com/questions/265960/best-way-to-strip-punctuation-from-a-string-in-python
         self.table = str.maketrans(self.mapping)
+        # properties build new dicts on every access -> only once here
+        self.replacements = tuple(self.replace_mapping.items())
 
     @property
     def replace_mapping(self) -> dict[str, str]:
         return SAME_SAME_BUT_DIFFERENT
 
-    def __call__(self, text: str) -> str:
-        for k, v in self.replace_mapping.items():
+    def replace_multiletter(self, text: str) -> str:
+        """
+        chained str.replace is faster than a single-pass regex-alternation (sre tries every alternative at every position)
+        """
+        for k, v in self.replacements:
             text = text.replace(k, v)
+        return text
+
+    def __call__(self, text: str) -> str:
+        text = self.replace_multiletter(text)
         text = text.translate(self.table)
-        text = re.sub(r"\s+", " ", text)
+        text = WHITESPACES.sub(" ", text)
         return text
 
 
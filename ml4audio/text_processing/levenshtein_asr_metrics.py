@@ -0,0 +1,205 @@
+"""
+numba-compiled counterpart of asr_metrics (which calls jiwer for every pair of ref/hyp)
+utterances are integer-encoded, aligned in parallel (numba.prange), the per-utterance counts are kept in numpy-arrays
+the backtrace prefers exactly the same edit-operations as rapidfuzz (which jiwer uses) -> counts are identical to jiwer's
+"""
+
+import re
+from dataclasses import dataclass
+
+import numba
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NeList, NeStr
+
+MULTIPLE_WHITESPACES = re.compile(r"\s\s+")
+
+
+@numba.njit(cache=True)
+def _levenshtein_counts(ref: np.ndarray, hyp: np.ndarray) -> tuple[int, int, int, int]:
+    """
+    like rapidfuzz.distance.Levenshtein.editops: strips common prefix+suffix, fills the DP-matrix and does
+    the same backtrace: deletion before insertion before diagonal
+    the full matrix is (len(ref)+1)*(len(hyp)+1) int32s, fine for utterances not for whole documents!
+    :return: hits, substitutions, insertions, deletions
+    """
+    n, m = len(ref), len(hyp)
+    prefix = 0
+    while prefix < n and prefix < m and ref[prefix] == hyp[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < n - prefix
+        and suffix < m - prefix
+        and ref[n - 1 - suffix] == hyp[m - 1 - suffix]
+    ):
+        suffix += 1
+    s1 = ref[prefix : n - suffix]
+    s2 = hyp[prefix : m - suffix]
+    n1, n2 = len(s1), len(s2)
+
+    dist = np.empty((n1 + 1, n2 + 1), dtype=np.int32)
+    for i in range(n1 + 1):
+        dist[i, 0] = i
+    for j in range(n2 + 1):
+        dist[0, j] = j
+    for i in range(1, n1 + 1):
+        for j in range(1, n2 + 1):
+            substitution = dist[i - 1, j - 1] + (1 if s1[i - 1] != s2[j - 1] else 0)
+            dist[i, j] = min(dist[i - 1, j] + 1, dist[i, j - 1] + 1, substitution)
+
+    subs, ins, dels = 0, 0, 0
+    i, j = n1, n2
+    while i != 0 and j != 0:
+        if dist[i, j] - dist[i - 1, j] == 1:
+            dels += 1
+            i -= 1
+        else:
+            j -= 1
+            if j != 0 and dist[i, j] - dist[i - 1, j] == -1:
+                ins += 1
+            else:
+                i -= 1
+                if s1[i] != s2[j]:
+                    subs += 1
+    dels += i
+    ins += j
+    hits = n - subs - dels
+    return hits, subs, ins, dels
+
+
+@numba.njit(parallel=True, cache=True)
+def _batch_levenshtein_counts(
+    ref_tokens: np.ndarray,
+    ref_offsets: np.ndarray,
+    hyp_tokens: np.ndarray,
+    hyp_offsets: np.ndarray,
+) -> np.ndarray:
+    num_utterances = len(ref_offsets) - 1
+    counts = np.zeros((num_utterances, 4), dtype=np.int64)
+    for k in numba.prange(num_utterances):
+        hits, subs, ins, dels = _levenshtein_counts(
+            ref_tokens[ref_offsets[k] : ref_offsets[k + 1]],
+            hyp_tokens[hyp_offsets[k] : hyp_offsets[k + 1]],
+        )
+        counts[k, 0] = hits
+        counts[k, 1] = subs
+        counts[k, 2] = ins
+        counts[k, 3] = dels
+    return counts
+
+
+@dataclass
+class LevenshteinCounts:
+    """
+    one entry per utterance
+    """
+
+    hits: np.ndarray
+    substitutions: np.ndarray
+    insertions: np.ndarray
+    deletions: np.ndarray
+
+    @property
+    def ref_lengths(self) -> np.ndarray:
+        return self.hits + self.substitutions + self.deletions
+
+    def micro_avg_error_rates(self, error_rate_name: str) -> dict[str, float]:
+        """
+        same float-arithmetic as jiwer (python-ints) -> exactly the same numbers
+        """
+        hits, subs, ins, dels = (
+            int(np.sum(x))
+            for x in (self.hits, self.substitutions, self.insertions, self.deletions)
+        )
+        num_ref_tokens = hits + subs + dels
+        return {
+            error_rate_name: float(subs + dels + ins) / float(num_ref_tokens),
+            "insr": ins / num_ref_tokens,
+            "delr": dels / num_ref_tokens,
+            "subr": subs / num_ref_tokens,
+        }
+
+
+def _offsets(lengths: list[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    return offsets
+
+
+def _split_into_words(text: str) -> list[str]:
+    """
+    jiwer's wer_default: RemoveMultipleSpaces, Strip, ReduceToListOfListOfWords
+    printable text contains no whitespace but " " -> str.split does the same (and is faster)
+    """
+    if text.isprintable():
+        return text.split()
+    text = MULTIPLE_WHITESPACES.sub(" ", text).strip()
+    return [w for w in text.split(" ") if len(w) >= 1]
+
+
+def _encode_words(
+    texts: list[str], word2int: dict[str, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    all texts into one flat array of word-ids + offsets
+    """
+    words = [_split_into_words(t) for t in texts]
+    offsets = _offsets([len(ws) for ws in words])
+    tokens = np.fromiter(
+        (word2int.setdefault(w, len(word2int)) for ws in words for w in ws),
+        dtype=np.int64,
+        count=offsets[-1],
+    )
+    return tokens, offsets
+
+
+def _encode_chars(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    jiwer's cer_default: Strip, ReduceToListOfListOfChars -> code-points are the integer-encoding
+    """
+    stripped = [t.strip() for t in texts]
+    code_points = np.frombuffer("".join(stripped).encode("utf-32-le"), dtype=np.uint32)
+    return code_points.astype(np.int64), _offsets([len(t) for t in stripped])
+
+
+def _count(
+    refs: tuple[np.ndarray, np.ndarray], hyps: tuple[np.ndarray, np.ndarray]
+) -> LevenshteinCounts:
+    counts = _batch_levenshtein_counts(*refs, *hyps)
+    return LevenshteinCounts(
+        hits=counts[:, 0],
+        substitutions=counts[:, 1],
+        insertions=counts[:, 2],
+        deletions=counts[:, 3],
+    )
+
+
+@beartype
+def word_levenshtein_counts(refs: NeList[str], hyps: NeList[str]) -> LevenshteinCounts:
+    assert len(refs) == len(hyps)
+    word2int: dict[str, int] = {}
+    return _count(_encode_words(refs, word2int), _encode_words(hyps, word2int))
+
+
+@beartype
+def character_levenshtein_counts(
+    refs: NeList[str], hyps: NeList[str]
+) -> LevenshteinCounts:
+    assert len(refs) == len(hyps)
+    return _count(_encode_chars(refs), _encode_chars(hyps))
+
+
+@beartype
+def micro_avg_asr_scores_fast(
+    refs_hyps: NeList[tuple[NeStr, str]],
+) -> dict[str, dict[str, float]]:
+    """
+    same output as asr_metrics.micro_avg_asr_scores
+    """
+    refs, hyps = [list(x) for x in zip(*refs_hyps)]
+    return {
+        "word": word_levenshtein_counts(refs, hyps).micro_avg_error_rates("wer"),
+        "char": character_levenshtein_counts(refs, hyps).micro_avg_error_rates("cer"),
+    }
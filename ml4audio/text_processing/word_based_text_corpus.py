@@ -1,10 +1,12 @@
 import itertools
 import json
+import os
+import shutil
 from collections import Counter
 from dataclasses import dataclass, field
 from functools import partial
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, Callable, Iterable, Iterator
 
 from tqdm import tqdm
 
@@ -18,8 +20,28 @@ from misc_utils.dataclass_utils import (
     _UNDEFINED,
 )
 from misc_utils.prefix_suffix import BASE_PATHES, PrefixSuffix
+from misc_utils.processing_utils import iterable_to_batches
 from misc_utils.utils import get_val_from_nested_dict
+from ml4audio.utils.process_pool import imap_ordered_in_process_pool
 from ml4audio.text_processing.asr_text_cleaning import VocabCasingAwareTextCleaner
+from ml4audio.text_processing.character_mappings.text_cleaning import TextCleaner
+
+
+def _write_raw_text_shard(job: tuple[Callable[[str], str], str, str]) -> int:
+    """
+    runs in worker-process, one input-file -> one gzipped shard
+    """
+    get_raw_text_fun, file, shard_file = job
+    num_lines = 0
+
+    def raw_texts():
+        nonlocal num_lines
+        for line in read_lines(file):  # gzipped files are decompressed on the fly
+            num_lines += 1
+            yield get_raw_text_fun(line)
+
+    write_lines(shard_file, raw_texts())
+    return num_lines
 
 
 @dataclass
@@ -29,6 +51,7 @@ class RglobRawCorpus(CachedData):
     cache_base: PrefixSuffix = field(default_factory=lambda: BASE_PATHES["lm_data"])
     upsample_factor: int = 1
     limit: Optional[int] = None
+    num_workers: int = field(default=0, repr=False)  # >0 -> one file per job
 
     @property
     def name(self):
@@ -42,14 +65,21 @@ class RglobRawCorpus(CachedData):
         return line
 
     def _build_cache(self):
+        files = self._get_files()
+        print(f"{self.name} found {len(files)} files: {files=}")
+        if self.num_workers > 0 and self.limit is None:
+            num_lines = self._build_in_parallel(files)
+        else:
+            num_lines = self._build_serially(files)
+        assert num_lines > 0, f"{self.name} got zero lines!"
+
+    def _build_serially(self, files: list[str]) -> int:
         counter = [0]
 
         def count_lines(l):
             counter[0] += 1  # TODO this is ugly!
             return l
 
-        files = self._get_files()
-        print(f"{self.name} found {len(files)} files: {files=}")
         lines_g = (line for file in files for line in read_lines(file))
         lines_g = (
             count_lines(self.get_raw_text_fun(line))
@@ -58,7 +88,39 @@ class RglobRawCorpus(CachedData):
         write_lines(
             self.corpus_filepath, tqdm(lines_g, f"{self.name} is writing lines")
         )
-        assert counter[0] > 0, f"{self.name} got zero lines!"
+        return counter[0]
+
+    def _build_in_parallel(self, files: list[str]) -> int:
+        """
+        every worker writes its own gzipped shard, shards are concatenated in file-order
+        -> same corpus-file as _build_serially (concatenated gzip-members are a valid gzip-file)
+        """
+        assert self.corpus_filepath.endswith(".gz")
+        shard_files = [
+            self.prefix_cache_dir(f"shard-{k}.txt.gz") for k in range(len(files))
+        ]
+        jobs = [
+            (self.get_raw_text_fun, file, shard_file)
+            for file, shard_file in zip(files, shard_files)
+        ]
+        num_lines = sum(
+            tqdm(
+                imap_ordered_in_process_pool(
+                    _write_raw_text_shard,
+                    jobs,
+                    num_workers=self.num_workers,
+                    prefetch=self.num_workers,
+                ),
+                desc=f"{self.name} is writing shards",
+                total=len(jobs),
+            )
+        )
+        with open(self.corpus_filepath, "wb") as f:
+            for shard_file in shard_files:
+                with open(shard_file, "rb") as shard_f:
+                    shutil.copyfileobj(shard_f, f)
+                os.remove(shard_file)
+        return num_lines
 
     def _get_files(self) -> NeList[str]:
         return list(str(f) for f in Path(self.corpus_dir).rglob(self.file_pattern))
@@ -87,12 +149,27 @@ def spacesplit_tokenize_and_tokencounting(line, counter):
     return text
 
 
+def _clean_and_count(job: tuple[TextCleaner, list[str]]) -> tuple[list[str], Counter]:
+    """
+    runs in worker-process, counts locally, the Counters get merged by the consumer
+    """
+    text_cleaner, lines = job
+    counter = Counter()
+    texts = (
+        spacesplit_tokenize_and_tokencounting(text, counter)
+        for text in text_cleaner.clean_many(lines)
+    )
+    return [text for text in texts if text is not None], counter
+
+
 @dataclass
 class WordBasedLMCorpus(CachedData):
     name: Union[_UNDEFINED, str] = field(init=True, default=UNDEFINED)
     raw_corpora: Union[_UNDEFINED, BuildableList[RglobRawCorpus]] = UNDEFINED
     transcript_cleaner: VocabCasingAwareTextCleaner = UNDEFINED
     cache_base: PrefixSuffix = field(default_factory=lambda: BASE_PATHES["lm_data"])
+    num_workers: int = field(default=0, repr=False)
+    lines_per_job: int = field(default=10_000, repr=False)
 
     @property
     def corpus_filepath(self) -> str:
@@ -102,25 +179,19 @@ class WordBasedLMCorpus(CachedData):
     def word_counts_filepath(self) -> str:
         return self.prefix_cache_dir("word_counts.txt")
 
-    def process_line(self, l: str, counter):
-        s = self.transcript_cleaner(l)
-        return spacesplit_tokenize_and_tokencounting(s, counter)
-
     def _build_cache(self):
 
         lines_g = (line for corpus in self.raw_corpora.data for line in corpus)
 
         counter = Counter()
+        if self.num_workers > 0:
+            texts_g = self._process_in_parallel(lines_g, counter)
+        else:
+            texts_g = self._process_serially(lines_g, counter)
 
         write_lines(
             self.corpus_filepath,
-            tqdm(
-                filter(
-                    lambda x: x is not None,
-                    map(partial(self.process_line, counter=counter), lines_g),
-                ),
-                desc=f"{self.name} is writing processed text_file",
-            ),
+            tqdm(texts_g, desc=f"{self.name} is writing processed text_file"),
         )
         wordcounts: dict[str, int] = {
             word: count
@@ -131,3 +202,35 @@ class WordBasedLMCorpus(CachedData):
             self.word_counts_filepath,
             (f"{word}\t{count}" for word, count in wordcounts.items()),
         )
+
+    def _process_serially(
+        self, lines: Iterable[str], counter: Counter
+    ) -> Iterator[str]:
+        cleaned_g = self.transcript_cleaner.clean_many(lines)
+        return filter(
+            lambda x: x is not None,
+            map(
+                partial(spacesplit_tokenize_and_tokencounting, counter=counter),
+                cleaned_g,
+            ),
+        )
+
+    def _process_in_parallel(
+        self, lines: Iterable[str], counter: Counter
+    ) -> Iterator[str]:
+        """
+        blocks of lines are cleaned+counted in worker-processes, results come back in order
+        -> processed-file and word-counts (even order of equally frequent words) are the same as _process_serially
+        """
+        jobs = (
+            (self.transcript_cleaner, block)
+            for block in iterable_to_batches(lines, batch_size=self.lines_per_job)
+        )
+        for texts, block_counter in imap_ordered_in_process_pool(
+            _clean_and_count,
+            jobs,
+            num_workers=self.num_workers,
+            prefetch=2 * self.num_workers,
+        ):
+            counter.update(block_counter)
+            yield from texts
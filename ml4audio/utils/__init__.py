@@ -0,0 +1,5 @@
+from misc_utils.beartyped_dataclass_patch import (
+    beartype_all_dataclasses_of_this_files_parent,
+)
+
+beartype_all_dataclasses_of_this_files_parent(__file__)
@@ -0,0 +1,51 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Callable, Iterable, Iterator, TypeVar, Optional
+
+from beartype import beartype
+
+TJob = TypeVar("TJob")
+TResult = TypeVar("TResult")
+
+
+@beartype
+def imap_ordered_in_process_pool(
+    fun: Callable[[TJob], TResult],
+    jobs: Iterable[TJob],
+    num_workers: int,
+    prefetch: int = 64,
+    start_method: str = "spawn",
+    initializer: Optional[Callable[[], None]] = None,
+) -> Iterator[TResult]:
+    """
+    order-preserving parallel map, at most prefetch jobs are "in flight"
+    the jobs-iterable is consumed lazily in the calling process, so it is fine to read from a stream (tar-file)
+    fun and jobs must be pickleable! -> fun must be a module-level function, no lambdas!
+
+    NOTE: torch's DataLoader-workers are daemonic and are not allowed to have children
+        -> use this with dataloader_num_workers=0, the process-pool replaces the DataLoader-workers
+    :param initializer: called once in every worker-process, see parallel_audio_decoding for torch-workers
+    """
+    assert num_workers > 0
+    assert (
+        prefetch >= num_workers
+    ), f"{prefetch=} should not be smaller than {num_workers=}"
+    executor = ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=initializer,
+    )
+    in_flight: deque[Future] = deque()
+    try:
+        for job in jobs:
+            in_flight.append(executor.submit(fun, job))
+            if len(in_flight) >= prefetch:
+                yield in_flight.popleft().result()
+
+        while len(in_flight) > 0:
+            yield in_flight.popleft().result()
+    finally:
+        # consumer might stop early (islice with limit): pending jobs are cancelled,
+        # the running ones are not waited for, their workers exit once they are done
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -8,7 +8,7 @@ from ml4audio.audio_utils.audio_io import read_audio_chunks_from_file
 from functools import partial
 from itertools import groupby
 from itertools import islice
-from typing import Dict, List, Tuple
+from typing import List, Tuple
 
 from nemo_language_classification.nemo_lang_clf import NemoLangClf
 
@@ -33,25 +33,28 @@ def get_data(
     return data
 
 
-def get_max(o: Dict[str, float]):
-    label, value = max(o.items(), key=lambda x: x[1])
-    return label
-
-
 @beartype
 def benchmark_lang_clf(
     mdl: NemoLangClf, wavfile_label: NeList[tuple[str, str]]
 ) -> dict:
     sr = 16000
     chunk_dur = 8
-    id_pred_targets = [
-        (f"{wav_file}-{k}", get_max(mdl.predict(chunk)), target)
-        for wav_file, target in tqdm(wavfile_label)
-        for k, chunk in enumerate(
-            read_audio_chunks_from_file(wav_file, sr, chunk_duration=chunk_dur)
+    id_pred_targets = []
+    for wav_file, target in tqdm(wavfile_label):
+        chunks = [
+            chunk
+            for chunk in read_audio_chunks_from_file(
+                wav_file, sr, chunk_duration=chunk_dur
+            )
+            if len(chunk) > (chunk_dur / 2) * sr
+        ]
+        if len(chunks) == 0:
+            continue
+        probs = mdl.predict_batch(chunks)
+        id_pred_targets.extend(
+            (f"{wav_file}-{k}", mdl.labels[i], target)
+            for k, i in enumerate(probs.argmax(axis=1))
         )
-        if len(chunk) > (chunk_dur / 2) * sr
-    ]
     eids, preds, targets = (list(x) for x in zip(*id_pred_targets))
     clf_report = metrics.classification_report(
         y_true=targets,
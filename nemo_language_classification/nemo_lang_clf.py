@@ -6,11 +6,13 @@ from misc_utils.beartypes import (
     TorchTensorFloat2D,
     TorchTensorInt,
     NeDict,
+    NeList,
     NumpyInt16Dim1,
+    NumpyFloat2DArray,
 )
 
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 import torch
 
@@ -27,39 +29,139 @@ device = "cuda" if torch.cuda.is_available() else "cpu"
 @dataclass
 class NemoLangClf(Buildable):
     model_file: str
+    max_batch_size: int = 16
 
     def _build_self(self) -> Any:
         self.model = load_EncDecSpeakerLabelModel(self.model_file)
         self.model.eval()
         self.model.to(device)
 
+    @property
+    def labels(self) -> list[str]:
+        return list(self.model.cfg.train_ds.labels)
+
     @beartype
-    @torch.no_grad()
     def predict(self, audio_array: NumpyInt16Dim1) -> NeDict[str, float]:
-        labels = list(self.model.cfg.train_ds.labels)
-        sig, sig_len = prepare_audio_signal(audio_array)
-        logits, _ = self.model.forward(
-            input_signal=sig.to(device), input_signal_length=sig_len.to(device)
-        )
+        probs = np.exp(self.predict_log_probs([audio_array])[0])
+        return dict(zip(self.labels, probs.tolist()))
+
+    @beartype
+    def predict_batch(self, audio_arrays: NeList[NumpyInt16Dim1]) -> NumpyFloat2DArray:
+        """
+        returns probabilities of shape [len(audio_arrays), len(self.labels)]
+        """
+        return np.exp(self.predict_log_probs(audio_arrays))
+
+    @beartype
+    @torch.no_grad()
+    def predict_log_probs(
+        self, audio_arrays: NeList[NumpyInt16Dim1]
+    ) -> NumpyFloat2DArray:
+        """
+        arrays are sorted by length and padded batch-wise -> little compute wasted on padding
+        """
+        order = sorted(range(len(audio_arrays)), key=lambda i: -len(audio_arrays[i]))
+        log_probs = np.zeros((len(audio_arrays), len(self.labels)), dtype=np.float32)
+        for k in range(0, len(order), self.max_batch_size):
+            idx = order[k : k + self.max_batch_size]
+            sig, sig_len = prepare_audio_signals([audio_arrays[i] for i in idx])
+            logits, _ = self.model.forward(
+                input_signal=sig.to(device), input_signal_length=sig_len.to(device)
+            )
+            log_probs[idx] = torch.log_softmax(logits, dim=-1).cpu().numpy()
+        return log_probs
+
+
+@dataclass
+class StreamingLangClf:
+    """
+    classifies a stream chunk-wise, log-probabilities of the chunks are summed up (segment voting)
+    once the posterior of the best label reaches threshold the decision is final -> no more forward passes
+
+    chunk_duration: audio is buffered until a chunk is full
+    min_chunk_duration: at end_of_signal the rest is classified if it is at least this long
+    min_chunks: no decision based on a single (maybe unlucky) chunk
+    """
+
+    lang_clf: NemoLangClf
+    sample_rate: int = 16_000
+    chunk_duration: float = 4.0
+    min_chunk_duration: float = 1.0
+    threshold: float = 0.95
+    min_chunks: int = 2
+
+    label: Optional[str] = field(init=False, default=None)
+    num_chunks: int = field(init=False, default=0)
+    _log_probs: Optional[np.ndarray] = field(init=False, repr=False, default=None)
+    _buffer: Optional[np.ndarray] = field(init=False, repr=False, default=None)
+
+    def reset(self) -> None:
+        self.label = None
+        self.num_chunks = 0
+        self._log_probs = np.zeros(len(self.lang_clf.labels), dtype=np.float32)
+        self._buffer = np.zeros(0, dtype=np.int16)
+
+    @property
+    def probs(self) -> np.ndarray:
+        """
+        posterior over self.lang_clf.labels given all chunks so far
+        """
+        return np.exp(self._log_probs - np.logaddexp.reduce(self._log_probs))
 
-        probs = torch.softmax(logits, dim=-1).squeeze()
-        label2proba = {k: float(p.cpu().numpy()) for k, p in zip(labels, probs)}
-        # class_idx = np.argmax(probs)
-        # class_label = labels[class_idx]
-        return label2proba
+    @beartype
+    def handle_audio(
+        self, array: NumpyInt16Dim1, end_of_signal: bool = False
+    ) -> Optional[str]:
+        """
+        returns the label once decided (or at end_of_signal the best so far), None if still undecided
+        """
+        if self.label is not None:
+            return self.label
+
+        self._buffer = np.concatenate([self._buffer, array])
+        chunk_len = int(self.chunk_duration * self.sample_rate)
+        chunks = [
+            self._buffer[k : k + chunk_len]
+            for k in range(0, len(self._buffer) - chunk_len + 1, chunk_len)
+        ]
+        self._buffer = self._buffer[len(chunks) * chunk_len :]
+        if end_of_signal:
+            if len(self._buffer) >= int(self.min_chunk_duration * self.sample_rate):
+                chunks.append(self._buffer)
+            self._buffer = self._buffer[:0]
+
+        if len(chunks) > 0:
+            self._log_probs += self.lang_clf.predict_log_probs(chunks).sum(axis=0)
+            self.num_chunks += len(chunks)
+
+        probs = self.probs
+        confident = self.num_chunks >= self.min_chunks and probs.max() >= self.threshold
+        if confident or (end_of_signal and self.num_chunks > 0):
+            self.label = self.lang_clf.labels[int(np.argmax(probs))]
+        return self.label
 
 
 @beartype
 def prepare_audio_signal(
     signal: NumpyInt16Dim1,
 ) -> tuple[TorchTensorFloat2D, TorchTensorInt]:
-    signal = signal.squeeze()
-    assert signal.dtype == np.int16
-    signal = signal.astype(np.float32) / MAX_16_BIT_PCM
-    size_tensor = torch.as_tensor([signal.size], dtype=torch.int64)
+    return prepare_audio_signals([signal.squeeze()])
+
+
+@beartype
+def prepare_audio_signals(
+    signals: NeList[NumpyInt16Dim1],
+) -> tuple[TorchTensorFloat2D, TorchTensorInt]:
+    """
+    zero-padded to the longest signal, lengths are the true ones
+    """
+    lengths = [len(s) for s in signals]
+    batch = np.zeros((len(signals), max(lengths)), dtype=np.float32)
+    for k, s in enumerate(signals):
+        batch[k, : len(s)] = s.astype(np.float32) / MAX_16_BIT_PCM
     return (
-        torch.as_tensor(signal, dtype=torch.float32).unsqueeze(0),
-        size_tensor,
+        torch.as_tensor(batch, dtype=torch.float32),
+        torch.as_tensor(lengths, dtype=torch.int64),
     )
 
 
@@ -72,9 +174,21 @@ if __name__ == "__main__":
     frame_duration = 4.0
 
     wav_file = "tests/resources/tuda_2015-02-03-13-51-36_Realtek.wav"
-    for chunk in tqdm(
+    chunks = list(
         read_audio_chunks_from_file(
             wav_file, input_sample_rate, chunk_duration=frame_duration
         )
+    )
+    probs = mdl.predict_batch(chunks)
+    for p in probs:
+        print(dict(zip(mdl.labels, p.round(3).tolist())))
+
+    streaming_clf = StreamingLangClf(lang_clf=mdl, sample_rate=input_sample_rate)
+    streaming_clf.reset()
+    for chunk in tqdm(
+        read_audio_chunks_from_file(wav_file, input_sample_rate, chunk_duration=0.5)
     ):
-        print(mdl.predict(chunk))
+        label = streaming_clf.handle_audio(chunk)
+        if label is not None:
+            break
+    print(f"{streaming_clf.label=} after {streaming_clf.num_chunks} chunks")
@@ -0,0 +1,115 @@
+"""
+coalesces the texts of concurrent requests into one call of a batch-predict function
+    1. requests are queued, a batch is closed when adding the next request would exceed max_tokens
+        or max_wait seconds after its first request arrived
+    2. predict_fn runs in a single worker-thread -> event-loop stays responsive, model is never called concurrently
+    3. while a batch is being predicted new requests pile up in the queue -> under load batches grow by themselves
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from beartype import beartype
+
+
+@dataclass
+class _Request:
+    texts: list[str]
+    future: asyncio.Future
+
+    @property
+    def num_tokens(self) -> int:
+        return sum(len(t.split(" ")) for t in self.texts)
+
+
+@dataclass
+class MicroBatcher:
+    """
+    predict_fn: list of texts -> list of texts (of same length)
+    max_tokens: whitespace-separated tokens, a single request that is larger forms a batch of its own
+    """
+
+    predict_fn: Callable[[list[str]], list[str]]
+    max_tokens: int = 4096
+    max_wait: float = 0.01  # seconds
+
+    batch_sizes: list[int] = field(init=False, repr=False, default_factory=list)
+    _queue: Optional[asyncio.Queue] = field(init=False, repr=False, default=None)
+    _next: Optional[_Request] = field(init=False, repr=False, default=None)
+    _executor: Optional[ThreadPoolExecutor] = field(
+        init=False, repr=False, default=None
+    )
+    _task: Optional[asyncio.Task] = field(init=False, repr=False, default=None)
+
+    def start(self) -> None:
+        """
+        must be called from within the event-loop
+        """
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = asyncio.create_task(self._batching_loop())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()
+
+    @beartype
+    async def process(self, texts: list[str]) -> list[str]:
+        if len(texts) == 0:
+            return []
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Request(texts, future))
+        return await future
+
+    async def _batching_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch(loop)
+            texts = [text for request in batch for text in request.texts]
+            self.batch_sizes.append(len(texts))
+            try:
+                predictions = await loop.run_in_executor(
+                    self._executor, self.predict_fn, texts
+                )
+            except Exception as e:  # every request of the batch gets the error
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                if not request.future.done():  # client could have gone away
+                    request.future.set_result(
+                        predictions[offset : offset + len(request.texts)]
+                    )
+                offset += len(request.texts)
+
+    async def _collect_batch(self, loop: asyncio.AbstractEventLoop) -> list[_Request]:
+        first = self._next if self._next is not None else await self._queue.get()
+        self._next = None
+        batch, num_tokens = [first], first.num_tokens
+        deadline = loop.time() + self.max_wait
+        while num_tokens < self.max_tokens:
+            try:
+                request = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if num_tokens + request.num_tokens > self.max_tokens:
+                self._next = request  # opens the next batch
+                break
+            batch.append(request)
+            num_tokens += request.num_tokens
+        return batch
@@ -13,6 +13,7 @@ from misc_utils.dataclass_utils import (
     encode_dataclass,
 )
 from misc_utils.utils import just_try
+from micro_batching import MicroBatcher
 
 DEBUG = os.environ.get("DEBUG", "False").lower() != "false"
 if DEBUG:
@@ -20,6 +21,12 @@ if DEBUG:
 
 app = FastAPI(debug=DEBUG)
 inferencer: Optional[PunctuationCapitalizationModel] = None
+# texts of concurrent requests go into one add_punctuation_capitalization-call
+micro_batcher = MicroBatcher(
+    predict_fn=lambda texts: inferencer.add_punctuation_capitalization(texts),
+    max_tokens=int(os.environ.get("MAX_BATCH_TOKENS", 4096)),
+    max_wait=float(os.environ.get("MAX_BATCH_WAIT", 0.01)),
+)
 
 
 @app.get("/get_inferencer_dataclass")
@@ -70,15 +77,31 @@ class PunctuationCapitalizationRequest(BaseModel):
         }
 
 
+class PunctuationCapitalizationBulkRequest(BaseModel):
+    texts: list[str]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "texts": [default_query, default_query],
+            }
+        }
+
+
 @app.post("/predict")  # TODO: response_model=SomeResponsePydanticDataModel
 async def predict(req: PunctuationCapitalizationRequest):
-    global inferencer
-
-    result = inferencer.add_punctuation_capitalization([req.text])
+    result = await micro_batcher.process([req.text])
 
     return {"text": result}
 
 
+@app.post("/predict_bulk")
+async def predict_bulk(req: PunctuationCapitalizationBulkRequest):
+    result = await micro_batcher.process(req.texts)
+
+    return {"texts": result}
+
+
 def load_nemo_model(nemo_model="model.nemo"):
     """
     Nur leere Drohungen oder ein realistisches Szenario. Wirtschaftsminister Robert
@@ -95,6 +118,7 @@ def load_nemo_model(nemo_model="model.nemo"):
 
 @app.on_event("startup")
 async def startup_event():
+    micro_batcher.start()
     model_files = [str(p) for p in Path("/code").rglob("model.nemo")]
 
     if len(model_files) > 0:
@@ -103,6 +127,11 @@ async def startup_event():
         print(f"no model found in container, use /upload_modelfile")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await micro_batcher.stop()
+
+
 if __name__ == "__main__":
     """
         #TODO: why is that necessary?
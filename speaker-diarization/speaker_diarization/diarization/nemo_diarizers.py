@@ -1,38 +1,82 @@
-from dataclasses import dataclass
-from pathlib import Path
-from tempfile import TemporaryDirectory
+from dataclasses import dataclass, field
 from typing import Any
 
-import soundfile
+import numpy as np
+import torch
 from beartype import beartype
 from omegaconf import OmegaConf
 
-from data_io.readwrite_files import write_lines
+from misc_utils.beartypes import NeList, NpFloatDim1
+from misc_utils.processing_utils import iterable_to_batches
 from ml4audio.audio_utils.audio_segmentation_utils import (
     StartEndArraysNonOverlap,
     NonOverlSegs,
     StartEndLabels,
+    fix_segments_to_non_overlapping,
+    merge_segments_of_same_label,
 )
+from ml4audio.audio_utils.nemo_utils import load_EncDecSpeakerLabelModel
 from ml4audio.speaker_tasks.diarization.speaker_diarization_inferencer import (
     SpeakerDiarizationInferencer,
 )
 from ml4audio.speaker_tasks.speaker_embedding_utils import (
-    format_rttm_lines,
-    read_sel_from_rttm,
+    SubSegment,
+    calc_subsegments_for_clustering,
 )
-from nemo.collections.asr.models import ClusteringDiarizer
-from nemo_vad.nemo_offline_vad import NemoOfflineVAD, create_manifest
+from nemo.collections.asr.models import EncDecSpeakerLabelModel
+from nemo.collections.asr.parts.utils.nmesc_clustering import COSclustering
+from nemo_vad.nemo_offline_vad import NemoOfflineVAD
+
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+
+@beartype
+def embed_padded_batches(
+    speaker_model: EncDecSpeakerLabelModel,
+    arrays: NeList[NpFloatDim1],
+    batch_size: int,
+) -> torch.Tensor:
+    """
+    sub-segments at the end of a vad-segment are shorter than the window -> zero-padded, true lengths given
+    """
+    embeds = []
+    with torch.no_grad():
+        for batch in iterable_to_batches(arrays, batch_size=batch_size):
+            lengths = [len(a) for a in batch]
+            signal = np.zeros((len(batch), max(lengths)), dtype=np.float32)
+            for k, a in enumerate(batch):
+                signal[k, : len(a)] = a
+            _, embs = speaker_model.forward(
+                input_signal=torch.from_numpy(signal).to(DEVICE),
+                input_signal_length=torch.as_tensor(lengths).to(DEVICE),
+            )
+            embeds.append(embs.view(-1, embs.shape[-1]).cpu())
+    return torch.cat(embeds, dim=0)
 
 
 @dataclass
 class NemoVadDiarizer(SpeakerDiarizationInferencer):
+    """
+    oracle-vad diarization like nemo's ClusteringDiarizer but in memory:
+        vad-segments -> sub-segments (window, shift) -> speaker-embeddings -> NMESC-clustering
+    the speaker-model is loaded once in build, no temp-files (wav, rttm, manifest) per call
+    only single-scale embeddings (window_length_in_sec and shift_length_in_sec must be numbers)
+    """
+
     nemo_vad: NemoOfflineVAD
-    # cfg:DictConfig
+    speaker_model_name: str = "titanet_large"
+    cfg_file: str = "ml4audio/speaker_tasks/diarization/offline_diarization.yaml"
+    same_speaker_min_gap_dur: float = 0.1  # 0.0 would not even merge touching ones
+
+    _speaker_model: EncDecSpeakerLabelModel = field(
+        init=False, repr=False, default=None
+    )
 
     def _build_self(self) -> Any:
-        self.cfg = OmegaConf.load(
-            "ml4audio/speaker_tasks/diarization/offline_diarization.yaml"
-        )
+        self.cfg = OmegaConf.load(self.cfg_file)
+        self._speaker_model = load_EncDecSpeakerLabelModel(self.speaker_model_name)
+        self._speaker_model.eval()
+        self._speaker_model.to(DEVICE)
 
     @beartype
     def _run_vad(self, s_e_a: StartEndArraysNonOverlap) -> NonOverlSegs:
@@ -46,38 +90,52 @@ class NemoVadDiarizer(SpeakerDiarizationInferencer):
     @beartype
     def predict(self, s_e_a: StartEndArraysNonOverlap) -> StartEndLabels:
         segments = self._run_vad(s_e_a)
-        _, _, array = s_e_a[0]
-
-        # tmpdir = f"{os.getcwd()}/nemo_diar"
-        # os.makedirs(tmpdir)
-        with TemporaryDirectory(prefix="/tmp/nemo_tmp_dir") as tmpdir:
-            fileid = "audio"
-            audio_file = f"{tmpdir}/{fileid}.wav"
-            manifest_file = f"{tmpdir}/manifest.json"
-            rttm_file = f"{tmpdir}/vad.rttm"
-
-            soundfile.write(audio_file, array, samplerate=16000)
-            # manifest_file = f"speaker_tasks/tests/resources/input_manifest.json"
-            write_lines(
-                rttm_file,
-                format_rttm_lines(
-                    [(s, e, "NOSPEAKER") for s, e in segments], file_id=fileid
-                ),
-            )
-
-            create_manifest(manifest_file, audio_file, rttm_file)
-            self.cfg.diarizer.manifest_filepath = manifest_file
-            self.cfg.diarizer.vad.model_path = None
-            self.cfg.diarizer.speaker_embeddings.model_path = (
-                "titanet-large"  # TODO: wtf hardcoded!
-            )
-            self.cfg.diarizer.oracle_vad = True
-            # self.cfg.diarizer.vad.parameters.window_length_in_sec = params["window"]
-            # self.cfg.diarizer.vad.parameters.shift_length_in_sec = params["step_dur"]
-            self.cfg.diarizer.out_dir = tmpdir
-            self.cfg.device = "cpu"
-            sd_model = ClusteringDiarizer(cfg=self.cfg)
-            sd_model.diarize()
+        offset, _, array = s_e_a[0]
+        SR = self.nemo_vad.sample_rate
+        emb_params = self.cfg.diarizer.speaker_embeddings.parameters
+        sub_segs: list[SubSegment] = calc_subsegments_for_clustering(
+            chunks=[
+                array[round((s - offset) * SR) : round((e - offset) * SR)]
+                for s, e in segments
+            ],
+            labeled_segments=[(s, e, "NOSPEAKER") for s, e in segments],
+            sample_rate=SR,
+            shift=float(emb_params.shift_length_in_sec),
+            window=float(emb_params.window_length_in_sec),
+        )
+        embeds = embed_padded_batches(
+            self._speaker_model,
+            [ss.audio_array for ss in sub_segs],
+            batch_size=self.cfg.batch_size,
+        )
 
-            rttm_file = next(iter(Path(f"{tmpdir}/pred_rttms").glob("*.rttm")))
-            return read_sel_from_rttm(str(rttm_file))
+        start_ends = [
+            (float(ss.offset + ss.start), float(ss.offset + ss.end)) for ss in sub_segs
+        ]
+        clustering_params = self.cfg.diarizer.clustering.parameters
+        cluster_labels = COSclustering(
+            {  # nemo==1.11.0 format: single scale with index 0 -> is the base-scale
+                "scale_dict": {
+                    0: {
+                        "embeddings": embeds,
+                        "time_stamps": [f"{s} {e}" for s, e in start_ends],
+                    }
+                },
+                "multiscale_weights": torch.ones((1, 1)),
+            },
+            oracle_num_speakers=None,
+            max_num_speaker=clustering_params.max_num_speakers,
+            enhanced_count_thres=clustering_params.enhanced_count_thres,
+            max_rp_threshold=clustering_params.max_rp_threshold,
+            sparse_search=clustering_params.sparse_search,
+            sparse_search_volume=clustering_params.sparse_search_volume,
+            cuda=DEVICE == "cuda",
+        )
+        s_e_fixed = fix_segments_to_non_overlapping(start_ends)
+        return merge_segments_of_same_label(
+            [
+                (s, e, f"speaker_{l}")
+                for (s, e), l in zip(s_e_fixed, cluster_labels.tolist())
+            ],
+            min_gap_dur=self.same_speaker_min_gap_dur,
+        )
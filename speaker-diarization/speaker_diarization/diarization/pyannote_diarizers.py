@@ -1,9 +1,9 @@
 import os
 from dataclasses import dataclass, field
-from tempfile import TemporaryDirectory
 from typing import Any
 
-import soundfile
+import numpy as np
+import torch
 from beartype import beartype
 
 from ml4audio.audio_utils.audio_segmentation_utils import (
@@ -13,12 +13,12 @@ from ml4audio.audio_utils.audio_segmentation_utils import (
 from ml4audio.speaker_tasks.diarization.speaker_diarization_inferencer import (
     SpeakerDiarizationInferencer,
 )
-from ml4audio.speaker_tasks.speaker_embedding_utils import read_sel_from_rttm
 from pyannote.audio import Pipeline
 
 
 @dataclass
 class PyannoteDiarizer(SpeakerDiarizationInferencer):
+    sample_rate: int = 16_000
     pipeline: Pipeline = field(init=False, repr=False)
 
     def _build_self(self) -> Any:
@@ -29,17 +29,19 @@ class PyannoteDiarizer(SpeakerDiarizationInferencer):
 
     @beartype
     def predict(self, s_e_a: StartEndArraysNonOverlap) -> StartEndLabels:
+        """
+        pipeline gets the waveform in memory, no wav- and rttm-files
+        """
         assert len(s_e_a) == 1
-        _, _, array = s_e_a[0]
+        offset, _, array = s_e_a[0]
 
-        with TemporaryDirectory(prefix="/tmp/nemo_tmp_dir") as tmpdir:
-            fileid = "audio"
-            audio_file = f"{tmpdir}/{fileid}.wav"
-            rttm_file = f"{tmpdir}/vad.rttm"
-
-            soundfile.write(audio_file, array, samplerate=16000)
-            diarization = self.pipeline(audio_file)
-            with open(rttm_file, "w") as f:
-                diarization.write_rttm(f)
-
-            return read_sel_from_rttm(str(rttm_file))
+        diarization = self.pipeline(
+            {
+                "waveform": torch.from_numpy(array.astype(np.float32)).unsqueeze(0),
+                "sample_rate": self.sample_rate,
+            }
+        )
+        return [
+            (offset + segment.start, offset + segment.end, label)
+            for segment, _, label in diarization.itertracks(yield_label=True)
+        ]
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+import torch
+from omegaconf import OmegaConf
+
+from speaker_diarization.diarization.nemo_diarizers import NemoVadDiarizer
+
+SAMPLE_RATE = 100
+TURN_DUR = 15.0  # ~20 sub-segments per speaker
+CFG_FILE = str(
+    Path(__file__).parent.parent
+    / "speaker_diarization/diarization/offline_diarization.yaml"
+)
+
+
+class FakeVad:
+    """
+    one vad-segment per speaker-turn
+    """
+
+    sample_rate = SAMPLE_RATE
+
+    def predict(self, audio: np.ndarray):
+        return [[(0.0, TURN_DUR), (TURN_DUR, 2 * TURN_DUR)]]
+
+
+class FakeSpeakerModel:
+    """
+    speaker-embedding is one of two random "voices" (picked by the signal's mean amplitude) plus noise
+    """
+
+    def __init__(self, dim: int = 192):
+        self.generator = torch.Generator().manual_seed(42)
+        self.voices = torch.randn((2, dim), generator=self.generator)
+        self.batch_shapes = []
+
+    def forward(self, input_signal, input_signal_length):
+        self.batch_shapes.append(tuple(input_signal.shape))
+        means = input_signal.abs().sum(dim=1) / input_signal_length
+        voices = self.voices[(means < 0.5).long()]
+        noise = torch.randn(voices.shape, generator=self.generator)
+        return None, voices + 0.5 * noise
+
+
+def test_predict_two_speakers():
+    diarizer = NemoVadDiarizer(nemo_vad=FakeVad(), cfg_file=CFG_FILE)
+    diarizer.cfg = OmegaConf.load(CFG_FILE)
+    diarizer.cfg.batch_size = 4
+    # enhanced speaker-counting (anchor-embeddings) is tuned for real titanet-embeddings
+    diarizer.cfg.diarizer.clustering.parameters.enhanced_count_thres = 0
+    diarizer._speaker_model = FakeSpeakerModel()
+
+    offset = 10.0
+    rng = np.random.default_rng(42)
+    array = np.concatenate(
+        [
+            rng.normal(0.9, 0.05, size=round(TURN_DUR * SAMPLE_RATE)),
+            rng.normal(0.1, 0.05, size=round(TURN_DUR * SAMPLE_RATE)),
+        ]
+    ).astype(np.float32)
+    s_e_l = diarizer.predict([(offset, offset + 2 * TURN_DUR, array)])
+
+    assert len(s_e_l) == 2
+    (s0, e0, first), (s1, e1, second) = s_e_l
+    assert first != second
+    assert s0 == offset and e0 == s1 and e1 == offset + 2 * TURN_DUR
+    assert e0 == offset + TURN_DUR  # speaker-change at the vad-boundary
+    assert all(bs[0] <= 4 for bs in diarizer._speaker_model.batch_shapes)
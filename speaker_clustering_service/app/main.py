@@ -1,10 +1,12 @@
 import json
 import os
+import threading
 from typing import Any, Optional, Dict
 
 import uvicorn
 from beartype.door import is_bearable
 from fastapi import FastAPI, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 from misc_utils.dataclass_utils import (
     encode_dataclass,
 )
@@ -18,6 +20,11 @@ from ml4audio.service_utils.fastapi_utils import (
     read_uploaded_audio_file,
     get_full_model_config,
 )
+from ml4audio.service_utils.response_cache import (
+    ResponseCache,
+    audio_cache_key,
+    hash_config,
+)
 
 DEBUG = os.environ.get("DEBUG", "False").lower() != "false"
 if DEBUG:
@@ -27,6 +34,14 @@ if DEBUG:
 app = FastAPI(debug=DEBUG)
 
 inferencer: Optional[UmascanSpeakerClusterer] = None
+# hash of inferencer's config, part of the response_cache's keys
+config_hash: Optional[str] = None
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 128)),
+    cache_dir=os.environ.get("RESPONSE_CACHE_DIR", None),
+)
+# inferencer runs in a thread-pool (event-loop stays free for uploads and cache-hits), one request at a time
+inference_lock = threading.Lock()
 
 
 SR = 16_000
@@ -64,29 +79,44 @@ async def upload_and_process_audio_file(file: UploadFile, segments: str = Form()
     segments = json.loads(segments)
     is_bearable(segments, list[list[float]])  # TODO: does not type-narrow mypy!
     segments: list[tuple[float, float]] = [(s, e) for s, e in segments]
-    global inferencer
+    global inferencer, config_hash
 
     audio = await read_uploaded_audio_file(file)
 
-    s_e_times = expand_merge_segments(segments, min_gap_dur=0.7, expand_by=0.1)
-    s_e_times = merge_short_segments(s_e_times, min_dur=1.5)
-    s_e_audio = [(s, e, audio[round(s * SR) : round(e * SR)]) for s, e in s_e_times]
-    assert all((len(a) > 1000 for (s, e), a in s_e_audio))
+    def predict() -> list:
+        s_e_times = expand_merge_segments(segments, min_gap_dur=0.7, expand_by=0.1)
+        s_e_times = merge_short_segments(s_e_times, min_dur=1.5)
+        s_e_audio = [(s, e, audio[round(s * SR) : round(e * SR)]) for s, e in s_e_times]
+        assert all((len(a) > 1000 for (s, e), a in s_e_audio))
 
-    s_e_labels, _ = inferencer.predict(s_e_audio)
+        with inference_lock:
+            s_e_labels, _ = inferencer.predict(s_e_audio)
+        return s_e_labels
 
+    key = audio_cache_key(audio, config_hash, json.dumps(segments))
+    s_e_labels = await response_cache.get_or_compute(
+        key, lambda: run_in_threadpool(predict)
+    )
     return _form_response(file, s_e_labels)
 
 
 @app.post("/predict_unsegmented")
 async def upload_and_process_audio_file_unsegmented(file: UploadFile):
     """"""
-    global inferencer
+    global inferencer, config_hash
     assert isinstance(inferencer, UmascanSpeakerClusterer)
     audio = await read_uploaded_audio_file(file)
-    dur = float(len(audio)) / SR
-    s_e_labels, _ = inferencer.predict([((0.0, dur), audio)])
 
+    def predict() -> list:
+        dur = float(len(audio)) / SR
+        with inference_lock:
+            s_e_labels, _ = inferencer.predict([((0.0, dur), audio)])
+        return s_e_labels
+
+    key = audio_cache_key(audio, config_hash, "unsegmented")
+    s_e_labels = await response_cache.get_or_compute(
+        key, lambda: run_in_threadpool(predict)
+    )
     return _form_response(file, s_e_labels)
 
 
@@ -113,9 +143,10 @@ def get_model_config() -> Dict[str, Any]:
 
 @app.on_event("startup")
 def startup_event():
-    global inferencer
+    global inferencer, config_hash
     model_name = "ecapa_tdnn"  # TODO(tilo): try out titanet!
     inferencer = UmascanSpeakerClusterer(model_name=model_name, metric="cosine").build()
+    config_hash = hash_config(get_full_model_config(inferencer))
 
 
 if __name__ == "__main__":
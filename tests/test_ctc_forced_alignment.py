@@ -0,0 +1,78 @@
+import numpy as np
+
+from ml4audio.asr_inference.ctc_forced_alignment import (
+    ctc_align_transcripts,
+    ctc_forced_align,
+    ctc_forced_align_batch,
+)
+
+
+def _viterbi_token_starts(log_probs: np.ndarray, ids: list[int], blank: int):
+    """
+    plain python reference
+    """
+    ext = [blank] + [x for i in ids for x in (i, blank)]
+    num_frames, num_states = len(log_probs), len(ext)
+    scores = np.full((num_frames, num_states), -np.inf)
+    steps = np.zeros((num_frames, num_states), dtype=int)
+    scores[0, :2] = log_probs[0, ext[:2]]
+    for t in range(1, num_frames):
+        for s in range(num_states):
+            can_skip = s >= 2 and ext[s] != blank and ext[s] != ext[s - 2]
+            candidates = [
+                scores[t - 1, s],
+                scores[t - 1, s - 1] if s >= 1 else -np.inf,
+                scores[t - 1, s - 2] if can_skip else -np.inf,
+            ]
+            steps[t, s] = int(np.argmax(candidates))
+            scores[t, s] = candidates[steps[t, s]] + log_probs[t, ext[s]]
+    s = num_states - 1 if scores[-1, -1] >= scores[-1, -2] else num_states - 2
+    path = []
+    for t in range(num_frames - 1, -1, -1):
+        path.append(s)
+        s -= steps[t, s]
+    path = np.array(path[::-1])
+    return np.flatnonzero((path % 2 == 1) & np.diff(path, prepend=-1).astype(bool))
+
+
+def test_ctc_forced_align_batch_same_as_reference():
+    rng = np.random.default_rng(42)
+    log_probs, token_ids = [], []
+    for _ in range(20):
+        num_frames = int(rng.integers(5, 30))
+        num_tokens = int(rng.integers(1, num_frames // 2))
+        log_probs.append(rng.normal(size=(num_frames, 5)).astype(np.float32) * 3)
+        token_ids.append([int(i) for i in rng.integers(1, 5, num_tokens)])
+    log_probs = [x - np.logaddexp.reduce(x, axis=1, keepdims=True) for x in log_probs]
+
+    aligned = ctc_forced_align_batch(log_probs, token_ids, blank_idx=0)
+    for x, ids, starts in zip(log_probs, token_ids, aligned):
+        assert np.array_equal(starts, _viterbi_token_starts(x, ids, blank=0))
+
+
+def test_banded_alignment():
+    rng = np.random.default_rng(42)
+    num_frames, num_tokens = 3000, 1000
+    ids = [int(i) for i in rng.integers(1, 30, num_tokens)]
+    starts = np.sort(rng.choice(num_frames, num_tokens, replace=False))
+    labels = np.zeros(num_frames, dtype=int)
+    labels[starts] = ids
+    logits = rng.normal(size=(num_frames, 30)).astype(np.float32)
+    logits[np.arange(num_frames), labels] += 6.0
+
+    full = ctc_forced_align(logits, ids, blank_idx=0)
+    banded = ctc_forced_align(logits, ids, blank_idx=0, band_width=300)
+    assert np.array_equal(full, banded)
+    assert np.mean(full == starts) > 0.95
+
+
+def test_ctc_align_transcripts():
+    vocab = ["<pad>", "|", "A", "B", "L"]
+    frames = [0, 2, 0, 4, 0, 0, 4, 1, 3, 0]  # "ALL B" with blanks
+    logits = np.full((len(frames), len(vocab)), -5.0, dtype=np.float32)
+    logits[np.arange(len(frames)), frames] = 5.0
+    letters = ctc_align_transcripts(
+        [logits], ["ALL B"], [1.0], vocab=vocab, blank_idx=0
+    )[0]
+    assert letters.letters == "ALL B"
+    assert np.allclose(letters.timestamps, [0.1, 0.3, 0.6, 0.7, 0.8])
@@ -0,0 +1,48 @@
+import numpy as np
+
+from huggingface_wav2vec2_finetuning.feature_cache import (
+    FeatureCacheShard,
+    hash_cache_config,
+)
+
+
+def write_shard(shard: FeatureCacheShard, samples: list[tuple[np.ndarray, list]]):
+    shard.start_writing()
+    for values, labels in samples:
+        shard.write(values, labels)
+    shard.finish_writing()
+
+
+def test_feature_cache_shard(tmp_path):
+    config = {"dataset": {"limit": 10, "start_offset": 0}, "vocab": {"a": 0, "b": 1}}
+    config_hash = hash_cache_config(config)
+    shard_dir = str(tmp_path / "rank0-worker0-of-1")
+    samples = [
+        (np.linspace(-1, 1, 100, dtype=np.float32), [0, 1, 1]),
+        (np.ones(50, dtype=np.float32), [1]),
+    ]
+
+    shard = FeatureCacheShard(
+        shard_dir, values_are_features=True, config_hash=config_hash
+    )
+    assert not shard.is_complete
+    write_shard(shard, samples)
+    assert shard.is_complete
+
+    read = list(shard.read())
+    assert len(read) == len(samples)
+    for (values, labels), (values_read, labels_read) in zip(samples, read):
+        assert np.allclose(values, values_read, atol=1e-3)
+        assert labels == labels_read.tolist()
+
+    changed_configs = [
+        config | {"dataset": {"limit": 20, "start_offset": 0}},
+        config | {"vocab": {"a": 0, "b": 1, "c": 2}},
+    ]
+    for changed in changed_configs:
+        assert not FeatureCacheShard(
+            shard_dir, values_are_features=True, config_hash=hash_cache_config(changed)
+        ).is_complete
+    assert not FeatureCacheShard(
+        shard_dir, values_are_features=False, config_hash=config_hash
+    ).is_complete
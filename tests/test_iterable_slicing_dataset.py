@@ -0,0 +1,125 @@
+import random
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterator
+
+import numpy as np
+import pytest
+import torch
+
+from huggingface_wav2vec2_finetuning.feature_cache import FeatureCacheShard
+from huggingface_wav2vec2_finetuning.stream_ftdataset import (
+    IterableSlicingDataset,
+    calc_this_workers_shard,
+)
+from ml4audio.audio_utils.audio_data_models import AudioTextData, ArrayText
+
+WORLD_SIZE = 2
+NUM_WORKERS = 3
+
+
+@dataclass
+class CountingCorpus(AudioTextData):
+    """
+    k-th sample is a one-sample array with value k
+    """
+
+    sample_rate: int = 16_000
+
+    @property
+    def name(self) -> str:
+        return "counting-corpus"
+
+    def __iter__(self) -> Iterator[ArrayText]:
+        k = 0
+        while True:
+            yield np.array([float(k)], dtype=np.float32), f"text {k}"
+            k += 1
+
+
+def set_worker(monkeypatch, worker_id: int):
+    monkeypatch.setattr(
+        torch.utils.data,
+        "get_worker_info",
+        lambda: SimpleNamespace(num_workers=NUM_WORKERS, id=worker_id),
+    )
+
+
+def test_calc_this_workers_shard(monkeypatch):
+    shards = []
+    for rank in range(WORLD_SIZE):
+        for worker_id in range(NUM_WORKERS):
+            set_worker(monkeypatch, worker_id)
+            shard_idx, num_shards = calc_this_workers_shard(rank, WORLD_SIZE)
+            assert num_shards == WORLD_SIZE * NUM_WORKERS
+            assert shard_idx % WORLD_SIZE == rank
+            shards.append(shard_idx)
+    assert sorted(shards) == list(range(WORLD_SIZE * NUM_WORKERS))
+
+
+@pytest.mark.parametrize("start_offset", [0, 7])
+def test_shards_cover_stream(monkeypatch, start_offset):
+    limit = 50
+    monkeypatch.setenv("WORLD_SIZE", str(WORLD_SIZE))
+    all_samples = []
+    for rank in range(WORLD_SIZE):
+        monkeypatch.setenv("RANK", str(rank))
+        dataset = IterableSlicingDataset(
+            array_texts=CountingCorpus(), limit=limit, start_offset=start_offset
+        )
+        rank_samples = []
+        for worker_id in range(NUM_WORKERS):
+            set_worker(monkeypatch, worker_id)
+            rank_samples += [
+                int(array[0]) for array, _ in dataset._generate_array_texts()
+            ]
+        assert len(rank_samples) == len(dataset)
+        all_samples += rank_samples
+
+    assert sorted(all_samples) == list(range(start_offset, limit))
+
+
+def test_no_sharding_over_ranks(monkeypatch):
+    monkeypatch.setenv("WORLD_SIZE", str(WORLD_SIZE))
+    monkeypatch.setenv("RANK", "1")
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: None)
+    dataset = IterableSlicingDataset(
+        array_texts=CountingCorpus(), limit=10, shard_over_ranks=False
+    )
+    samples = [int(array[0]) for array, _ in dataset._generate_array_texts()]
+    assert samples == list(range(10)) and len(dataset) == 10
+
+
+def cached_dataset(monkeypatch, cache_dir: str, **kwargs) -> IterableSlicingDataset:
+    dataset = IterableSlicingDataset(
+        array_texts=CountingCorpus(), limit=20, feature_cache_dir=cache_dir, **kwargs
+    )
+    monkeypatch.setattr(dataset, "_cache_config_hash", lambda: "config-hash")
+    return dataset
+
+
+def test_cache_shard_per_global_rank(monkeypatch, tmp_path):
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: None)
+    monkeypatch.setenv("LOCAL_RANK", "0")  # every node has a local_rank 0
+    monkeypatch.setenv("WORLD_SIZE", "4")
+    shard_dirs = set()
+    for rank in [0, 2]:
+        monkeypatch.setenv("RANK", str(rank))
+        dataset = cached_dataset(monkeypatch, str(tmp_path))
+        shard_dirs.add(dataset._get_cache_shard().shard_dir)
+    assert len(shard_dirs) == 2
+    assert str(tmp_path / "rank2-of-4-worker0-of-1-config-hash") in shard_dirs
+
+
+def test_cached_samples_get_shuffled(monkeypatch, tmp_path):
+    monkeypatch.setattr(torch.utils.data, "get_worker_info", lambda: None)
+    dataset = cached_dataset(monkeypatch, str(tmp_path), shufflebuffer_size=8)
+    shard: FeatureCacheShard = dataset._get_cache_shard()
+    shard.start_writing()
+    for k in range(20):
+        shard.write(np.full(3, k, dtype=np.float32), [k])
+    shard.finish_writing()
+
+    random.seed(42)
+    labels = [sample["labels"][0] for sample in dataset._generate_samples(0)]
+    assert sorted(labels) == list(range(20)) and labels != list(range(20))
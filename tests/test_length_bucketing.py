@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from huggingface_wav2vec2_finetuning.length_bucketing import (
+    PaddingEfficiency,
+    _cut_into_batches,
+    bucket_by_length,
+)
+
+
+def make_samples(lengths: list[int]) -> list[dict]:
+    return [{"input_values": [0.0] * l, "idx": k} for k, l in enumerate(lengths)]
+
+
+def test_cut_into_batches():
+    samples = make_samples([1, 2, 3, 4, 10, 30])
+    batches = _cut_into_batches(samples, max_batch_frames=16, length_key="input_values")
+    assert [[s["idx"] for s in b] for b in batches] == [[0, 1, 2, 3], [4], [5]]
+
+    batches = _cut_into_batches(
+        samples, max_batch_frames=16, length_key="input_values", max_batch_size=3
+    )
+    assert [[s["idx"] for s in b] for b in batches] == [[0, 1, 2], [3], [4], [5]]
+
+
+@pytest.mark.parametrize("buffer_size", [1, 7, 1000])
+def test_bucket_by_length(buffer_size):
+    random.seed(42)
+    lengths = [random.randint(1, 50) for _ in range(200)] + [120]
+    max_batch_frames = 100
+    stats = PaddingEfficiency()
+    batches = list(
+        bucket_by_length(
+            make_samples(lengths),
+            max_batch_frames=max_batch_frames,
+            buffer_size=buffer_size,
+            stats=stats,
+        )
+    )
+
+    for batch in batches:
+        batch_lengths = [len(s["input_values"]) for s in batch]
+        # only a single too long sample may exceed the limit
+        assert len(batch) * max(batch_lengths) <= max_batch_frames or len(batch) == 1
+    yielded = sorted(s["idx"] for batch in batches for s in batch)
+    assert yielded == list(range(len(lengths)))
+
+    assert stats.num_batches == len(batches)
+    assert stats.num_samples == len(lengths)
+    assert stats.signal_frames == sum(lengths)
+    assert stats.padded_frames == sum(
+        len(b) * max(len(s["input_values"]) for s in b) for b in batches
+    )
+    if buffer_size == 1:
+        assert stats.efficiency == 1.0 and stats.avg_batch_size == 1.0
+    else:
+        assert 0.0 < stats.efficiency <= 1.0 and stats.avg_batch_size > 1.0
+
+
+def test_padding_efficiency():
+    stats = PaddingEfficiency()
+    assert stats.efficiency == 0.0 and stats.avg_batch_size == 0.0
+    stats.update([2, 4])
+    stats.update([3])
+    assert stats.efficiency == 9 / 11
+    assert stats.avg_batch_size == 1.5
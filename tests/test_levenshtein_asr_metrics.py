@@ -0,0 +1,47 @@
+import random
+
+import jiwer
+
+from ml4audio.text_processing.asr_metrics import micro_avg_asr_scores
+from ml4audio.text_processing.levenshtein_asr_metrics import (
+    character_levenshtein_counts,
+    micro_avg_asr_scores_fast,
+    word_levenshtein_counts,
+)
+
+
+def _random_text(rng: random.Random) -> str:
+    words = ["a", "b", "ab", "ba", "äb", "c"]
+    seps = [" ", " ", " ", "  ", "\t", "\n "]
+    num_words = rng.randint(0, 8)
+    return "".join(rng.choice(seps) + rng.choice(words) for _ in range(num_words))
+
+
+def _random_refs_hyps(num: int = 500) -> list[tuple[str, str]]:
+    rng = random.Random(42)
+    refs_hyps = [("x", ""), ("a b", "a b"), (" a\tb ", "a b")]
+    while len(refs_hyps) < num:
+        ref = _random_text(rng)
+        if len(ref.strip()) > 0:
+            refs_hyps.append((ref, _random_text(rng)))
+    return refs_hyps
+
+
+def test_counts_same_as_jiwer():
+    refs, hyps = [list(x) for x in zip(*_random_refs_hyps())]
+    words = word_levenshtein_counts(refs, hyps)
+    chars = character_levenshtein_counts(refs, hyps)
+    for k, (ref, hyp) in enumerate(zip(refs, hyps)):
+        for counts, o in [
+            (words, jiwer.process_words(ref, hyp)),
+            (chars, jiwer.process_characters(ref, hyp)),
+        ]:
+            assert counts.hits[k] == o.hits
+            assert counts.substitutions[k] == o.substitutions
+            assert counts.insertions[k] == o.insertions
+            assert counts.deletions[k] == o.deletions
+
+
+def test_micro_avg_asr_scores_fast():
+    refs_hyps = _random_refs_hyps()
+    assert micro_avg_asr_scores_fast(refs_hyps) == micro_avg_asr_scores(refs_hyps)
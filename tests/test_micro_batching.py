@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from nemo_punctuation_capitalization.punctcap_service.micro_batching import (
+    MicroBatcher,
+)
+
+
+def upper(texts: list[str]) -> list[str]:
+    if "fail" in texts:
+        raise ValueError("fail")
+    return [t.upper() for t in texts]
+
+
+def slow_upper(texts: list[str]) -> list[str]:
+    time.sleep(0.1)
+    return upper(texts)
+
+
+def run_with_batcher(batcher: MicroBatcher, client) -> list:
+    async def main():
+        batcher.start()
+        try:
+            return await client(batcher)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_token_budget_and_carry_over():
+    batcher = MicroBatcher(predict_fn=upper, max_tokens=4, max_wait=0.1)
+
+    async def client(batcher):
+        return await asyncio.gather(
+            batcher.process(["a b", "c"]),
+            batcher.process(["d e"]),  # exceeds the budget -> opens the next batch
+            batcher.process(["f"]),
+            batcher.process(["g h i j k"]),  # too large for any batch -> one of its own
+        )
+
+    responses = run_with_batcher(batcher, client)
+    assert responses == [["A B", "C"], ["D E"], ["F"], ["G H I J K"]]
+    assert batcher.batch_sizes == [2, 2, 1]  # number of texts per batch
+
+
+def test_max_wait():
+    batcher = MicroBatcher(predict_fn=upper, max_tokens=100, max_wait=0.05)
+
+    async def client(batcher):
+        start = time.perf_counter()
+        first = await batcher.process(["a"])
+        latency = time.perf_counter() - start
+        second = await batcher.process(["b"])
+        return first, second, latency
+
+    first, second, latency = run_with_batcher(batcher, client)
+    assert (first, second) == (["A"], ["B"])
+    assert latency < 0.5  # batch was closed by the deadline, not by the token-budget
+    assert batcher.batch_sizes == [1, 1]
+
+
+def test_exception_reaches_every_request_of_the_batch():
+    batcher = MicroBatcher(predict_fn=upper, max_tokens=100, max_wait=0.1)
+
+    async def client(batcher):
+        failed = await asyncio.gather(
+            batcher.process(["a"]), batcher.process(["fail"]), return_exceptions=True
+        )
+        return failed, await batcher.process(["b"])
+
+    failed, after = run_with_batcher(batcher, client)
+    assert all(isinstance(e, ValueError) for e in failed) and len(failed) == 2
+    assert after == ["B"]  # batching-loop survived
+
+
+def test_cancelled_client():
+    batcher = MicroBatcher(predict_fn=slow_upper, max_tokens=100, max_wait=0.01)
+
+    async def client(batcher):
+        gone = asyncio.create_task(batcher.process(["a"]))
+        staying = asyncio.create_task(batcher.process(["b"]))
+        await asyncio.sleep(0.05)  # both are being predicted
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return await staying, await batcher.process(["c"])
+
+    staying, after = run_with_batcher(batcher, client)
+    assert staying == ["B"] and after == ["C"]
+    assert batcher.batch_sizes == [2, 1]
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+from ml4audio.service_utils import model_registry
+from ml4audio.service_utils.model_registry import ModelRegistry
+
+GB = 1024**3
+
+
+NUM_BUILDS = 0
+
+
+@dataclass
+class FakeModel:
+    model_file: str
+    is_built: bool = False
+
+    def build(self):
+        global NUM_BUILDS
+        NUM_BUILDS += 1
+        self.is_built = True
+        return self
+
+
+def test_model_registry(monkeypatch):
+    registry = ModelRegistry(
+        models={
+            "de": FakeModel("german.bin"),
+            "en": FakeModel("english.bin"),
+            "es": FakeModel("spanish.bin"),
+            "ur": FakeModel("multilingual.bin"),
+            "ru": FakeModel("multilingual.bin"),
+        },
+        rss_budget=2 * GB,
+    )
+    # every loaded model costs 1GB, evicting it does not give anything back to the OS
+    monkeypatch.setattr(
+        model_registry,
+        "process_memory_usage",
+        lambda: {"Rss": NUM_BUILDS * GB},
+    )
+
+    de = registry.get("de")
+    assert de.is_built and de.model_file == "german.bin"
+    assert not registry.models["de"].is_built
+    assert registry.get("de") is de
+
+    assert registry.get("ur") is registry.get("ru")  # same config -> same model
+    assert registry.loaded == ["de", "ur", "ru"]
+    assert registry.loads == 2 and registry.evictions == 0
+    assert registry.accounted_rss == 2 * GB
+
+    registry.get("de")  # de is now the most recently used one
+    registry.get("en")
+    assert registry.loaded == ["de", "en"]
+    assert registry.evictions == 1
+    assert registry.get("ru") is not None and registry.loads == 4
+    assert registry.loaded == ["en", "ur", "ru"]
+
+
+def test_one_lock_per_built_model():
+    registry = ModelRegistry(
+        models={
+            "de": FakeModel("german.bin"),
+            "ur": FakeModel("multilingual.bin"),
+            "ru": FakeModel("multilingual.bin"),
+        },
+    )
+    with registry.use("ur") as model:
+        assert model is registry.get("ru")
+        ru_lock = registry._model_locks[registry.config_hash("ru")]
+        assert ru_lock.locked()  # same config -> same model -> same lock
+        with registry.use("de") as de:  # other models are not blocked
+            assert de.model_file == "german.bin"
+    assert not ru_lock.locked()
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from nemo_language_classification.nemo_lang_clf import NemoLangClf, StreamingLangClf
+
+LABELS = ["de", "en"]
+
+
+class FakeLangClfModel:
+    """
+    "en"-logit is the signal's mean amplitude (times 10), "de"-logit is always 0
+    """
+
+    def __init__(self):
+        self.cfg = SimpleNamespace(train_ds=SimpleNamespace(labels=LABELS))
+        self.batch_shapes = []
+
+    def forward(self, input_signal, input_signal_length):
+        self.batch_shapes.append(tuple(input_signal.shape))
+        means = input_signal.abs().sum(dim=1) / input_signal_length
+        logits = torch.stack([torch.zeros_like(means), 10 * means], dim=1)
+        return logits, None
+
+
+def fake_lang_clf(max_batch_size: int = 16) -> NemoLangClf:
+    lang_clf = NemoLangClf(model_file="fake.nemo", max_batch_size=max_batch_size)
+    lang_clf.model = FakeLangClfModel()
+    return lang_clf
+
+
+def signal(num_samples: int, amplitude: float) -> np.ndarray:
+    return np.full(num_samples, int(amplitude * 32767), dtype=np.int16)
+
+
+def test_predict_log_probs_restores_order():
+    lang_clf = fake_lang_clf(max_batch_size=2)
+    lengths_amplitudes = [(30, 0.1), (50, 0.5), (10, 0.0), (40, 0.3), (20, 0.9)]
+    arrays = [signal(l, a) for l, a in lengths_amplitudes]
+
+    log_probs = lang_clf.predict_log_probs(arrays)
+
+    # longest first, batch-wise padded to their longest
+    assert lang_clf.model.batch_shapes == [(2, 50), (2, 30), (1, 10)]
+    for (_, amplitude), lp in zip(lengths_amplitudes, log_probs):
+        expected = torch.log_softmax(torch.tensor([0.0, 10 * amplitude]), dim=0)
+        assert np.allclose(lp, expected.numpy(), atol=1e-3)
+
+
+def test_streaming_lang_clf_stops_early():
+    lang_clf = fake_lang_clf()
+    streaming = StreamingLangClf(
+        lang_clf=lang_clf, sample_rate=10, chunk_duration=1.0, min_chunks=2
+    )
+    streaming.reset()
+
+    labels = [streaming.handle_audio(signal(5, 0.9)) for _ in range(10)]
+
+    # first chunk is confident already, but min_chunks=2
+    assert labels[:3] == [None] * 3 and set(labels[3:]) == {"en"}
+    assert streaming.num_chunks == 2
+    assert len(lang_clf.model.batch_shapes) == 2  # no forward-passes after decision
+
+
+def test_streaming_lang_clf_end_of_signal():
+    lang_clf = fake_lang_clf()
+    streaming = StreamingLangClf(
+        lang_clf=lang_clf,
+        sample_rate=10,
+        chunk_duration=1.0,
+        min_chunk_duration=0.5,
+        threshold=0.999,
+    )
+    streaming.reset()
+    # one full chunk + a remainder that is long enough to be classified
+    assert streaming.handle_audio(signal(16, 0.01), end_of_signal=True) == "en"
+    assert streaming.num_chunks == 2
+    assert lang_clf.model.batch_shapes == [(2, 10)]
+
+    streaming.reset()
+    # remainder is too short -> ignored, undecided since there was no chunk at all
+    assert streaming.handle_audio(signal(4, 0.9), end_of_signal=True) is None
+    assert streaming.num_chunks == 0
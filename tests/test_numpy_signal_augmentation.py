@@ -0,0 +1,29 @@
+import numpy as np
+
+from ml4audio.audio_data.numpy_signal_augmentation import (
+    RandomSignalAugmentation,
+    add_noise_at_snr,
+    build_dynamic_noise,
+)
+
+
+def test_dynamic_noise_at_snr():
+    sr = 16000
+    signal = (0.3 * np.sin(np.linspace(0, 2000 * np.pi, 3 * sr))).astype(np.float32)
+    noise = build_dynamic_noise(len(signal), sr, np.random.default_rng(0))
+    noisy = add_noise_at_snr(signal, noise, snr_db=10.0)
+    snr = 10 * np.log10(np.mean(signal**2) / np.mean((noisy - signal) ** 2))
+    assert abs(snr - 10.0) < 1e-3
+
+
+def test_augment_batch_is_reproducible():
+    sr = 16000
+    rng = np.random.default_rng(1)
+    signals = [
+        (0.1 * rng.standard_normal(k * sr)).astype(np.float32) for k in [1, 2, 3]
+    ]
+    augmentation = RandomSignalAugmentation(transcode_proba=0.5)
+    first = augmentation.augment_batch(signals, sr, seed=42)
+    second = augmentation.augment_batch(signals, sr, seed=42)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+    assert all(a.dtype == np.float32 and np.max(np.abs(a)) <= 1.0 for a in first)
@@ -0,0 +1,25 @@
+import itertools
+import time
+
+from ml4audio.utils.process_pool import imap_ordered_in_process_pool
+
+
+def test_imap_ordered_in_process_pool():
+    jobs = [-k for k in range(100)]
+    results = list(imap_ordered_in_process_pool(abs, jobs, num_workers=3, prefetch=8))
+    assert results == list(range(100))
+
+    first_ones = itertools.islice(
+        imap_ordered_in_process_pool(abs, jobs, num_workers=2, prefetch=4), 0, 5
+    )
+    assert list(first_ones) == [0, 1, 2, 3, 4]
+
+
+def test_early_stop_does_not_wait_for_running_jobs():
+    start = time.perf_counter()
+    results = imap_ordered_in_process_pool(
+        time.sleep, [0.0, 3.0, 3.0], num_workers=3, prefetch=3
+    )
+    assert next(results) is None
+    results.close()
+    assert time.perf_counter() - start < 2.0
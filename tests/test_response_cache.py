@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ml4audio.service_utils.response_cache import (
+    ResponseCache,
+    audio_cache_key,
+    hash_config,
+)
+
+
+def test_audio_cache_key():
+    audio = np.arange(16_000, dtype=np.float32)
+    config_hash = hash_config({"model": "foo", "beam_size": 100})
+    key = audio_cache_key(audio, config_hash)
+    assert key == audio_cache_key(audio.copy(), config_hash)
+    assert key != audio_cache_key(audio[:-1], config_hash)
+    assert key != audio_cache_key(audio, hash_config({"model": "bar"}))
+    assert key != audio_cache_key(audio, config_hash, "[[0.0, 1.0]]")
+
+
+def test_lru_and_disk_tier(tmp_path):
+    cache = ResponseCache(max_entries=2, cache_dir=str(tmp_path))
+    for k in range(3):
+        cache.put(f"key-{k}", {"text": f"transcript-{k}"})
+    assert list(cache._lru.keys()) == ["key-1", "key-2"]
+
+    restarted = ResponseCache(max_entries=2, cache_dir=str(tmp_path))
+    assert restarted.get("key-0") == {"text": "transcript-0"}
+    assert ResponseCache(max_entries=2).get("key-0") is None
+
+
+def test_single_flight():
+    cache = ResponseCache()
+    num_computations = 0
+
+    async def compute():
+        nonlocal num_computations
+        num_computations += 1
+        await asyncio.sleep(0.01)
+        return {"text": "hello"}
+
+    async def concurrent_requests():
+        return await asyncio.gather(
+            *(cache.get_or_compute("same-audio", compute) for _ in range(5))
+        )
+
+    responses = asyncio.run(concurrent_requests())
+    assert responses == [{"text": "hello"}] * 5
+    assert num_computations == 1
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_cancelled_computation_is_retried_by_a_waiter():
+    cache = ResponseCache()
+    num_computations = 0
+
+    async def compute():
+        nonlocal num_computations
+        num_computations += 1
+        await asyncio.sleep(0.05)
+        return {"text": "hello"}
+
+    async def first_client_disconnects():
+        first = asyncio.create_task(cache.get_or_compute("same-audio", compute))
+        await asyncio.sleep(0.01)
+        waiting = [
+            asyncio.create_task(cache.get_or_compute("same-audio", compute))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await asyncio.wait_for(asyncio.gather(*waiting), timeout=1.0)
+
+    responses = asyncio.run(first_client_disconnects())
+    assert responses == [{"text": "hello"}] * 2
+    assert num_computations == 2  # one of the waiters took over
+    assert cache._in_flight == {}
+
+
+def test_get_or_compute_with_disk_tier(tmp_path):
+    async def compute():
+        return {"text": "hello"}
+
+    async def not_computing():
+        raise AssertionError("should have been read from disk")
+
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    assert asyncio.run(cache.get_or_compute("key", compute)) == {"text": "hello"}
+    restarted = ResponseCache(cache_dir=str(tmp_path))
+    assert asyncio.run(restarted.get_or_compute("key", not_computing)) == {
+        "text": "hello"
+    }
+    assert (restarted.hits, restarted.misses) == (1, 0)
@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from ml4audio.asr_inference.streaming_benchmark import (
+    StreamingSession,
+    run_streaming_benchmark,
+)
+from ml4audio.audio_utils.audio_io import AudioMessageChunk
+
+
+@dataclass
+class EchoSession(StreamingSession):
+    """
+    emits the end of every chunk right away
+    """
+
+    sample_rate: int = 16_000
+
+    def handle(self, chunk: AudioMessageChunk) -> list[float]:
+        return [(chunk.frame_idx + len(chunk.array)) / self.sample_rate]
+
+
+def test_run_streaming_benchmark():
+    signals = [np.zeros(16_000, dtype=np.float32), np.zeros(8_000, dtype=np.float32)]
+    report = run_streaming_benchmark(
+        EchoSession, signals, num_sessions=3, chunk_duration=0.1, speed=10.0
+    )
+    summary = report.summary()
+    assert summary["num_sessions"] == 3
+    assert summary["num_emits"] == 10 + 5 + 10
+    assert 0.0 <= summary["emit_latency_p50"] < 0.05
+    assert [s.audio_seconds for s in report.sessions] == [1.0, 0.5, 1.0]
+    assert report.max_rss > 0
@@ -0,0 +1,82 @@
+import threading
+
+from ml4audio.service_utils import streaming_metrics
+from ml4audio.service_utils.streaming_metrics import (
+    NO_TIMING,
+    StreamingMetrics,
+    disable_streaming_metrics,
+    enable_streaming_metrics,
+    timed_iterable,
+    timed_stage,
+)
+
+
+def test_disabled_metrics_cost_nothing():
+    disable_streaming_metrics()
+    numbers = [1, 2, 3]
+    assert timed_iterable("chunking", numbers) is numbers
+    assert timed_stage("decoding") is NO_TIMING
+
+
+def test_streaming_metrics():
+    metrics = enable_streaming_metrics()
+    try:
+        assert list(timed_iterable("chunking", range(3))) == [0, 1, 2]
+        with timed_stage("decoding"):
+            pass
+        metrics.observe_audio("session-1", 2.0)
+        metrics.observe_compute("session-1", 0.5)
+        metrics.observe_emit("session-1", audio_end=0.0)
+        metrics.count("no_new_suffix")
+
+        assert metrics.stages["chunking"].calls == 4  # last one raises StopIteration
+        assert metrics.stages["decoding"].calls == 1
+        assert metrics.sessions["session-1"].real_time_factor == 0.25
+        prometheus = metrics.to_prometheus()
+        assert 'asr_streaming_events_total{event="no_new_suffix"} 1' in prometheus
+        assert 'asr_streaming_emit_latency_seconds_bucket{le="+Inf"} 1' in prometheus
+        assert (
+            'asr_streaming_session_real_time_factor{session="session-1"} 0.25'
+            in prometheus
+        )
+
+        metrics.finish_session("session-1")
+        assert "session-1" not in metrics.to_prometheus()
+    finally:
+        disable_streaming_metrics()
+
+
+def test_idle_sessions_are_dropped(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(streaming_metrics.time, "perf_counter", lambda: now[0])
+    metrics = StreamingMetrics(max_idle_seconds=10.0)
+    metrics.observe_audio("gone", 1.0)  # never sends end_of_signal
+    metrics.observe_audio("active", 1.0)
+    now[0] = 8.0
+    metrics.observe_audio("active", 1.0)
+    now[0] = 12.0
+    metrics.observe_audio("new", 1.0)
+    assert set(metrics.sessions) == {"active", "new"}
+    now[0] = 30.0
+    assert "asr_streaming_dropped_sessions_total 3" in metrics.to_prometheus()
+    assert len(metrics.sessions) == 0
+    assert metrics.audio_seconds == 4.0  # totals keep the dropped sessions' audio
+
+
+def test_concurrent_updates():
+    metrics = StreamingMetrics()
+
+    def session(k: int):
+        for _ in range(1000):
+            metrics.observe_audio(f"session-{k}", 0.1)
+            metrics.count("chunks")
+        metrics.finish_session(f"session-{k}")
+
+    threads = [threading.Thread(target=session, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert metrics.events["chunks"] == 8000
+    assert abs(metrics.audio_seconds - 800.0) < 1e-6
+    assert metrics.finished_sessions == 8 and len(metrics.sessions) == 0
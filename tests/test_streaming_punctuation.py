@@ -0,0 +1,98 @@
+import numpy as np
+
+from ml4audio.asr_inference.streaming_punctuation import (
+    StreamingPunctuator,
+    align_punctuated_word,
+)
+from ml4audio.asr_inference.transcript_glueing import accumulate_transcript_suffixes
+from ml4audio.audio_utils.aligned_transcript import TimestampedLetters
+
+WORDS = "hello world this is a test stop the next sentence starts here stop and one more stop".split()
+
+
+class FakePunctCap:
+    """
+    a sentence ends after "stop", first word of a text and of a sentence is capitalized
+    """
+
+    def __init__(self):
+        self.num_words = []
+
+    def __call__(self, texts: list[str]) -> list[str]:
+        return [self._punctcap(text) for text in texts]
+
+    def _punctcap(self, text: str) -> str:
+        words = text.split()
+        self.num_words.append(len(words))
+        out = []
+        for k, w in enumerate(words):
+            if k == 0 or words[k - 1] == "stop":
+                w = w.capitalize()
+            out.append(f"{w}." if w.lower() == "stop" else w)
+        return " ".join(out)
+
+
+def asr_suffixes() -> list[TimestampedLetters]:
+    """
+    upper-cased like an asr-model would output them, every suffix revises the last word of the previous one
+    """
+    letters = " ".join(WORDS).upper()
+    timestamps = np.arange(len(letters)) * 0.05
+    word_starts = [k for k in range(len(letters)) if k == 0 or letters[k - 1] == " "]
+    suffixes = []
+    for k in range(1, len(word_starts)):
+        start = word_starts[max(0, k - 2)]
+        end = word_starts[k + 1] - 1 if k + 1 < len(word_starts) else len(letters)
+        if start > 0:
+            start -= 1  # leading space
+        suffixes.append(TimestampedLetters(letters[start:end], timestamps[start:end]))
+    return suffixes
+
+
+def test_streaming_punctuator():
+    punctcap = FakePunctCap()
+    punctuator = StreamingPunctuator(punctcap_fn=punctcap, context_words=5, lookahead=2)
+    punctuator.reset()
+    suffixes = asr_suffixes()
+    outputs = [
+        punctuator.handle_transcript_suffix(s, end_of_message=k == len(suffixes) - 1)
+        for k, s in enumerate(suffixes)
+    ]
+    transcript = accumulate_transcript_suffixes(outputs)
+    assert transcript.letters == FakePunctCap()([" ".join(WORDS)])[0]
+    assert max(punctcap.num_words) <= 5 + 2 + 2  # context + lookahead + new words
+
+
+def test_align_punctuated_word():
+    word = TimestampedLetters("HELLO", np.array([1.0, 1.1, 1.2, 1.3, 1.4]))
+    timestamps = align_punctuated_word("Hello,", word)
+    assert np.allclose(timestamps, [1.0, 1.1, 1.2, 1.3, 1.4, 1.4])
+
+
+def timestamped(letters: str, start: float) -> TimestampedLetters:
+    return TimestampedLetters(letters, start + np.arange(len(letters)) * 0.1)
+
+
+def test_revision_beyond_context_window():
+    punctuator = StreamingPunctuator(
+        punctcap_fn=lambda texts: texts, context_words=1, lookahead=1
+    )
+    punctuator.reset()
+    first = timestamped("aa bb cc dd", 0.0)
+    # revises from the third word on, only "cc" is still in the context-window
+    revision = timestamped(" xx yy zz", float(first.timestamps[5]))
+    outputs = [
+        punctuator.handle_transcript_suffix(first),
+        punctuator.handle_transcript_suffix(revision, end_of_message=True),
+    ]
+    assert accumulate_transcript_suffixes(outputs).letters == "aa bb xx yy zz"
+
+
+def test_no_context_words():
+    punctcap = FakePunctCap()
+    punctuator = StreamingPunctuator(punctcap_fn=punctcap, context_words=0, lookahead=2)
+    punctuator.reset()
+    for s in asr_suffixes():
+        punctuator.handle_transcript_suffix(s)
+    assert len(punctuator._final) == 0
+    assert max(punctcap.num_words) <= 2 + 2  # lookahead + new words
@@ -0,0 +1,44 @@
+import numpy as np
+
+from ml4audio.audio_utils.overlap_array_chunker import OverlapArrayChunker
+from ml4audio.audio_utils.audio_io import (
+    audio_messages_from_chunks,
+    break_array_into_chunks,
+)
+from ml4audio.audio_utils.streaming_vad_gate import StreamingVADGate
+
+SR = 16_000
+
+
+class EnergyVAD:
+    frame_duration = 0.1
+
+    def reset(self):
+        pass
+
+    def is_speech(self, frame):
+        return bool(np.max(np.abs(frame)) > 1000)
+
+
+def test_streaming_vad_gate():
+    silence = np.zeros(3 * SR, dtype=np.float32)
+    speech = np.full(2 * SR, 0.5, dtype=np.float32)
+    signal = np.concatenate([silence, speech, silence])
+
+    gate = StreamingVADGate(vad=EnergyVAD(), sample_rate=SR, padding=0.3).build()
+    chunker = OverlapArrayChunker(chunk_size=2 * SR, min_step_size=SR)
+    chunker.reset()
+
+    transcribed = []
+    for inpt in audio_messages_from_chunks(
+        "test", break_array_into_chunks(signal, int(0.1 * SR))
+    ):
+        gate.handle_audio(inpt.array, inpt.end_of_signal)
+        for chunk in chunker.handle_datum(inpt):
+            if not gate.is_silence(chunk.frame_idx, len(chunk.array)):
+                transcribed.append(chunk.frame_idx / SR)
+
+    # speech is from 3.0 to 5.0 seconds, the chunk starting at 5.0 still gets it via padding
+    assert transcribed == [2.0, 3.0, 4.0, 5.0]
+    # chunks 0-2, 1-3 and 6-8 were skipped, 1-3 and 6-8 only contribute their new second
+    assert gate.skipped_seconds == 4.0
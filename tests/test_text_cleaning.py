@@ -0,0 +1,32 @@
+import pytest
+
+from ml4audio.text_processing.asr_text_cleaning import (
+    VocabCasingAwareTextCleaner,
+    Casing,
+    clean_and_filter_text,
+)
+from ml4audio.text_processing.character_mappings.text_cleaning import TEXT_CLEANERS
+
+TEXTS = [
+    "",
+    "  Jon-Do–e's\t\tsaid: „hallo“ ... ",
+    "Straße, Äpfel und Öl ü ö",
+    "a ¿ b , c",  # filtered letters must not glue spaces together
+    "shchja you th Ёлка",
+    "\x1c\xa0weird whitespaces\n",
+]
+
+
+@pytest.mark.parametrize("text_cleaner_name", list(TEXT_CLEANERS.keys()))
+@pytest.mark.parametrize("casing", [Casing.upper, Casing.lower, Casing.original])
+def test_compiled_cleaner_same_as_clean_and_filter_text(
+    vocab, text_cleaner_name, casing
+):
+    letters = [l for l in vocab if len(l) == 1]
+    cleaner = VocabCasingAwareTextCleaner(
+        casing=casing, text_cleaner_name=text_cleaner_name, letter_vocab=letters
+    )
+    expected = [
+        clean_and_filter_text(t, letters, text_cleaner_name, casing) for t in TEXTS
+    ]
+    assert list(cleaner.clean_many(TEXTS)) == expected
@@ -0,0 +1,48 @@
+import tempfile
+
+from data_io.readwrite_files import read_lines
+from misc_utils.buildable import BuildableList
+from misc_utils.prefix_suffix import PrefixSuffix, BASE_PATHES
+from ml4audio.text_processing.asr_text_cleaning import (
+    VocabCasingAwareTextCleaner,
+    Casing,
+)
+from ml4audio.text_processing.word_based_text_corpus import (
+    WordBasedLMCorpus,
+    RglobRawCorpus,
+)
+from conftest import TEST_RESOURCES
+
+
+def test_parallel_build_same_as_serial(vocab):
+    letters = [l for l in vocab if len(l) == 1]
+    cleaner = VocabCasingAwareTextCleaner(
+        casing=Casing.upper, text_cleaner_name="en", letter_vocab=letters
+    )
+    with tempfile.TemporaryDirectory() as cache_base:
+        BASE_PATHES["tmp"] = cache_base
+
+        def build_corpus(name: str, num_workers: int) -> WordBasedLMCorpus:
+            cache_base = PrefixSuffix("tmp", name)
+            raw_corpus = RglobRawCorpus(
+                cache_base=cache_base,
+                corpus_dir=TEST_RESOURCES,
+                file_pattern="*corpus.txt",
+                num_workers=num_workers,
+            )
+            return WordBasedLMCorpus(
+                name="test",
+                cache_base=cache_base,
+                raw_corpora=BuildableList[RglobRawCorpus]([raw_corpus]),
+                transcript_cleaner=cleaner,
+                num_workers=num_workers,
+                lines_per_job=7,
+            ).build()
+
+        serial = build_corpus("serial", num_workers=0)
+        parallel = build_corpus("parallel", num_workers=2)
+
+        for file in ["corpus_filepath", "word_counts_filepath"]:
+            expected = list(read_lines(getattr(serial, file)))
+            assert len(expected) > 0
+            assert list(read_lines(getattr(parallel, file))) == expected
@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from ml4audio.asr_inference.faster_whisper_inferencer import (
+    FasterWhisperArgs,
+    split_at_timestamp_tokens,
+)
+from whisper_streaming.batched_whisper_scheduler import BatchedWhisperScheduler
+
+
+class EchoBatchInferencer:
+    """
+    transcript is the prefix + the number of samples, remembers the batch-sizes
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def predict_batch_with_whisper_args(self, audio_arrays, whisper_args):
+        with self.lock:
+            self.batch_sizes.append(len(audio_arrays))
+        if any(wa.prefix == "fail" for wa in whisper_args):
+            raise ValueError("fail")
+        return [
+            [(0.0, 1.0, f"{wa.prefix}-{wa.language}-{len(a)}")]
+            for a, wa in zip(audio_arrays, whisper_args)
+        ]
+
+    def predict_transcribed_with_whisper_args(self, audio_array, whisper_args):
+        return [(0.0, 1.0, f"unbatched-{len(audio_array)}")]
+
+
+def _transcribe_concurrently(scheduler, requests):
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [
+            executor.submit(scheduler.predict_transcribed_with_whisper_args, a, wa)
+            for a, wa in requests
+        ]
+        return [f.result() for f in futures]
+
+
+def test_batched_whisper_scheduler():
+    inferencer = EchoBatchInferencer()
+    args = FasterWhisperArgs(language="en")
+    requests = [
+        (np.zeros(100 + k, dtype=np.float32), replace(args, prefix=f"session{k}"))
+        for k in range(6)
+    ]
+    with BatchedWhisperScheduler(
+        inferencer, max_batch_size=4, max_wait=0.5
+    ) as scheduler:
+        outputs = _transcribe_concurrently(scheduler, requests)
+
+    assert outputs == [[(0.0, 1.0, f"session{k}-en-{100+k}")] for k in range(6)]
+    assert inferencer.batch_sizes == [4, 2]
+
+
+def test_batched_whisper_scheduler_groups_by_decoding_options():
+    inferencer = EchoBatchInferencer()
+    requests = [
+        (np.zeros(100, dtype=np.float32), FasterWhisperArgs(language=lang))
+        for lang in ["en", "de", "en", "de"]
+    ]
+    with BatchedWhisperScheduler(
+        inferencer, max_batch_size=4, max_wait=0.5
+    ) as scheduler:
+        outputs = _transcribe_concurrently(scheduler, requests)
+
+    assert [o[0][2] for o in outputs] == ["None-en-100", "None-de-100"] * 2
+    assert sorted(inferencer.batch_sizes) == [2, 2]
+
+
+def test_batched_whisper_scheduler_max_wait():
+    inferencer = EchoBatchInferencer()
+    with BatchedWhisperScheduler(
+        inferencer, max_batch_size=8, max_wait=0.01
+    ) as scheduler:
+        start = time.perf_counter()
+        scheduler.predict_transcribed_with_whisper_args(
+            np.zeros(100, dtype=np.float32), FasterWhisperArgs()
+        )
+        assert time.perf_counter() - start < 0.5
+
+        future = scheduler.submit(
+            np.zeros(100, dtype=np.float32), FasterWhisperArgs(prefix="fail")
+        )
+        with pytest.raises(ValueError):
+            future.result()
+    assert inferencer.batch_sizes == [1, 1]
+
+
+def test_batched_whisper_scheduler_routes_unbatchable_args():
+    inferencer = EchoBatchInferencer()
+    with BatchedWhisperScheduler(inferencer) as scheduler:
+        outputs = [
+            scheduler.predict_transcribed_with_whisper_args(
+                np.zeros(100, dtype=np.float32), args
+            )
+            for args in [
+                FasterWhisperArgs(word_timestamps=True),
+                FasterWhisperArgs(vad_filter=True),
+            ]
+        ]
+    assert outputs == [[(0.0, 1.0, "unbatched-100")]] * 2
+    assert inferencer.batch_sizes == []
+
+
+def test_split_at_timestamp_tokens():
+    eot, ts = 100, 200  # ts: timestamp_begin, special tokens in between
+    tokens = [150, ts, 1, 2, ts + 100, ts + 100, 3, ts + 175, 4, eot]
+    segments = split_at_timestamp_tokens(tokens, ts, eot, 0.02, 4.0)
+    assert segments == [(0.0, 2.0, [1, 2]), (2.0, 3.5, [3]), (3.5, 4.0, [4])]
+    assert split_at_timestamp_tokens([1, 2, eot], ts, eot, 0.02, 4.0) == [
+        (0.0, 4.0, [1, 2])
+    ]
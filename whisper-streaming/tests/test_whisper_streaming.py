@@ -21,7 +21,7 @@ from whisper_streaming.whisper_streaming import (
     WhisperStreamer,
     concat_transcript,
     OverlappingSegment,
-    accumulate_transcript,
+    TranscriptAccumulator,
 )
 
 
@@ -72,7 +72,7 @@ def test_whisper_streaming(
         overwrite_last_k_words=3,
     )
     streaming_asr.build()
-    transcript: str = ""
+    accumulator = TranscriptAccumulator()
     num_responses = 0
     with streaming_asr:
         for inpt in asr_input:
@@ -80,10 +80,9 @@ def test_whisper_streaming(
                 inpt
             ):
                 num_responses += 1
-                transcript = accumulate_transcript(
-                    overlap_segment, new_segments, transcript
-                )
+                accumulator.handle(overlap_segment, new_segments)
                 print(f"{overlap_segment=}###{new_segments=}")
+    transcript = accumulator.transcript
     assert "  " not in transcript
     hyp = transcript
 
@@ -99,3 +98,19 @@ def test_whisper_streaming(
     print(f"{name}: {step_dur=},{window_dur=},{cer=}")
     assert cer <= max_CER
     assert num_responses_expected == num_responses, f"{num_responses=}"
+
+
+def test_transcript_accumulator():
+    accumulator = TranscriptAccumulator()
+    accumulator.handle(
+        OverlappingSegment(end=2.0, append_suffix=" the cat sat"),
+        [(2.0, 3.0, " on the cat")],
+    )
+    # revises the last words, the same words earlier in the transcript stay untouched
+    accumulator.handle(
+        OverlappingSegment(
+            end=4.0, append_suffix=" on the mat.", remove_suffix="on the cat"
+        ),
+        [(4.0, 5.0, "  The end.")],
+    )
+    assert accumulator.transcript == " the cat sat on the mat. The end."
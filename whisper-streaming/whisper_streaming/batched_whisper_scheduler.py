@@ -0,0 +1,159 @@
+"""
+pools the chunks of many WhisperStreamer-sessions into batches for faster-whisper's batched encode+generate
+a batch is closed when it is full (max_batch_size) or max_wait seconds after its first chunk arrived
+num_workers batches can be in flight at the same time -> give the WhisperModel as many ctranslate2-workers
+    inferencer = FasterWhisperArray2SegmentedTranscripts(..., num_workers=2)
+    with inferencer, BatchedWhisperScheduler(inferencer, num_workers=2) as scheduler:
+        sessions: forks (see streaming_benchmark.fork_pipeline) of a WhisperStreamer(asr_inferencer=inferencer, scheduler=scheduler)
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+import numpy as np
+from beartype import beartype
+
+from misc_utils.beartypes import NpFloatDim1
+from ml4audio.asr_inference.faster_whisper_inferencer import (
+    FasterWhisperArray2SegmentedTranscripts,
+    FasterWhisperArgs,
+    is_batchable,
+)
+from ml4audio.asr_inference.inference import StartEndTextsNonOverlap, SetupTearDown
+from ml4audio.service_utils.streaming_metrics import get_streaming_metrics
+
+PER_CHUNK_ARGS = ("initial_prompt", "prefix")
+
+
+@dataclass
+class _Request:
+    audio_array: np.ndarray
+    whisper_args: FasterWhisperArgs
+    future: Future
+
+
+def _decoding_options_key(whisper_args: FasterWhisperArgs) -> tuple:
+    """
+    only chunks with same decoding-options (beam_size, language, ...) can share a generate-call
+    """
+    return tuple(
+        (k, repr(v)) for k, v in asdict(whisper_args).items() if k not in PER_CHUNK_ARGS
+    )
+
+
+@dataclass
+class BatchedWhisperScheduler(SetupTearDown):
+    """
+    does not enter/exit the asr_inferencer, whoever owns it has to
+    chunks with word_timestamps or vad_filter are not batched but directly transcribed by the asr_inferencer
+    """
+
+    asr_inferencer: FasterWhisperArray2SegmentedTranscripts
+    max_batch_size: int = 8
+    max_wait: float = 0.05  # seconds
+    num_workers: int = 1
+
+    _queue: Optional[queue.Queue] = field(init=False, repr=False, default=None)
+    _workers: list[threading.Thread] = field(
+        init=False, repr=False, default_factory=list
+    )
+
+    def __enter__(self):
+        self._queue = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    @beartype
+    def submit(
+        self, audio_array: NpFloatDim1, whisper_args: FasterWhisperArgs
+    ) -> Future:
+        assert len(self._workers) > 0, "scheduler not entered"
+        future = Future()
+        if is_batchable(whisper_args):
+            self._queue.put(_Request(audio_array, whisper_args, future))
+        else:
+            try:
+                future.set_result(
+                    self.asr_inferencer.predict_transcribed_with_whisper_args(
+                        audio_array, whisper_args
+                    )
+                )
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    @beartype
+    def predict_transcribed_with_whisper_args(
+        self, audio_array: NpFloatDim1, whisper_args: FasterWhisperArgs
+    ) -> StartEndTextsNonOverlap:
+        """
+        blocking, same signature as FasterWhisperArray2SegmentedTranscripts' -> drop-in for a WhisperStreamer
+        """
+        return self.submit(audio_array, whisper_args).result()
+
+    def _next_batch(self) -> Optional[list[_Request]]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # shutdown, but first finish this batch
+                break
+            batch.append(request)
+        return batch
+
+    def _work(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            groups: dict[tuple, list[_Request]] = {}
+            for request in batch:
+                key = _decoding_options_key(request.whisper_args)
+                groups.setdefault(key, []).append(request)
+            for requests in groups.values():
+                self._run(requests)
+
+    def _run(self, requests: list[_Request]) -> None:
+        start = time.perf_counter()
+        try:
+            outputs = self.asr_inferencer.predict_batch_with_whisper_args(
+                [r.audio_array for r in requests], [r.whisper_args for r in requests]
+            )
+        except Exception as e:
+            for r in requests:
+                r.future.set_exception(e)
+            return
+        for r, output in zip(requests, outputs):
+            r.future.set_result(output)
+
+        metrics = get_streaming_metrics()
+        if metrics is not None:
+            metrics.observe_stage(
+                "batched_whisper_inference", time.perf_counter() - start
+            )
+            metrics.count("whisper_batches")  # mean batch-size: batched_chunks/batches
+            for _ in requests:
+                metrics.count("whisper_batched_chunks")
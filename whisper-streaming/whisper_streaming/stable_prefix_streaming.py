@@ -0,0 +1,189 @@
+"""
+local-agreement commit-policy for streaming whisper (see: https://github.com/ufal/whisper_streaming)
+    1. transcribe the not-yet-committed audio (starting after the last committed word) with word-timestamps
+    2. words that two consecutive hypotheses agree on (common prefix) are committed = final, never change again
+    3. audio-buffer gets trimmed to start after the last committed word -> decoded audio per step stays short
+transcript is an append-only list of committed words, no string-replacing of already emitted text
+"""
+
+import string
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, ClassVar, Iterator, Optional
+
+import numpy as np
+from beartype import beartype
+from beartype.door import is_bearable
+
+from ctc_asr_chunked_inference.asr_infer_decode import convert_and_resample
+from misc_utils.beartypes import NeNpFloatDim1
+from misc_utils.buildable import Buildable
+from misc_utils.dataclass_utils import UNDEFINED
+from ml4audio.asr_inference.faster_whisper_inferencer import (
+    FasterWhisperArray2SegmentedTranscripts,
+    TimestampedWords,
+)
+from ml4audio.asr_inference.inference import SetupTearDown
+from ml4audio.audio_utils.audio_io import AudioMessageChunk
+from ml4audio.service_utils.streaming_metrics import get_streaming_metrics, timed_stage
+from whisper.audio import SAMPLE_RATE as WHISPER_SAMPLE_RATE
+
+MAX_REPEATED_NGRAM = 5
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def _normalize(word: str) -> str:
+    return word.strip().lower().translate(_PUNCTUATION_TABLE)
+
+
+@beartype
+def agreed_prefix_len(previous: TimestampedWords, current: TimestampedWords) -> int:
+    k = 0
+    for (_, _, a), (_, _, b) in zip(previous, current):
+        if _normalize(a) != _normalize(b):
+            break
+        k += 1
+    return k
+
+
+@beartype
+def drop_repeated_words(
+    committed: TimestampedWords, words: TimestampedWords
+) -> TimestampedWords:
+    """
+    whisper (prompted with the committed text) sometimes repeats the last committed words at the start
+    """
+    for n in range(min(MAX_REPEATED_NGRAM, len(committed), len(words)), 0, -1):
+        tail = [_normalize(t) for _, _, t in committed[-n:]]
+        head = [_normalize(t) for _, _, t in words[:n]]
+        if tail == head:
+            return words[n:]
+    return words
+
+
+@dataclass
+class StablePrefixWhisperStreamer(Buildable, SetupTearDown):
+    """
+    yields the newly committed words (start,end,word), concatenating all of them gives the transcript
+    min_step_duration: transcribe only once this much new audio arrived
+    max_buffer_duration: if hypotheses do not agree for that long, the words in the first half of the buffer get
+        committed anyway -> buffer never exceeds whisper's 30 seconds window
+    """
+
+    input_sample_rate: int = 16_000
+    asr_inferencer: FasterWhisperArray2SegmentedTranscripts = UNDEFINED
+    min_step_duration: float = 1.0
+    max_buffer_duration: float = 20.0
+    max_prompt_chars: int = 200
+
+    committed: TimestampedWords = field(init=False, repr=False, default_factory=list)
+    _audio: Optional[np.ndarray] = field(init=False, repr=False, default=None)
+    _audio_offset: int = field(init=False, repr=False, default=0)  # in samples
+    _new_samples: int = field(init=False, repr=False, default=0)
+    _hypothesis: TimestampedWords = field(init=False, repr=False, default_factory=list)
+
+    model_sample_rate: ClassVar[int] = WHISPER_SAMPLE_RATE
+
+    def reset(self) -> None:
+        self.committed = []
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._audio_offset = 0
+        self._new_samples = 0
+        self._hypothesis = []
+
+    @property
+    def name(self):
+        return f"stable-prefix-streaming-{self.asr_inferencer.name}"
+
+    @property
+    def transcript(self) -> str:
+        return "".join(t for _, _, t in self.committed)
+
+    def _build_self(self) -> Any:
+        self.reset()
+
+    def __enter__(self):
+        self.asr_inferencer.__enter__()
+
+    def __exit__(self, exc_type=None, exc_val=None, exc_tb=None):
+        self.asr_inferencer.__exit__(exc_type, exc_val, exc_tb)
+
+    @beartype
+    def handle_inference_input(
+        self, inpt: AudioMessageChunk
+    ) -> Iterator[TimestampedWords]:
+        metrics = get_streaming_metrics()
+        if metrics is not None:
+            metrics.observe_audio(
+                inpt.message_id, len(inpt.array) / self.input_sample_rate
+            )
+        self._audio = np.concatenate([self._audio, inpt.array])
+        self._new_samples += len(inpt.array)
+        is_step = self._new_samples >= self.min_step_duration * self.input_sample_rate
+        if not (is_step or inpt.end_of_signal):
+            return
+
+        start = time.perf_counter()
+        newly_committed = self._transcribe_and_commit(inpt.end_of_signal)
+        if metrics is not None:
+            metrics.observe_compute(inpt.message_id, time.perf_counter() - start)
+            if len(newly_committed) > 0:
+                metrics.observe_emit(inpt.message_id, newly_committed[-1][1])
+            if inpt.end_of_signal:
+                metrics.finish_session(inpt.message_id)
+        if len(newly_committed) > 0:
+            yield newly_committed
+
+    def _transcribe_and_commit(self, end_of_signal: bool) -> TimestampedWords:
+        self._new_samples = 0
+        if len(self._audio) == 0:
+            newly_committed = self._hypothesis if end_of_signal else []
+            self.committed.extend(newly_committed)
+            self._hypothesis = [] if end_of_signal else self._hypothesis
+            return newly_committed
+        assert is_bearable(self._audio, NeNpFloatDim1)
+        with timed_stage("resampling"):
+            audio_array = convert_and_resample(
+                self._audio, self.input_sample_rate, self.model_sample_rate
+            )
+        offset = self._audio_offset / self.input_sample_rate
+        prompt = "".join(t for _, _, t in self.committed[-100:])
+        whisper_args = replace(
+            self.asr_inferencer.whisper_args,
+            initial_prompt=prompt[-self.max_prompt_chars :] or None,
+            prefix=None,
+        )
+        with timed_stage("whisper_inference"):
+            words = [
+                (s + offset, e + offset, t)
+                for s, e, t in self.asr_inferencer.predict_words_with_whisper_args(
+                    audio_array, whisper_args
+                )
+            ]
+        words = drop_repeated_words(self.committed, words)
+
+        num_agreed = agreed_prefix_len(self._hypothesis, words)
+        if end_of_signal:
+            num_agreed = len(words)
+        elif num_agreed == 0 and self._buffer_duration > self.max_buffer_duration:
+            half_buffer = offset + self._buffer_duration / 2
+            num_agreed = len([w for w in words if w[1] <= half_buffer])
+
+        newly_committed, self._hypothesis = words[:num_agreed], words[num_agreed:]
+        self.committed.extend(newly_committed)
+        if len(newly_committed) > 0:
+            self._trim_audio(newly_committed[-1][1])
+        elif self._buffer_duration > self.max_buffer_duration:
+            self._trim_audio(offset + self._buffer_duration / 2)  # silence/noise
+        return newly_committed
+
+    @property
+    def _buffer_duration(self) -> float:
+        return len(self._audio) / self.input_sample_rate
+
+    def _trim_audio(self, new_start: float) -> None:
+        cut = int(round(new_start * self.input_sample_rate)) - self._audio_offset
+        cut = min(max(cut, 0), len(self._audio))
+        self._audio = self._audio[cut:]
+        self._audio_offset += cut
@@ -1,6 +1,7 @@
 import re
 import string
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass, field, replace
 from typing import Iterator, Optional, Any, ClassVar
 
 from beartype import beartype
@@ -25,6 +26,13 @@ from ml4audio.audio_utils.overlap_array_chunker import (
     MessageChunk,
 )
 from ml4audio.audio_utils.audio_io import AudioMessageChunk
+from ml4audio.audio_utils.streaming_vad_gate import StreamingVADGate
+from ml4audio.service_utils.streaming_metrics import (
+    get_streaming_metrics,
+    timed_iterable,
+    timed_stage,
+)
+from whisper_streaming.batched_whisper_scheduler import BatchedWhisperScheduler
 from whisper.audio import SAMPLE_RATE as WHISPER_SAMPLE_RATE
 
 set_seed(42)
@@ -75,6 +83,10 @@ class WhisperStreamer(Buildable, SetupTearDown):
         init=True, repr=True, default=None
     )
     overwrite_last_k_words: int = 3  # TODO: which values here?
+    # shared by many sessions, batches their chunks; None -> asr_inferencer is called directly
+    scheduler: Optional[BatchedWhisperScheduler] = None
+    # chunks without speech are not transcribed, transcripts_buffer stays as it is
+    vad_gate: Optional[StreamingVADGate] = None
 
     transcripts_buffer: Optional[StartEndTextsNonOverlap] = field(
         init=True, repr=False, default_factory=lambda: []
@@ -85,12 +97,16 @@ class WhisperStreamer(Buildable, SetupTearDown):
     def reset(self) -> None:
         self.audio_bufferer.reset()
         self.transcripts_buffer = []
+        if self.vad_gate is not None:
+            self.vad_gate.reset()
 
     @property
     def name(self):
         return f"streaming-{self.asr_inferencer.name}"
 
     def _build_self(self) -> Any:
+        if self.vad_gate is not None:
+            assert self.vad_gate.sample_rate == self.input_sample_rate
         self.reset()
 
     def __enter__(self):
@@ -103,9 +119,39 @@ class WhisperStreamer(Buildable, SetupTearDown):
     def handle_inference_input(
         self, inpt: AudioMessageChunk
     ) -> Iterator[tuple[OverlappingSegment, StartEndTextsNonOverlap]]:
-        for chunk in self.audio_bufferer.handle_datum(inpt):
+        metrics = get_streaming_metrics()
+        if metrics is not None:
+            metrics.observe_audio(
+                inpt.message_id, len(inpt.array) / self.input_sample_rate
+            )
+        if self.vad_gate is not None:
+            with timed_stage("vad"):
+                self.vad_gate.handle_audio(inpt.array, inpt.end_of_signal)
+        chunks = timed_iterable("chunking", self.audio_bufferer.handle_datum(inpt))
+        for chunk in chunks:
             # print(f"chunk-dur: {len(chunk.array)/self.input_sample_rate}")
+            if self.vad_gate is not None and self.vad_gate.is_silence(
+                chunk.frame_idx, len(chunk.array)
+            ):
+                if metrics is not None and chunk.end_of_signal:
+                    metrics.finish_session(chunk.message_id)
+                continue
+            start = time.perf_counter()
             out = self._transcribe_chunk(chunk, self.transcripts_buffer)
+            if metrics is not None:
+                metrics.observe_compute(chunk.message_id, time.perf_counter() - start)
+                if out is None:
+                    metrics.count("no_transcript_segments")
+                else:
+                    overlap_segment, non_overlapping_segments = out
+                    audio_end = (
+                        non_overlapping_segments[-1][1]
+                        if len(non_overlapping_segments) > 0
+                        else overlap_segment.end
+                    )
+                    metrics.observe_emit(chunk.message_id, audio_end)
+                if chunk.end_of_signal:
+                    metrics.finish_session(chunk.message_id)
             if out is not None:
                 overlap_segment, non_overlapping_segments = out
                 self.transcripts_buffer = [
@@ -124,25 +170,30 @@ class WhisperStreamer(Buildable, SetupTearDown):
         assert is_bearable(
             chunk.array, NeNpFloatDim1
         )  # why should I want to allow int16 or other crazy stuff here?
-        audio_array = convert_and_resample(
-            chunk.array,
-            self.input_sample_rate,
-            self.model_sample_rate,
-        )
-        chunk_offset = float(chunk.frame_idx) / self.input_sample_rate
-        whisper_args = self.asr_inferencer.whisper_args
-
-        (
-            remove_suffix,
-            whisper_args.initial_prompt,
-            whisper_args.prefix,
-        ) = self._whisperprefix_and_removesuffix(chunk_offset, transcripts_buffer)
-        this_chunks_transcript_segments = [
-            (s + chunk_offset, e + chunk_offset, t)
-            for s, e, t in self.asr_inferencer.predict_transcribed_with_whisper_args(
-                audio_array, whisper_args
+        with timed_stage("resampling"):
+            audio_array = convert_and_resample(
+                chunk.array,
+                self.input_sample_rate,
+                self.model_sample_rate,
             )
-        ]
+        chunk_offset = float(chunk.frame_idx) / self.input_sample_rate
+        remove_suffix, initial_prompt, prefix = self._whisperprefix_and_removesuffix(
+            chunk_offset, transcripts_buffer
+        )
+        # a copy, the asr_inferencer (and its whisper_args) might be shared by multiple sessions
+        whisper_args = replace(
+            self.asr_inferencer.whisper_args,
+            initial_prompt=initial_prompt,
+            prefix=prefix,
+        )
+        inferencer = self.asr_inferencer if self.scheduler is None else self.scheduler
+        with timed_stage("whisper_inference"):
+            this_chunks_transcript_segments = [
+                (s + chunk_offset, e + chunk_offset, t)
+                for s, e, t in inferencer.predict_transcribed_with_whisper_args(
+                    audio_array, whisper_args
+                )
+            ]
         # print(
         #     f"{chunk_offset=},{len(audio_array)/self.input_sample_rate},{whisper_args.initial_prompt=},{whisper_args.prefix=},{this_chunks_transcript_segments=}"
         # )
@@ -214,17 +265,44 @@ class WhisperStreamer(Buildable, SetupTearDown):
         return remove_suffix, whisper_prompt, whisper_prefix
 
 
-@beartype
-def accumulate_transcript(
-    overlap_segment: OverlappingSegment,
-    new_segments: StartEndTextsNonOverlap,
-    transcript: str,
-) -> str:
-    if overlap_segment.remove_suffix is not None:
-        assert transcript.endswith(
-            overlap_segment.remove_suffix
-        ), f"{transcript=},{overlap_segment.remove_suffix=}"
-        transcript = transcript.replace(overlap_segment.remove_suffix, "")
-    transcript += overlap_segment.append_suffix + concat_transcript(new_segments)
-    transcript = transcript.replace("  ", " ")
-    return transcript
+@dataclass
+class TranscriptAccumulator:
+    """
+    accumulates WhisperStreamer's outputs into a transcript
+    append-only list of text-pieces, an OverlappingSegment's remove_suffix only pops the last pieces
+        -> cost of an update is proportional to the update, not to the transcript's length
+    """
+
+    pieces: list[str] = field(default_factory=list)
+
+    @property
+    def transcript(self) -> str:
+        return "".join(self.pieces)
+
+    @beartype
+    def handle(
+        self,
+        overlap_segment: OverlappingSegment,
+        new_segments: StartEndTextsNonOverlap,
+    ) -> None:
+        if overlap_segment.remove_suffix is not None:
+            self._remove_suffix(overlap_segment.remove_suffix)
+        self._append(overlap_segment.append_suffix)
+        for _, _, text in new_segments:
+            self._append(text)
+
+    def _remove_suffix(self, suffix: str) -> None:
+        tail = ""
+        while len(tail) < len(suffix) and len(self.pieces) > 0:
+            tail = self.pieces.pop() + tail
+        assert tail.endswith(suffix), f"{tail=},{suffix=}"
+        rest = tail[: len(tail) - len(suffix)]
+        if len(rest) > 0:
+            self.pieces.append(rest)
+
+    def _append(self, text: str) -> None:
+        text = text.replace("  ", " ")
+        if len(self.pieces) > 0 and self.pieces[-1].endswith(" "):
+            text = text.removeprefix(" ")
+        if len(text) > 0:
+            self.pieces.append(text)